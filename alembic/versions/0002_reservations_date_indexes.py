@@ -0,0 +1,35 @@
+"""reservations date indexes
+
+Revision ID: 0002_reservations_date_indexes
+Revises: 0001_initial
+Create Date: 2026-10-18T09:00:00.000000Z
+"""
+
+from alembic import op
+
+revision = "0002_reservations_date_indexes"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # solapes por habitación (has_overlap / has_overlap_excluding)
+    op.create_index(
+        "ix_reservations_room_status_dates",
+        "reservations",
+        ["room_id", "status", "fecha_inicio", "fecha_fin"],
+        unique=False,
+    )
+
+    # /reservations/blocked filtra por rango sin room_id: en Postgres un GiST
+    # sobre daterange resuelve el "&&" sin recorrer el histórico
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            "CREATE INDEX ix_reservations_daterange ON reservations "
+            "USING gist (daterange(fecha_inicio, fecha_fin))"
+        )
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_reservations_daterange")
+    op.drop_index("ix_reservations_room_status_dates", table_name="reservations")
@@ -0,0 +1,31 @@
+"""reservations no overlap (exclusion constraint)
+
+Revision ID: 0003_reservations_no_overlap
+Revises: 0002_reservations_date_indexes
+Create Date: 2026-10-18T10:00:00.000000Z
+"""
+
+from alembic import op
+
+revision = "0003_reservations_no_overlap"
+down_revision = "0002_reservations_date_indexes"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Solo Postgres. Falla si ya existen reservas activas solapadas: hay que
+    # cancelarlas antes de migrar.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    # btree_gist: permite "room_id WITH =" dentro de un índice GiST
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute(
+        "ALTER TABLE reservations ADD CONSTRAINT ex_reservations_room_dates "
+        "EXCLUDE USING gist (room_id WITH =, daterange(fecha_inicio, fecha_fin) WITH &&) "
+        "WHERE (status IN ('pending', 'paid'))"
+    )
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("ALTER TABLE reservations DROP CONSTRAINT IF EXISTS ex_reservations_room_dates")
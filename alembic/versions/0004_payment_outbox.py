@@ -0,0 +1,36 @@
+"""payment outbox
+
+Revision ID: 0004_payment_outbox
+Revises: 0003_reservations_no_overlap
+Create Date: 2026-10-18T11:00:00.000000Z
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_payment_outbox"
+down_revision = "0003_reservations_no_overlap"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "payment_outbox",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("reservation_id", sa.Integer(), sa.ForeignKey("reservations.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("kind", sa.String(length=20), nullable=False, server_default="create_order"),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("available_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("processed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("approve_url", sa.String(length=500), nullable=True),
+    )
+    op.create_index("ix_payment_outbox_reservation_id", "payment_outbox", ["reservation_id"], unique=True)
+    op.create_index("ix_payment_outbox_status_available", "payment_outbox", ["status", "available_at"], unique=False)
+
+def downgrade():
+    op.drop_index("ix_payment_outbox_status_available", table_name="payment_outbox")
+    op.drop_index("ix_payment_outbox_reservation_id", table_name="payment_outbox")
+    op.drop_table("payment_outbox")
@@ -0,0 +1,29 @@
+"""reservations expires_at (vencimiento de pending)
+
+Revision ID: 0005_reservations_expires_at
+Revises: 0004_payment_outbox
+Create Date: 2026-10-18T12:00:00.000000Z
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_reservations_expires_at"
+down_revision = "0004_payment_outbox"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("reservations", sa.Column("expires_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        "ix_reservations_pending_expires_at",
+        "reservations",
+        ["expires_at"],
+        unique=False,
+        postgresql_where=sa.text("status = 'pending'"),
+        sqlite_where=sa.text("status = 'pending'"),
+    )
+
+def downgrade():
+    op.drop_index("ix_reservations_pending_expires_at", table_name="reservations")
+    op.drop_column("reservations", "expires_at")
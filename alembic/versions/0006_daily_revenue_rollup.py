@@ -0,0 +1,41 @@
+"""daily revenue rollup + índice status/created_at
+
+Revision ID: 0006_daily_revenue_rollup
+Revises: 0005_reservations_expires_at
+Create Date: 2026-10-18T13:00:00.000000Z
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_daily_revenue_rollup"
+down_revision = "0005_reservations_expires_at"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "daily_revenue_rollup",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("room_type_id", sa.Integer(), sa.ForeignKey("room_types.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("revenue", sa.Numeric(12, 2), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("day", "room_type_id"),
+    )
+    op.create_index("ix_reservations_status_created_at", "reservations", ["status", "created_at"], unique=False)
+
+    # carga inicial (después: python -m app.workers.rollup_backfill para recalcular)
+    op.execute(
+        """
+        INSERT INTO daily_revenue_rollup (day, room_type_id, count, revenue)
+        SELECT date(r.created_at), rm.room_type_id, count(*), sum(r.costo_total)
+        FROM reservations r
+        JOIN rooms rm ON rm.id = r.room_id
+        WHERE r.status = 'paid'
+        GROUP BY date(r.created_at), rm.room_type_id
+        """
+    )
+
+def downgrade():
+    op.drop_index("ix_reservations_status_created_at", table_name="reservations")
+    op.drop_table("daily_revenue_rollup")
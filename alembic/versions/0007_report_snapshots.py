@@ -0,0 +1,34 @@
+"""report snapshots (CSV de períodos cerrados)
+
+Revision ID: 0007_report_snapshots
+Revises: 0006_daily_revenue_rollup
+Create Date: 2026-10-18T14:00:00.000000Z
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_report_snapshots"
+down_revision = "0006_daily_revenue_rollup"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "report_snapshots",
+        sa.Column("name", sa.String(length=80), primary_key=True),
+        sa.Column("kind", sa.String(length=10), nullable=False),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("end_date", sa.Date(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("built_version", sa.Integer(), nullable=True),
+        sa.Column("path", sa.String(length=500), nullable=True),
+        sa.Column("sha256", sa.String(length=64), nullable=True),
+        sa.Column("size", sa.Integer(), nullable=True),
+        sa.Column("built_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_report_snapshots_period", "report_snapshots", ["start_date", "end_date"], unique=False)
+
+def downgrade():
+    op.drop_index("ix_report_snapshots_period", table_name="report_snapshots")
+    op.drop_table("report_snapshots")
@@ -0,0 +1,33 @@
+"""reservations capturing (el EXCLUDE también cubre las reservas en captura)
+
+Revision ID: 0008_reservations_capturing
+Revises: 0007_report_snapshots
+Create Date: 2026-10-18T15:00:00.000000Z
+"""
+
+from alembic import op
+
+revision = "0008_reservations_capturing"
+down_revision = "0007_report_snapshots"
+branch_labels = None
+depends_on = None
+
+def _replace_constraint(statuses: str):
+    op.execute("ALTER TABLE reservations DROP CONSTRAINT IF EXISTS ex_reservations_room_dates")
+    op.execute(
+        "ALTER TABLE reservations ADD CONSTRAINT ex_reservations_room_dates "
+        "EXCLUDE USING gist (room_id WITH =, daterange(fecha_inicio, fecha_fin) WITH &&) "
+        f"WHERE (status IN ({statuses}))"
+    )
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    _replace_constraint("'pending', 'capturing', 'paid'")
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    # una captura a medias vuelve a pending (el usuario puede reintentarla)
+    op.execute("UPDATE reservations SET status = 'pending' WHERE status = 'capturing'")
+    _replace_constraint("'pending', 'paid'")
@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import select
 
 from app.core.database import get_db
-from app.core.security import verify_password, create_access_token, hash_password
+from app.core.security import verify_password, create_access_token, hash_password, needs_rehash
 from app.core.config import settings
 from app.models.user import User
 from app.schemas.auth import RegisterIn, RegisterOut
@@ -41,6 +41,7 @@ def register(payload: RegisterIn, db: Session = Depends(get_db)):
     token = create_access_token(
         sub=user.email,
         role=user.role,
+        uid=user.id,
         expires_minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES,
     )
 
@@ -63,9 +64,15 @@ def login(
     if not user or not verify_password(password, user.password_hash):
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
 
+    # rehash transparente si el hash quedó con menos rondas / esquema deprecado
+    if needs_rehash(user.password_hash):
+        user.password_hash = hash_password(password)
+        db.commit()
+
     token = create_access_token(
         sub=user.email,
         role=user.role,
+        uid=user.id,
         expires_minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES,
     )
 
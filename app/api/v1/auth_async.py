@@ -0,0 +1,82 @@
+# Versión async de auth.py (settings.DB_ASYNC).
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.core.database import get_async_db
+from app.core.security import verify_password_async, create_access_token, hash_password_async, needs_rehash
+from app.core.config import settings
+from app.models.user import User
+from app.schemas.auth import RegisterIn, RegisterOut
+
+router = APIRouter(prefix="/auth", tags=["Auth"])
+
+
+@router.post("/register", response_model=RegisterOut, status_code=201)
+async def register(payload: RegisterIn, db: AsyncSession = Depends(get_async_db)):
+    email = payload.email.lower().strip()
+
+    if (await db.execute(select(User.id).where(User.email == email))).first():
+        raise HTTPException(status_code=400, detail="Email ya existe")
+
+    if (await db.execute(select(User.id).where(User.cedula == payload.cedula))).first():
+        raise HTTPException(status_code=400, detail="Cédula ya existe")
+
+    password_hash = await hash_password_async(payload.password)
+
+    user = User(
+        nombre=payload.nombre,
+        apellido=payload.apellido,
+        email=email,
+        cedula=payload.cedula,
+        telefono=payload.telefono,
+        password_hash=password_hash,
+        role="cliente",
+    )
+
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+
+    token = create_access_token(
+        sub=user.email,
+        role=user.role,
+        uid=user.id,
+        expires_minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES,
+    )
+
+    return {
+        "access_token": token,
+        "token_type": "bearer",
+        "user": user,
+    }
+
+
+@router.post("/login")
+async def login(
+    form: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    email = form.username.lower().strip()
+    password = form.password
+
+    user = (await db.execute(select(User).where(User.email == email))).scalars().first()
+    if not user or not await verify_password_async(password, user.password_hash):
+        raise HTTPException(status_code=401, detail="Credenciales inválidas")
+
+    if needs_rehash(user.password_hash):
+        user.password_hash = await hash_password_async(password)
+        await db.commit()
+
+    token = create_access_token(
+        sub=user.email,
+        role=user.role,
+        uid=user.id,
+        expires_minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES,
+    )
+
+    return {
+        "access_token": token,
+        "token_type": "bearer",
+    }
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends
+
+from app.core.config import settings
+from app.core.database import engine, async_engine
+from app.core.pool_metrics import MeteredQueuePool, MeteredAsyncQueuePool
+from app.core.principal_cache import Principal, principal_cache
+from app.core.security import require_admin, require_admin_async
+from app.services import cache_bus
+from app.services.pdf_render import pdf_renderer
+
+router = APIRouter()
+
+_admin = require_admin_async if settings.DB_ASYNC else require_admin
+
+
+@router.get("/db-pool")
+def db_pool_metrics(_principal: Principal = Depends(_admin)):
+    """Contadores del pool de este worker (checkouts, espera, agotamiento)."""
+    out = {"sync": MeteredQueuePool.metrics.snapshot(engine.pool)}
+    if async_engine is not None:
+        out["async"] = MeteredAsyncQueuePool.metrics.snapshot(async_engine.pool)
+    return out
+
+
+@router.get("/auth-cache")
+def auth_cache_metrics(_principal: Principal = Depends(_admin)):
+    """Hits/misses de la caché de usuarios autenticados de este worker."""
+    return principal_cache.stats()
+
+
+@router.get("/pdf-render")
+def pdf_render_metrics(_principal: Principal = Depends(_admin)):
+    """Cola, rechazos y tiempos de render de PDFs de este worker."""
+    return pdf_renderer.metrics.snapshot()
+
+
+@router.get("/cache-bus")
+def cache_bus_metrics(_principal: Principal = Depends(_admin)):
+    """Avisos de invalidación recibidos, resincronizaciones y reconexiones de este worker."""
+    return cache_bus.stats.snapshot()
@@ -1,19 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
+from sqlalchemy import select
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.reservation import Reservation
-from app.schemas.paypal import PayPalCreateOrderIn, PayPalCreateOrderOut, PayPalCaptureIn, PayPalCaptureOut
-from app.services.reservations_service import create_pending_reservation
+from app.models.payment_outbox import PaymentOutbox
+from app.schemas.paypal import (
+    PayPalCreateOrderIn,
+    PayPalCreateOrderOut,
+    PayPalOrderStatusOut,
+    PayPalCaptureIn,
+    PayPalCaptureOut,
+)
+from app.services.checkout_outbox import enqueue_create_order
+from app.services.reservations_service import claim_for_capture, create_pending_reservation, release_capture
 from app.services import paypal_service
+from app.services.availability_index import availability_index
+from app.services.pdf_cache import load_reservation_fields, prerender_background
+from app.services.receipt_archive import receipt_key
 from app.storage.files import write_text
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 @router.post("/create-order", response_model=PayPalCreateOrderOut, status_code=201)
-def create_order(payload: PayPalCreateOrderIn, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
+def create_order(
+    payload: PayPalCreateOrderIn,
+    response: Response,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_user),
+):
     # 1) crea reserva pending
     try:
         res = create_pending_reservation(
@@ -22,24 +44,38 @@ def create_order(payload: PayPalCreateOrderIn, db: Session = Depends(get_db), cu
             room_id=payload.room_id,
             start=payload.fecha_inicio,
             end=payload.fecha_fin,
+            commit=not settings.PAYPAL_CHECKOUT_ASYNC,
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    if settings.PAYPAL_CHECKOUT_ASYNC:
+        # reserva + outbox en una transacción; la orden la crea el worker.
+        # El cliente consulta GET /orders/{reservation_id} hasta tener approve_url.
+        enqueue_create_order(db, res)
+        db.commit()
+        availability_index.refresh_room(db, res.room_id)
+        response.status_code = 202
+        return PayPalCreateOrderOut(reservation_id=res.id, status="queued")
+
     # 2) PayPal order (monto)
     amount = f"{float(res.costo_total):.2f}"
     try:
-        order = paypal_service.create_order(amount=amount, currency="USD", reference_id=str(res.id))
+        order = paypal_service.create_order(
+            amount=amount, currency="USD", reference_id=str(res.id), request_id=f"reserva-{res.id}"
+        )
     except Exception as e:
         # si falla PayPal, cancela reserva pending para no bloquear
         res.status = "cancelled"
         db.commit()
+        availability_index.refresh_room(db, res.room_id)
         raise HTTPException(status_code=502, detail=f"PayPal error: {e}")
 
     order_id = order.get("id")
     if not order_id:
         res.status = "cancelled"
         db.commit()
+        availability_index.refresh_room(db, res.room_id)
         raise HTTPException(status_code=502, detail="PayPal no devolvió order id")
 
     res.paypal_order_id = order_id
@@ -49,6 +85,31 @@ def create_order(payload: PayPalCreateOrderIn, db: Session = Depends(get_db), cu
     approve_url = paypal_service.extract_approve_url(order)
     return PayPalCreateOrderOut(reservation_id=res.id, paypal_order_id=order_id, approve_url=approve_url)
 
+@router.get("/orders/{reservation_id}", response_model=PayPalOrderStatusOut)
+def order_status(reservation_id: int, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
+    res = db.get(Reservation, reservation_id)
+    if not res:
+        raise HTTPException(status_code=404, detail="Reserva no existe")
+    if res.user_id != current.id and current.role != "admin":
+        raise HTTPException(status_code=403, detail="No permitido")
+
+    entry = db.execute(select(PaymentOutbox).where(PaymentOutbox.reservation_id == res.id)).scalars().first()
+    if entry is None:
+        # sin fila de outbox: checkout sync o reserva creada por admin
+        status = "ready" if res.paypal_order_id else "not_found"
+    elif entry.status == "failed":
+        status = "failed"
+    else:
+        status = "ready" if res.paypal_order_id else "queued"
+
+    return PayPalOrderStatusOut(
+        reservation_id=res.id,
+        paypal_order_id=res.paypal_order_id,
+        approve_url=entry.approve_url if entry else None,
+        status=status,
+        reservation_status=res.status,
+    )
+
 @router.post("/capture-order", response_model=PayPalCaptureOut)
 def capture_order(payload: PayPalCaptureIn, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
     res = db.get(Reservation, payload.reservation_id)
@@ -61,29 +122,58 @@ def capture_order(payload: PayPalCaptureIn, db: Session = Depends(get_db), curre
     if not res.paypal_order_id:
         raise HTTPException(status_code=400, detail="Reserva no tiene paypal_order_id")
 
+    # reclamo pending -> capturing y commit: la llamada a PayPal corre sin
+    # transacción abierta (ni lock de fila ni conexión del pool tomados)
+    order_id, hold = res.paypal_order_id, res.expires_at
+    if not claim_for_capture(db, res.id):
+        db.refresh(res)
+        raise HTTPException(status_code=400, detail=f"Reserva no está pending (status={res.status})")
+
     # capture
     try:
-        capture = paypal_service.capture_order(res.paypal_order_id)
+        capture = paypal_service.capture_order(order_id)
     except Exception as e:
+        release_capture(db, res.id, hold)
         raise HTTPException(status_code=502, detail=f"PayPal capture error: {e}")
 
     capture_id = paypal_service.extract_capture_id(capture)
     # PayPal suele devolver status COMPLETED
     pp_status = capture.get("status", "")
     if pp_status not in ["COMPLETED", "APPROVED"]:
+        release_capture(db, res.id, hold)
         raise HTTPException(status_code=400, detail=f"Pago no completado (paypal status={pp_status})")
 
+    # capturing -> paid por el ORM (los listeners del rollup/snapshots ven el cambio).
+    # FOR UPDATE solo en este cierre: si el reclamo venció (release_stale_captures)
+    # la reserva pudo volver a pending, cancelarse y la habitación reservarse de nuevo
+    db.refresh(res, with_for_update=True)
+    if res.status != "capturing":
+        lost = res.status
+        res.paypal_capture_id = capture_id  # queda registrado para el reembolso
+        db.commit()
+        logger.error(
+            "captura %s cobrada pero la reserva %s ya no estaba en captura (status=%s)", capture_id, res.id, lost
+        )
+        raise HTTPException(
+            status_code=409,
+            detail=f"El pago se capturó pero la reserva ya no estaba retenida (status={lost}); contacta a soporte",
+        )
     res.status = "paid"
     res.paypal_capture_id = capture_id
+    res.expires_at = hold
     db.commit()
     db.refresh(res)
 
     # (Opcional) generar un "reporte" simple en texto por MVP
     # Puedes cambiarlo luego a PDF; aquí mantenemos tu requisito de "path" en carpeta.
-    rel = f"reservas/{res.created_at.year}/{res.created_at.month:02d}/reserva_{res.id}.txt"
+    rel = receipt_key(res.id, res.created_at)
     txt = f"Reserva {res.id}\nUser: {res.user_id}\nRoom: {res.room_id}\nInicio: {res.fecha_inicio}\nFin: {res.fecha_fin}\nTotal: {float(res.costo_total):.2f}\nStatus: {res.status}\n"
     write_text(rel, txt)
     res.reporte_path = rel
     db.commit()
 
+    # comprobante PDF con status=paid: se renderiza en el pool de PDFs sin esperar,
+    # así la primera descarga de /reservations/{id}/report ya sale de la caché
+    prerender_background(load_reservation_fields(db, res))
+
     return PayPalCaptureOut(reservation_id=res.id, status=res.status)
@@ -0,0 +1,188 @@
+# Versión async de payments_paypal.py (settings.DB_ASYNC): las llamadas a PayPal
+# van por el cliente httpx del proceso (paypal_service.async_client) sin ocupar un hilo.
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.security import get_current_user_async
+from app.models.user import User
+from app.models.reservation import Reservation
+from app.models.payment_outbox import PaymentOutbox
+from app.schemas.paypal import (
+    PayPalCreateOrderIn,
+    PayPalCreateOrderOut,
+    PayPalOrderStatusOut,
+    PayPalCaptureIn,
+    PayPalCaptureOut,
+)
+from app.services.checkout_outbox import enqueue_create_order
+from app.services.reservations_service import (
+    claim_for_capture_async,
+    create_pending_reservation_async,
+    release_capture_async,
+)
+from app.services import paypal_service
+from app.services.availability_index import availability_index
+from app.services.pdf_cache import load_reservation_fields_async, prerender_background
+from app.services.receipt_archive import receipt_key
+from app.storage import storage
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+async def _cancel(db: AsyncSession, res: Reservation) -> None:
+    # si falla PayPal, cancela reserva pending para no bloquear
+    res.status = "cancelled"
+    await db.commit()
+    await db.run_sync(availability_index.refresh_room, res.room_id)
+
+
+@router.post("/create-order", response_model=PayPalCreateOrderOut, status_code=201)
+async def create_order(
+    payload: PayPalCreateOrderIn,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current: User = Depends(get_current_user_async),
+):
+    try:
+        res = await create_pending_reservation_async(
+            db,
+            user_id=current.id,
+            room_id=payload.room_id,
+            start=payload.fecha_inicio,
+            end=payload.fecha_fin,
+            commit=not settings.PAYPAL_CHECKOUT_ASYNC,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if settings.PAYPAL_CHECKOUT_ASYNC:
+        # reserva + outbox en una transacción; la orden la crea el worker
+        enqueue_create_order(db, res)
+        await db.commit()
+        await db.run_sync(availability_index.refresh_room, res.room_id)
+        response.status_code = 202
+        return PayPalCreateOrderOut(reservation_id=res.id, status="queued")
+
+    amount = f"{float(res.costo_total):.2f}"
+    try:
+        order = await paypal_service.create_order_async(
+            amount=amount, currency="USD", reference_id=str(res.id), request_id=f"reserva-{res.id}"
+        )
+    except Exception as e:
+        await _cancel(db, res)
+        raise HTTPException(status_code=502, detail=f"PayPal error: {e}")
+
+    order_id = order.get("id")
+    if not order_id:
+        await _cancel(db, res)
+        raise HTTPException(status_code=502, detail="PayPal no devolvió order id")
+
+    res.paypal_order_id = order_id
+    await db.commit()
+
+    approve_url = paypal_service.extract_approve_url(order)
+    return PayPalCreateOrderOut(reservation_id=res.id, paypal_order_id=order_id, approve_url=approve_url)
+
+
+@router.get("/orders/{reservation_id}", response_model=PayPalOrderStatusOut)
+async def order_status(
+    reservation_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current: User = Depends(get_current_user_async),
+):
+    res = await db.get(Reservation, reservation_id)
+    if not res:
+        raise HTTPException(status_code=404, detail="Reserva no existe")
+    if res.user_id != current.id and current.role != "admin":
+        raise HTTPException(status_code=403, detail="No permitido")
+
+    entry = (
+        await db.execute(select(PaymentOutbox).where(PaymentOutbox.reservation_id == res.id))
+    ).scalars().first()
+    if entry is None:
+        status = "ready" if res.paypal_order_id else "not_found"
+    elif entry.status == "failed":
+        status = "failed"
+    else:
+        status = "ready" if res.paypal_order_id else "queued"
+
+    return PayPalOrderStatusOut(
+        reservation_id=res.id,
+        paypal_order_id=res.paypal_order_id,
+        approve_url=entry.approve_url if entry else None,
+        status=status,
+        reservation_status=res.status,
+    )
+
+
+@router.post("/capture-order", response_model=PayPalCaptureOut)
+async def capture_order(
+    payload: PayPalCaptureIn,
+    db: AsyncSession = Depends(get_async_db),
+    current: User = Depends(get_current_user_async),
+):
+    res = await db.get(Reservation, payload.reservation_id)
+    if not res:
+        raise HTTPException(status_code=404, detail="Reserva no existe")
+    if res.user_id != current.id and current.role != "admin":
+        raise HTTPException(status_code=403, detail="No permitido")
+    if res.status != "pending":
+        raise HTTPException(status_code=400, detail=f"Reserva no está pending (status={res.status})")
+    if not res.paypal_order_id:
+        raise HTTPException(status_code=400, detail="Reserva no tiene paypal_order_id")
+
+    # reclamo pending -> capturing y commit: PayPal se espera sin transacción abierta
+    order_id, hold = res.paypal_order_id, res.expires_at
+    if not await claim_for_capture_async(db, res.id):
+        await db.refresh(res)
+        raise HTTPException(status_code=400, detail=f"Reserva no está pending (status={res.status})")
+
+    try:
+        capture = await paypal_service.capture_order_async(order_id)
+    except Exception as e:
+        await release_capture_async(db, res.id, hold)
+        raise HTTPException(status_code=502, detail=f"PayPal capture error: {e}")
+
+    capture_id = paypal_service.extract_capture_id(capture)
+    pp_status = capture.get("status", "")
+    if pp_status not in ["COMPLETED", "APPROVED"]:
+        await release_capture_async(db, res.id, hold)
+        raise HTTPException(status_code=400, detail=f"Pago no completado (paypal status={pp_status})")
+
+    # mismo cierre que el router sync: capturing -> paid solo si el reclamo sigue vigente
+    await db.refresh(res, with_for_update=True)
+    if res.status != "capturing":
+        lost = res.status
+        res.paypal_capture_id = capture_id  # queda registrado para el reembolso
+        await db.commit()
+        logger.error(
+            "captura %s cobrada pero la reserva %s ya no estaba en captura (status=%s)", capture_id, res.id, lost
+        )
+        raise HTTPException(
+            status_code=409,
+            detail=f"El pago se capturó pero la reserva ya no estaba retenida (status={lost}); contacta a soporte",
+        )
+    res.status = "paid"
+    res.paypal_capture_id = capture_id
+    res.expires_at = hold
+    await db.commit()
+    await db.refresh(res)
+
+    rel = receipt_key(res.id, res.created_at)
+    txt = f"Reserva {res.id}\nUser: {res.user_id}\nRoom: {res.room_id}\nInicio: {res.fecha_inicio}\nFin: {res.fecha_fin}\nTotal: {float(res.costo_total):.2f}\nStatus: {res.status}\n"
+    await storage.put_async(rel, txt.encode("utf-8"))
+    res.reporte_path = rel
+    await db.commit()
+
+    # comprobante PDF con status=paid renderizado de antemano (ver router sync)
+    await run_in_threadpool(prerender_background, await load_reservation_fields_async(db, res))
+
+    return PayPalCaptureOut(reservation_id=res.id, status=res.status)
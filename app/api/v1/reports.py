@@ -1,48 +1,114 @@
 from datetime import date
-from pathlib import Path
 
-from fastapi import APIRouter, Depends
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.core.config import settings
 from app.core.database import get_db
+from app.core.http_cache import serve_bytes
 from app.core.security import require_admin
 from app.models.user import User
-from app.services.reports_service import range_for_daily, range_for_week, range_for_month, build_csv
-from app.storage.files import write_bytes
-from app.services.pdf_generator import generate_welcome_pdf
+from app.services.analytics_service import MEDIA_TYPES, GroupBy, OutputFormat, aggregate, load_frame, render_table
+from app.services.occupancy_heatmap import heatmap_payload
+from app.services.reports_service import stream_csv
+from app.services.report_snapshots import (
+    Period,
+    PeriodKind,
+    closed_periods,
+    daily_period,
+    get_or_build,
+    is_closed,
+    monthly_period,
+    prebuild,
+    snapshot_response,
+    weekly_period,
+)
+from app.storage.files import tee_to_storage
+from app.services.static_docs import static_documents
 
 router = APIRouter()
 
+def _csv_response(chunks, rel: str, persist: bool) -> StreamingResponse:
+    # persist=true: además de enviarlo, se guarda en el storage (clave rel) mientras se transmite
+    if persist:
+        chunks = tee_to_storage(chunks, rel)
+    return StreamingResponse(
+        chunks,
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{rel.rsplit("/", 1)[-1]}"'},
+    )
+
+def _period_response(request: Request, db: Session, period: Period, persist: bool):
+    # períodos cerrados: archivo ya generado (ETag); el resto se calcula en streaming
+    if is_closed(period):
+        return snapshot_response(request, period, get_or_build(db, period))
+    return _csv_response(stream_csv(period.start, period.end), period.rel, persist)
+
 @router.get("/daily")
-def daily(date_: date, db: Session = Depends(get_db), _admin: User = Depends(require_admin)):
-    start, end = range_for_daily(date_)
-    data = build_csv(db, start, end)
-    rel = f"reports/daily_{start.isoformat()}.csv"
-    path = write_bytes(rel, data)
-    return FileResponse(path, media_type="text/csv", filename=path.name)
+def daily(request: Request, date_: date, persist: bool = False, db: Session = Depends(get_db), _admin: User = Depends(require_admin)):
+    return _period_response(request, db, daily_period(date_), persist)
 
 @router.get("/weekly")
-def weekly(start: date, db: Session = Depends(get_db), _admin: User = Depends(require_admin)):
-    s, e = range_for_week(start)
-    data = build_csv(db, s, e)
-    rel = f"reports/weekly_{s.isoformat()}_{e.isoformat()}.csv"
-    path = write_bytes(rel, data)
-    return FileResponse(path, media_type="text/csv", filename=path.name)
+def weekly(request: Request, start: date, persist: bool = False, db: Session = Depends(get_db), _admin: User = Depends(require_admin)):
+    return _period_response(request, db, weekly_period(start), persist)
 
 @router.get("/monthly")
-def monthly(year: int, month: int, db: Session = Depends(get_db), _admin: User = Depends(require_admin)):
-    s, e = range_for_month(year, month)
-    data = build_csv(db, s, e)
-    rel = f"reports/monthly_{year}_{month:02d}.csv"
-    path = write_bytes(rel, data)
-    return FileResponse(path, media_type="text/csv", filename=path.name)
+def monthly(request: Request, year: int, month: int, persist: bool = False, db: Session = Depends(get_db), _admin: User = Depends(require_admin)):
+    return _period_response(request, db, monthly_period(year, month), persist)
+
+@router.post("/prebuild", status_code=202)
+def prebuild_reports(
+    background: BackgroundTasks,
+    kind: PeriodKind,
+    start: date,
+    end: date,
+    force: bool = False,
+    _admin: User = Depends(require_admin),
+):
+    """Genera en segundo plano los reportes de los períodos cerrados que empiezan en [start, end)."""
+    try:
+        periods = closed_periods(kind, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    background.add_task(prebuild, periods, force)
+    return {"kind": kind, "queued": len(periods), "periods": [p.name for p in periods]}
+
+@router.get("/analytics")
+def analytics(
+    start: date,
+    end: date,
+    group_by: GroupBy = "day",
+    fmt: OutputFormat = Query("json", alias="format"),
+    db: Session = Depends(get_db),
+    _admin: User = Depends(require_admin),
+):
+    """Ocupación e ingresos en [start, end) agrupados por día/semana/mes/tipo/piso."""
+    try:
+        table = aggregate(load_frame(db, start, end), group_by)
+        body = render_table(table, fmt, {"start": start.isoformat(), "end": end.isoformat(), "group_by": group_by})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(body, media_type=MEDIA_TYPES[fmt])
+
+@router.get("/occupancy-heatmap")
+def occupancy_heatmap(start: date, end: date, db: Session = Depends(get_db), _admin: User = Depends(require_admin)):
+    """Matriz habitaciones x días (0 libre, 1 pending, 2 paid) + % de uso por tipo."""
+    try:
+        frame = load_frame(db, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return heatmap_payload(frame)
 
 @router.get("/welcome")
-def welcome_pdf(_admin: User = Depends(require_admin)):
-    # PDF estático de bienvenida + reglas
-    rel = "reports/welcome/bienvenida_hotel_ventura.pdf"
-    out_path = Path(settings.STORAGE_DIR) / rel
-    generate_welcome_pdf(out_path, hotel_name="Hotel Ventura")
-    return FileResponse(str(out_path), media_type="application/pdf", filename=out_path.name)
+def welcome_pdf(request: Request, _admin: User = Depends(require_admin)):
+    # PDF estático de bienvenida + reglas: se renderiza una vez al arrancar (static_docs)
+    doc = static_documents.get("welcome")
+    return serve_bytes(
+        request,
+        doc.data,
+        etag=doc.etag,
+        media_type=doc.media_type,
+        filename=doc.filename,
+        cache_control="private, max-age=3600",
+        gzipped=doc.gzipped,
+    )
@@ -0,0 +1,143 @@
+# Versión async de reports.py (settings.DB_ASYNC).
+from datetime import date
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db
+from app.core.http_cache import serve_bytes
+from app.core.security import require_admin_async
+from app.models.user import User
+from app.services.analytics_service import MEDIA_TYPES, GroupBy, OutputFormat, aggregate, load_frame_async, render_table
+from app.services.occupancy_heatmap import heatmap_payload
+from app.services.reports_service import stream_csv_async
+from app.services.report_snapshots import (
+    Period,
+    PeriodKind,
+    closed_periods,
+    daily_period,
+    get_or_build_async,
+    is_closed,
+    monthly_period,
+    prebuild,
+    snapshot_response,
+    weekly_period,
+)
+from app.storage.files import tee_to_storage_async
+from app.services.static_docs import static_documents
+
+router = APIRouter()
+
+def _csv_response(chunks, rel: str, persist: bool) -> StreamingResponse:
+    # persist=true: además de enviarlo, se guarda en el storage (clave rel) mientras se transmite
+    if persist:
+        chunks = tee_to_storage_async(chunks, rel)
+    return StreamingResponse(
+        chunks,
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{rel.rsplit("/", 1)[-1]}"'},
+    )
+
+async def _period_response(request: Request, db: AsyncSession, period: Period, persist: bool):
+    # períodos cerrados: archivo ya generado (ETag); el resto se calcula en streaming
+    if is_closed(period):
+        stored = await get_or_build_async(db, period)
+        return await run_in_threadpool(snapshot_response, request, period, stored)
+    return _csv_response(stream_csv_async(period.start, period.end), period.rel, persist)
+
+@router.get("/daily")
+async def daily(
+    request: Request,
+    date_: date,
+    persist: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    _admin: User = Depends(require_admin_async),
+):
+    return await _period_response(request, db, daily_period(date_), persist)
+
+@router.get("/weekly")
+async def weekly(
+    request: Request,
+    start: date,
+    persist: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    _admin: User = Depends(require_admin_async),
+):
+    return await _period_response(request, db, weekly_period(start), persist)
+
+@router.get("/monthly")
+async def monthly(
+    request: Request,
+    year: int,
+    month: int,
+    persist: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    _admin: User = Depends(require_admin_async),
+):
+    return await _period_response(request, db, monthly_period(year, month), persist)
+
+@router.post("/prebuild", status_code=202)
+async def prebuild_reports(
+    background: BackgroundTasks,
+    kind: PeriodKind,
+    start: date,
+    end: date,
+    force: bool = False,
+    _admin: User = Depends(require_admin_async),
+):
+    """Genera en segundo plano los reportes de los períodos cerrados que empiezan en [start, end)."""
+    try:
+        periods = closed_periods(kind, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # prebuild es sync (SessionLocal): Starlette lo corre en el threadpool
+    background.add_task(prebuild, periods, force)
+    return {"kind": kind, "queued": len(periods), "periods": [p.name for p in periods]}
+
+@router.get("/analytics")
+async def analytics(
+    start: date,
+    end: date,
+    group_by: GroupBy = "day",
+    fmt: OutputFormat = Query("json", alias="format"),
+    db: AsyncSession = Depends(get_async_db),
+    _admin: User = Depends(require_admin_async),
+):
+    """Ocupación e ingresos en [start, end) agrupados por día/semana/mes/tipo/piso."""
+    try:
+        frame = await load_frame_async(db, start, end)
+        table = await run_in_threadpool(aggregate, frame, group_by)
+        body = await run_in_threadpool(render_table, table, fmt, {"start": start.isoformat(), "end": end.isoformat(), "group_by": group_by})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(body, media_type=MEDIA_TYPES[fmt])
+
+@router.get("/occupancy-heatmap")
+async def occupancy_heatmap(
+    start: date,
+    end: date,
+    db: AsyncSession = Depends(get_async_db),
+    _admin: User = Depends(require_admin_async),
+):
+    """Matriz habitaciones x días (0 libre, 1 pending, 2 paid) + % de uso por tipo."""
+    try:
+        frame = await load_frame_async(db, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await run_in_threadpool(heatmap_payload, frame)
+
+@router.get("/welcome")
+async def welcome_pdf(request: Request, _admin: User = Depends(require_admin_async)):
+    # PDF estático de bienvenida + reglas: se renderiza una vez al arrancar (static_docs)
+    doc = static_documents.get("welcome")
+    return serve_bytes(
+        request,
+        doc.data,
+        etag=doc.etag,
+        media_type=doc.media_type,
+        filename=doc.filename,
+        cache_control="private, max-age=3600",
+        gzipped=doc.gzipped,
+    )
@@ -1,26 +1,29 @@
-from pathlib import Path
-from datetime import date
+from datetime import date, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
 from app.core.config import settings
+from app.core.http_cache import etag_matches, quote_etag, serve_stored
+from app.core.responses import FastJSONResponse
+from app.core.pagination import PageParams, keyset, page_params, paginate, select_columns
 from app.core.database import get_db
 from app.core.security import get_current_user, require_admin
 from app.models.user import User
 from app.models.reservation import Reservation
 from app.models.room import Room
-from app.models.room_type import RoomType
 from app.schemas.reservation import (
     ReservationCreateIn,
     ReservationAdminCreateIn,
     ReservationUpdateIn,
     ReservationOut,
 )
-from app.services.reservations_service import create_pending_reservation, update_reservation_admin
-from app.services.pdf_generator import generate_reservation_pdf
+from app.services.reservations_service import create_pending_reservation, update_reservation_admin, blocked_stmt, list_filters
+from app.services.pdf_cache import get_or_render, load_reservation_fields, render_key
+from app.services.receipt_archive import read_stored, receipt_response
+from app.storage import storage
+from app.services.availability_index import availability_index
 
 router = APIRouter()
 
@@ -39,49 +42,27 @@ def blocked_reservations(
       - fecha_inicio
       - fecha_fin
       - status
-    Solo considera reservas: pending, paid
+    Solo considera reservas: pending, capturing (pago en curso), paid
+    Si no se envían fechas se usa [hoy, hoy + BLOCKED_DEFAULT_WINDOW_DAYS).
     """
-    stmt = (
-        select(Reservation.room_id, Reservation.fecha_inicio, Reservation.fecha_fin, Reservation.status)
-        .where(Reservation.status.in_(["pending", "paid"]))
-    )
-
-    rows = db.execute(stmt).all()
-
-    # si no mandan fechas, devolvemos todo lo bloqueante
-    if not start or not end:
-        return [
-            {
-                "room_id": r.room_id,
-                "fecha_inicio": str(r.fecha_inicio),
-                "fecha_fin": str(r.fecha_fin),
-                "status": r.status,
-            }
-            for r in rows
-        ]
-
-    # filtrado por overlap [start, end)
+    # sin fechas: ventana por defecto desde hoy (evita devolver todo el histórico)
     try:
-        s = date.fromisoformat(start)
-        e = date.fromisoformat(end)
+        s = date.fromisoformat(start) if start else date.today()
+        e = date.fromisoformat(end) if end else s + timedelta(days=settings.BLOCKED_DEFAULT_WINDOW_DAYS)
     except ValueError:
         raise HTTPException(status_code=400, detail="Fechas inválidas. Usa YYYY-MM-DD")
+    if e <= s:
+        raise HTTPException(status_code=400, detail="end debe ser mayor a start")
 
-    def overlaps(a_start: date, a_end: date, b_start: date, b_end: date) -> bool:
-        return a_start < b_end and a_end > b_start
-
-    out = []
-    for r in rows:
-        if overlaps(r.fecha_inicio, r.fecha_fin, s, e):
-            out.append(
-                {
-                    "room_id": r.room_id,
-                    "fecha_inicio": str(r.fecha_inicio),
-                    "fecha_fin": str(r.fecha_fin),
-                    "status": r.status,
-                }
-            )
-    return out
+    return FastJSONResponse([
+        {
+            "room_id": r.room_id,
+            "fecha_inicio": str(r.fecha_inicio),
+            "fecha_fin": str(r.fecha_fin),
+            "status": r.status,
+        }
+        for r in db.execute(blocked_stmt(db.get_bind().dialect.name, s, e)).all()
+    ])
 
 
 @router.post("", response_model=ReservationOut, status_code=201)
@@ -118,22 +99,47 @@ def admin_create_reservation(
             room_id=payload.room_id,
             start=payload.fecha_inicio,
             end=payload.fecha_fin,
+            expires=False,  # creada por admin: no vence
         )
         return res
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+STATUS_PATTERN = r"^(pending|capturing|paid|cancelled)$"
+
+
 @router.get("/me", response_model=list[ReservationOut])
-def my_reservations(db: Session = Depends(get_db), current: User = Depends(get_current_user)):
-    stmt = select(Reservation).where(Reservation.user_id == current.id).order_by(Reservation.id.desc())
-    return db.execute(stmt).scalars().all()
+def my_reservations(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    status: str | None = Query(None, pattern=STATUS_PATTERN),
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_user),
+):
+    stmt = select(*select_columns(Reservation, ReservationOut, page.fields)).where(
+        *list_filters(user_id=current.id, status=status)
+    )
+    rows = db.execute(keyset(stmt, Reservation.id, page, descending=True)).all()
+    return paginate(rows, page, response)
 
 
 @router.get("", response_model=list[ReservationOut])
-def list_all(db: Session = Depends(get_db), _admin: User = Depends(require_admin)):
-    stmt = select(Reservation).order_by(Reservation.id.desc())
-    return db.execute(stmt).scalars().all()
+def list_all(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    status: str | None = Query(None, pattern=STATUS_PATTERN),
+    room_id: int | None = None,
+    start: date | None = Query(None, description="estadías que terminan después de start"),
+    end: date | None = Query(None, description="estadías que empiezan antes de end"),
+    db: Session = Depends(get_db),
+    _admin: User = Depends(require_admin),
+):
+    stmt = select(*select_columns(Reservation, ReservationOut, page.fields)).where(
+        *list_filters(status=status, room_id=room_id, start=start, end=end)
+    )
+    rows = db.execute(keyset(stmt, Reservation.id, page, descending=True)).all()
+    return paginate(rows, page, response)
 
 
 @router.get("/{reservation_id}", response_model=ReservationOut)
@@ -181,13 +187,20 @@ def delete_reservation(reservation_id: int, db: Session = Depends(get_db), _admi
     r = db.get(Reservation, reservation_id)
     if not r:
         raise HTTPException(status_code=404, detail="Reserva no encontrada")
+    room_id = r.room_id
     db.delete(r)
     db.commit()
+    availability_index.refresh_room(db, room_id)
     return None
 
 
 @router.get("/{reservation_id}/report")
-def reservation_report(reservation_id: int, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
+def reservation_report(
+    reservation_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_user),
+):
     r = db.get(Reservation, reservation_id)
     if not r:
         raise HTTPException(status_code=404, detail="Reserva no encontrada")
@@ -195,30 +208,30 @@ def reservation_report(reservation_id: int, db: Session = Depends(get_db), curre
     if current.role != "admin" and r.user_id != current.id:
         raise HTTPException(status_code=403, detail="No tienes permiso")
 
-    guest = db.get(User, r.user_id)
-    room = db.get(Room, r.room_id)
-    rtype = db.get(RoomType, room.room_type_id) if room else None
-
-    rel = f"reservations/reserva_{r.id}.pdf"
-    out_path = Path(settings.STORAGE_DIR) / rel
-
-    generate_reservation_pdf(
-        out_path,
-        hotel_name="Hotel Ventura",
-        reservation_id=r.id,
-        guest_fullname=f"{guest.nombre} {guest.apellido}" if guest else "N/A",
-        guest_email=guest.email if guest else "N/A",
-        room_numero=room.numero if room else "N/A",
-        room_tipo=rtype.tipo if rtype else "N/A",
-        fecha_inicio=str(r.fecha_inicio),
-        fecha_fin=str(r.fecha_fin),
-        costo_total=str(r.costo_total),
-        status=r.status,
-    )
+    # la clave depende solo de lo que sale en el PDF: si no cambió, no se vuelve a renderizar
+    fields = load_reservation_fields(db, r)
+    key = render_key(fields)
+    headers = {"ETag": quote_etag(key), "Cache-Control": "private, no-cache"}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    # el PDF se ubica por su clave de contenido; reporte_path queda para el comprobante
+    rel = get_or_render(fields, key)
+    return serve_stored(storage, rel, media_type="application/pdf", filename=f"reserva_{r.id}.pdf", headers=headers)
 
-    if r.reporte_path != rel:
-        r.reporte_path = rel
-        db.add(r)
-        db.commit()
 
-    return FileResponse(str(out_path), media_type="application/pdf", filename=out_path.name)
+@router.get("/{reservation_id}/receipt")
+def reservation_receipt(reservation_id: int, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
+    """Archivo de reporte_path (comprobante .txt o PDF), suelto o dentro del zip mensual."""
+    r = db.get(Reservation, reservation_id)
+    if not r:
+        raise HTTPException(status_code=404, detail="Reserva no encontrada")
+    if current.role != "admin" and r.user_id != current.id:
+        raise HTTPException(status_code=403, detail="No tienes permiso")
+    if not r.reporte_path:
+        raise HTTPException(status_code=404, detail="La reserva no tiene comprobante")
+    try:
+        data = read_stored(r.reporte_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Comprobante no encontrado")
+    return receipt_response(r.reporte_path, data)
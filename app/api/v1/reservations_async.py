@@ -0,0 +1,244 @@
+# Versión async de reservations.py (settings.DB_ASYNC).
+from datetime import date, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.http_cache import etag_matches, quote_etag, serve_stored
+from app.core.responses import FastJSONResponse
+from app.core.pagination import PageParams, keyset, page_params, paginate, select_columns
+from app.core.database import get_async_db
+from app.core.security import get_current_user_async, require_admin_async
+from app.models.user import User
+from app.models.reservation import Reservation
+from app.models.room import Room
+from app.models.room_type import RoomType
+from app.schemas.reservation import (
+    ReservationCreateIn,
+    ReservationAdminCreateIn,
+    ReservationUpdateIn,
+    ReservationOut,
+)
+from app.services.reservations_service import (
+    create_pending_reservation_async,
+    update_reservation_admin_async,
+    blocked_stmt,
+    list_filters,
+)
+from app.services.pdf_cache import get_or_render_async, render_key, reservation_pdf_fields
+from app.services.receipt_archive import read_stored, receipt_response
+from app.storage import storage
+from app.services.availability_index import availability_index
+
+router = APIRouter()
+
+
+@router.get("/blocked")
+async def blocked_reservations(
+    start: str | None = Query(default=None, description="YYYY-MM-DD"),
+    end: str | None = Query(default=None, description="YYYY-MM-DD"),
+    db: AsyncSession = Depends(get_async_db),
+    _current: User = Depends(get_current_user_async),
+):
+    try:
+        s = date.fromisoformat(start) if start else date.today()
+        e = date.fromisoformat(end) if end else s + timedelta(days=settings.BLOCKED_DEFAULT_WINDOW_DAYS)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Fechas inválidas. Usa YYYY-MM-DD")
+    if e <= s:
+        raise HTTPException(status_code=400, detail="end debe ser mayor a start")
+
+    rows = (await db.execute(blocked_stmt(db.get_bind().dialect.name, s, e))).all()
+    return FastJSONResponse([
+        {
+            "room_id": r.room_id,
+            "fecha_inicio": str(r.fecha_inicio),
+            "fecha_fin": str(r.fecha_fin),
+            "status": r.status,
+        }
+        for r in rows
+    ])
+
+
+@router.post("", response_model=ReservationOut, status_code=201)
+async def create_reservation(
+    payload: ReservationCreateIn,
+    db: AsyncSession = Depends(get_async_db),
+    current: User = Depends(get_current_user_async),
+):
+    try:
+        return await create_pending_reservation_async(
+            db,
+            user_id=current.id,
+            room_id=payload.room_id,
+            start=payload.fecha_inicio,
+            end=payload.fecha_fin,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/admin", response_model=ReservationOut, status_code=201)
+async def admin_create_reservation(
+    payload: ReservationAdminCreateIn,
+    db: AsyncSession = Depends(get_async_db),
+    _admin: User = Depends(require_admin_async),
+):
+    if not await db.get(User, payload.user_id):
+        raise HTTPException(status_code=400, detail="Usuario no existe")
+    try:
+        return await create_pending_reservation_async(
+            db,
+            user_id=payload.user_id,
+            room_id=payload.room_id,
+            start=payload.fecha_inicio,
+            end=payload.fecha_fin,
+            expires=False,  # creada por admin: no vence
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+STATUS_PATTERN = r"^(pending|capturing|paid|cancelled)$"
+
+
+@router.get("/me", response_model=list[ReservationOut])
+async def my_reservations(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    status: str | None = Query(None, pattern=STATUS_PATTERN),
+    db: AsyncSession = Depends(get_async_db),
+    current: User = Depends(get_current_user_async),
+):
+    stmt = select(*select_columns(Reservation, ReservationOut, page.fields)).where(
+        *list_filters(user_id=current.id, status=status)
+    )
+    rows = (await db.execute(keyset(stmt, Reservation.id, page, descending=True))).all()
+    return paginate(rows, page, response)
+
+
+@router.get("", response_model=list[ReservationOut])
+async def list_all(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    status: str | None = Query(None, pattern=STATUS_PATTERN),
+    room_id: int | None = None,
+    start: date | None = Query(None, description="estadías que terminan después de start"),
+    end: date | None = Query(None, description="estadías que empiezan antes de end"),
+    db: AsyncSession = Depends(get_async_db),
+    _admin: User = Depends(require_admin_async),
+):
+    stmt = select(*select_columns(Reservation, ReservationOut, page.fields)).where(
+        *list_filters(status=status, room_id=room_id, start=start, end=end)
+    )
+    rows = (await db.execute(keyset(stmt, Reservation.id, page, descending=True))).all()
+    return paginate(rows, page, response)
+
+
+@router.get("/{reservation_id}", response_model=ReservationOut)
+async def get_reservation(reservation_id: int, db: AsyncSession = Depends(get_async_db), current: User = Depends(get_current_user_async)):
+    r = await db.get(Reservation, reservation_id)
+    if not r:
+        raise HTTPException(status_code=404, detail="Reserva no encontrada")
+    if current.role != "admin" and r.user_id != current.id:
+        raise HTTPException(status_code=403, detail="No tienes permiso")
+    return r
+
+
+@router.put("/{reservation_id}", response_model=ReservationOut)
+async def update_reservation(
+    reservation_id: int,
+    payload: ReservationUpdateIn,
+    db: AsyncSession = Depends(get_async_db),
+    _admin: User = Depends(require_admin_async),
+):
+    r = await db.get(Reservation, reservation_id)
+    if not r:
+        raise HTTPException(status_code=404, detail="Reserva no encontrada")
+
+    if payload.user_id is not None and not await db.get(User, payload.user_id):
+        raise HTTPException(status_code=400, detail="Usuario no existe")
+    if payload.room_id is not None and not await db.get(Room, payload.room_id):
+        raise HTTPException(status_code=400, detail="Habitación no existe")
+
+    try:
+        return await update_reservation_admin_async(
+            db,
+            r,
+            user_id=payload.user_id,
+            room_id=payload.room_id,
+            start=payload.fecha_inicio,
+            end=payload.fecha_fin,
+            status=payload.status,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.delete("/{reservation_id}", status_code=204)
+async def delete_reservation(reservation_id: int, db: AsyncSession = Depends(get_async_db), _admin: User = Depends(require_admin_async)):
+    r = await db.get(Reservation, reservation_id)
+    if not r:
+        raise HTTPException(status_code=404, detail="Reserva no encontrada")
+    room_id = r.room_id
+    await db.delete(r)
+    await db.commit()
+    await db.run_sync(availability_index.refresh_room, room_id)
+    return None
+
+
+@router.get("/{reservation_id}/report")
+async def reservation_report(
+    reservation_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current: User = Depends(get_current_user_async),
+):
+    r = await db.get(Reservation, reservation_id)
+    if not r:
+        raise HTTPException(status_code=404, detail="Reserva no encontrada")
+
+    if current.role != "admin" and r.user_id != current.id:
+        raise HTTPException(status_code=403, detail="No tienes permiso")
+
+    guest = await db.get(User, r.user_id)
+    room = await db.get(Room, r.room_id)
+    rtype = await db.get(RoomType, room.room_type_id) if room else None
+
+    # la clave depende solo de lo que sale en el PDF: si no cambió, no se vuelve a renderizar
+    fields = reservation_pdf_fields(r, guest, room, rtype)
+    key = render_key(fields)
+    headers = {"ETag": quote_etag(key), "Cache-Control": "private, no-cache"}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    # ReportLab corre en el pool de PDFs; se espera sin ocupar un hilo
+    # el PDF se ubica por su clave de contenido; reporte_path queda para el comprobante
+    rel = await get_or_render_async(fields, key)
+    return await run_in_threadpool(
+        serve_stored, storage, rel, media_type="application/pdf", filename=f"reserva_{r.id}.pdf", headers=headers
+    )
+
+
+@router.get("/{reservation_id}/receipt")
+async def reservation_receipt(
+    reservation_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current: User = Depends(get_current_user_async),
+):
+    """Archivo de reporte_path (comprobante .txt o PDF), suelto o dentro del zip mensual."""
+    r = await db.get(Reservation, reservation_id)
+    if not r:
+        raise HTTPException(status_code=404, detail="Reserva no encontrada")
+    if current.role != "admin" and r.user_id != current.id:
+        raise HTTPException(status_code=403, detail="No tienes permiso")
+    if not r.reporte_path:
+        raise HTTPException(status_code=404, detail="La reserva no tiene comprobante")
+    try:
+        data = await run_in_threadpool(read_stored, r.reporte_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Comprobante no encontrado")
+    return receipt_response(r.reporte_path, data)
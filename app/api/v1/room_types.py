@@ -1,18 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
 from app.core.database import get_db
+from app.core.pagination import PageParams, page_params
 from app.core.security import require_admin
 from app.models.room_type import RoomType
 from app.models.user import User
 from app.schemas.room_type import RoomTypeOut, RoomTypeIn
+from app.services.catalog_cache import catalog_cache, catalog_response
 
 router = APIRouter()
 
 @router.get("", response_model=list[RoomTypeOut])
-def list_room_types(db: Session = Depends(get_db)):
-    return db.execute(select(RoomType).order_by(RoomType.id.asc())).scalars().all()
+def list_room_types(request: Request, page: PageParams = Depends(page_params), db: Session = Depends(get_db)):
+    return catalog_response(request, catalog_cache.get(db).room_types, page, RoomTypeOut)
 
 @router.post("", response_model=RoomTypeOut, status_code=201)
 def create_room_type(payload: RoomTypeIn, db: Session = Depends(get_db), _admin: User = Depends(require_admin)):
@@ -22,6 +24,7 @@ def create_room_type(payload: RoomTypeIn, db: Session = Depends(get_db), _admin:
     rt = RoomType(tipo=payload.tipo, capacidad_personas=payload.capacidad_personas, precio_noche=payload.precio_noche)
     db.add(rt)
     db.commit()
+    catalog_cache.bump()
     db.refresh(rt)
     return rt
 
@@ -40,6 +43,7 @@ def update_room_type(room_type_id: int, payload: RoomTypeIn, db: Session = Depen
     rt.capacidad_personas = payload.capacidad_personas
     rt.precio_noche = payload.precio_noche
     db.commit()
+    catalog_cache.bump()
     db.refresh(rt)
     return rt
 
@@ -50,4 +54,5 @@ def delete_room_type(room_type_id: int, db: Session = Depends(get_db), _admin: U
         raise HTTPException(status_code=404, detail="Tipo no existe")
     db.delete(rt)
     db.commit()
+    catalog_cache.bump()
     return None
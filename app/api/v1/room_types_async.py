@@ -0,0 +1,57 @@
+# Versión async de room_types.py (settings.DB_ASYNC).
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.core.database import get_async_db
+from app.core.pagination import PageParams, page_params
+from app.core.security import require_admin_async
+from app.models.room_type import RoomType
+from app.models.user import User
+from app.schemas.room_type import RoomTypeOut, RoomTypeIn
+from app.services.catalog_cache import catalog_cache, catalog_response, get_catalog_async
+
+router = APIRouter()
+
+@router.get("", response_model=list[RoomTypeOut])
+async def list_room_types(request: Request, page: PageParams = Depends(page_params), db: AsyncSession = Depends(get_async_db)):
+    return catalog_response(request, (await get_catalog_async(db)).room_types, page, RoomTypeOut)
+
+@router.post("", response_model=RoomTypeOut, status_code=201)
+async def create_room_type(payload: RoomTypeIn, db: AsyncSession = Depends(get_async_db), _admin: User = Depends(require_admin_async)):
+    if (await db.execute(select(RoomType.id).where(RoomType.tipo == payload.tipo))).first():
+        raise HTTPException(status_code=400, detail="Tipo ya existe")
+    rt = RoomType(tipo=payload.tipo, capacidad_personas=payload.capacidad_personas, precio_noche=payload.precio_noche)
+    db.add(rt)
+    await db.commit()
+    catalog_cache.bump()
+    await db.refresh(rt)
+    return rt
+
+@router.put("/{room_type_id}", response_model=RoomTypeOut)
+async def update_room_type(room_type_id: int, payload: RoomTypeIn, db: AsyncSession = Depends(get_async_db), _admin: User = Depends(require_admin_async)):
+    rt = await db.get(RoomType, room_type_id)
+    if not rt:
+        raise HTTPException(status_code=404, detail="Tipo no existe")
+
+    if payload.tipo != rt.tipo:
+        if (await db.execute(select(RoomType.id).where(RoomType.tipo == payload.tipo))).first():
+            raise HTTPException(status_code=400, detail="Tipo ya existe")
+        rt.tipo = payload.tipo
+
+    rt.capacidad_personas = payload.capacidad_personas
+    rt.precio_noche = payload.precio_noche
+    await db.commit()
+    catalog_cache.bump()
+    await db.refresh(rt)
+    return rt
+
+@router.delete("/{room_type_id}", status_code=204)
+async def delete_room_type(room_type_id: int, db: AsyncSession = Depends(get_async_db), _admin: User = Depends(require_admin_async)):
+    rt = await db.get(RoomType, room_type_id)
+    if not rt:
+        raise HTTPException(status_code=404, detail="Tipo no existe")
+    await db.delete(rt)
+    await db.commit()
+    catalog_cache.bump()
+    return None
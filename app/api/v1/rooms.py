@@ -1,19 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
 from app.core.database import get_db
+from app.core.pagination import PageParams, page_params
+from app.core.responses import rows_response
 from app.core.security import require_admin
 from app.models.room import Room
 from app.models.room_type import RoomType
 from app.models.user import User
 from app.schemas.room import RoomOut, RoomIn
+from app.services.availability_index import availability_index, free_room_ids
+from app.services.catalog_cache import catalog_cache, catalog_response
 
 router = APIRouter()
 
 @router.get("", response_model=list[RoomOut])
-def list_rooms(db: Session = Depends(get_db)):
-    return db.execute(select(Room).order_by(Room.id.asc())).scalars().all()
+def list_rooms(request: Request, page: PageParams = Depends(page_params), db: Session = Depends(get_db)):
+    return catalog_response(request, catalog_cache.get(db).rooms, page, RoomOut)
+
+@router.get("/available", response_model=list[RoomOut])
+def available_rooms(
+    start: date = Query(description="YYYY-MM-DD"),
+    end: date = Query(description="YYYY-MM-DD"),
+    db: Session = Depends(get_db),
+):
+    """Habitaciones sin reservas pending/paid en [start, end) (índice en memoria)."""
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end debe ser mayor a start")
+    ids = free_room_ids(db, start, end)
+    if not ids:
+        return []
+    free = set(ids)
+    return rows_response([r for r in catalog_cache.get(db).rooms.items if r["id"] in free])
 
 @router.post("", response_model=RoomOut, status_code=201)
 def create_room(payload: RoomIn, db: Session = Depends(get_db), _admin: User = Depends(require_admin)):
@@ -30,6 +51,8 @@ def create_room(payload: RoomIn, db: Session = Depends(get_db), _admin: User = D
     db.add(r)
     db.commit()
     db.refresh(r)
+    catalog_cache.bump()
+    availability_index.refresh_room(db, r.id)
     return r
 
 @router.put("/{room_id}", response_model=RoomOut)
@@ -51,6 +74,7 @@ def update_room(room_id: int, payload: RoomIn, db: Session = Depends(get_db), _a
     r.room_type_id = payload.room_type_id
     db.commit()
     db.refresh(r)
+    catalog_cache.bump()
     return r
 
 @router.delete("/{room_id}", status_code=204)
@@ -60,4 +84,6 @@ def delete_room(room_id: int, db: Session = Depends(get_db), _admin: User = Depe
         raise HTTPException(status_code=404, detail="Habitación no existe")
     db.delete(r)
     db.commit()
+    catalog_cache.bump()
+    availability_index.refresh_room(db, room_id)
     return None
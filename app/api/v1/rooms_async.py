@@ -0,0 +1,90 @@
+# Versión async de rooms.py (settings.DB_ASYNC).
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.core.database import get_async_db
+from app.core.pagination import PageParams, page_params
+from app.core.responses import rows_response
+from app.core.security import require_admin_async
+from app.models.room import Room
+from app.models.room_type import RoomType
+from app.models.user import User
+from app.schemas.room import RoomOut, RoomIn
+from app.services.availability_index import availability_index, free_room_ids
+from app.services.catalog_cache import catalog_cache, catalog_response, get_catalog_async
+
+router = APIRouter()
+
+@router.get("", response_model=list[RoomOut])
+async def list_rooms(request: Request, page: PageParams = Depends(page_params), db: AsyncSession = Depends(get_async_db)):
+    return catalog_response(request, (await get_catalog_async(db)).rooms, page, RoomOut)
+
+@router.get("/available", response_model=list[RoomOut])
+async def available_rooms(
+    start: date = Query(description="YYYY-MM-DD"),
+    end: date = Query(description="YYYY-MM-DD"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Habitaciones sin reservas pending/paid en [start, end) (índice en memoria)."""
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end debe ser mayor a start")
+    ids = await db.run_sync(free_room_ids, start, end)
+    if not ids:
+        return []
+    free = set(ids)
+    return rows_response([r for r in (await get_catalog_async(db)).rooms.items if r["id"] in free])
+
+@router.post("", response_model=RoomOut, status_code=201)
+async def create_room(payload: RoomIn, db: AsyncSession = Depends(get_async_db), _admin: User = Depends(require_admin_async)):
+    if (await db.execute(select(Room.id).where(Room.numero == payload.numero))).first():
+        raise HTTPException(status_code=400, detail="Número de habitación ya existe")
+    if not await db.get(RoomType, payload.room_type_id):
+        raise HTTPException(status_code=400, detail="Tipo de habitación no existe")
+    r = Room(
+        numero=payload.numero,
+        piso=payload.piso,
+        estado=payload.estado,
+        room_type_id=payload.room_type_id,
+    )
+    db.add(r)
+    await db.commit()
+    await db.refresh(r)
+    catalog_cache.bump()
+    await db.run_sync(availability_index.refresh_room, r.id)
+    return r
+
+@router.put("/{room_id}", response_model=RoomOut)
+async def update_room(room_id: int, payload: RoomIn, db: AsyncSession = Depends(get_async_db), _admin: User = Depends(require_admin_async)):
+    r = await db.get(Room, room_id)
+    if not r:
+        raise HTTPException(status_code=404, detail="Habitación no existe")
+
+    if payload.numero != r.numero:
+        if (await db.execute(select(Room.id).where(Room.numero == payload.numero))).first():
+            raise HTTPException(status_code=400, detail="Número de habitación ya existe")
+        r.numero = payload.numero
+
+    if not await db.get(RoomType, payload.room_type_id):
+        raise HTTPException(status_code=400, detail="Tipo de habitación no existe")
+
+    r.piso = payload.piso
+    r.estado = payload.estado
+    r.room_type_id = payload.room_type_id
+    await db.commit()
+    await db.refresh(r)
+    catalog_cache.bump()
+    return r
+
+@router.delete("/{room_id}", status_code=204)
+async def delete_room(room_id: int, db: AsyncSession = Depends(get_async_db), _admin: User = Depends(require_admin_async)):
+    r = await db.get(Room, room_id)
+    if not r:
+        raise HTTPException(status_code=404, detail="Habitación no existe")
+    await db.delete(r)
+    await db.commit()
+    catalog_cache.bump()
+    await db.run_sync(availability_index.refresh_room, room_id)
+    return None
@@ -1,14 +1,28 @@
 from fastapi import APIRouter
 
-from app.api.v1 import (
-    auth,
-    users,
-    room_types,
-    rooms,
-    reservations,
-    payments_paypal,
-    reports,
-)
+from app.core.config import settings
+from app.api.v1 import metrics
+
+if settings.DB_ASYNC:
+    from app.api.v1 import (
+        auth_async as auth,
+        users_async as users,
+        room_types_async as room_types,
+        rooms_async as rooms,
+        reservations_async as reservations,
+        reports_async as reports,
+        payments_paypal_async as payments_paypal,
+    )
+else:
+    from app.api.v1 import (
+        auth,
+        users,
+        room_types,
+        rooms,
+        reservations,
+        reports,
+        payments_paypal,
+    )
 
 api_router = APIRouter()
 
@@ -19,3 +33,4 @@ api_router.include_router(rooms.router, prefix="/rooms", tags=["Rooms"])
 api_router.include_router(reservations.router, prefix="/reservations", tags=["Reservations"])
 api_router.include_router(payments_paypal.router, prefix="/payments/paypal", tags=["PayPal"])
 api_router.include_router(reports.router, prefix="/reports", tags=["Reports"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["Metrics"])
@@ -1,18 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
 from app.core.database import get_db
+from app.core.pagination import PageParams, keyset, page_params, paginate, select_columns
 from app.core.security import require_admin, hash_password
 from app.models.user import User
+from app.core.principal_cache import principal_cache
 from app.schemas.user import UserOut, UserCreateAdminIn, UserUpdateIn
 
 router = APIRouter()
 
 
 @router.get("", response_model=list[UserOut])
-def list_users(db: Session = Depends(get_db), _admin: User = Depends(require_admin)):
-    return db.execute(select(User).order_by(User.id.asc())).scalars().all()
+def list_users(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    role: str | None = Query(None, pattern=r"^(admin|cliente)$"),
+    db: Session = Depends(get_db),
+    _admin: User = Depends(require_admin),
+):
+    stmt = select(*select_columns(User, UserOut, page.fields))
+    if role is not None:
+        stmt = stmt.where(User.role == role)
+    rows = db.execute(keyset(stmt, User.id, page)).all()
+    return paginate(rows, page, response)
 
 
 @router.post("", response_model=UserOut, status_code=201)
@@ -75,6 +87,7 @@ def update_user(user_id: int, payload: UserUpdateIn, db: Session = Depends(get_d
 
     db.commit()
     db.refresh(u)
+    principal_cache.invalidate_user(u.id)
     return u
 
 
@@ -85,4 +98,5 @@ def delete_user(user_id: int, db: Session = Depends(get_db), _admin: User = Depe
         raise HTTPException(status_code=404, detail="Usuario no existe")
     db.delete(u)
     db.commit()
+    principal_cache.invalidate_user(user_id)
     return None
@@ -0,0 +1,109 @@
+# Versión async de users.py (settings.DB_ASYNC).
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.core.database import get_async_db
+from app.core.pagination import PageParams, keyset, page_params, paginate, select_columns
+from app.core.security import require_admin_async, hash_password_async
+from app.models.user import User
+from app.core.principal_cache import principal_cache
+from app.schemas.user import UserOut, UserCreateAdminIn, UserUpdateIn
+
+router = APIRouter()
+
+
+@router.get("", response_model=list[UserOut])
+async def list_users(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    role: str | None = Query(None, pattern=r"^(admin|cliente)$"),
+    db: AsyncSession = Depends(get_async_db),
+    _admin: User = Depends(require_admin_async),
+):
+    stmt = select(*select_columns(User, UserOut, page.fields))
+    if role is not None:
+        stmt = stmt.where(User.role == role)
+    rows = (await db.execute(keyset(stmt, User.id, page))).all()
+    return paginate(rows, page, response)
+
+
+@router.post("", response_model=UserOut, status_code=201)
+async def create_user(
+    payload: UserCreateAdminIn, db: AsyncSession = Depends(get_async_db), _admin: User = Depends(require_admin_async)
+):
+    if (await db.execute(select(User.id).where(User.email == str(payload.email)))).first():
+        raise HTTPException(status_code=400, detail="Email ya existe")
+    if (await db.execute(select(User.id).where(User.cedula == payload.cedula))).first():
+        raise HTTPException(status_code=400, detail="Cédula ya existe")
+
+    try:
+        password_hash = await hash_password_async(payload.password)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    u = User(
+        nombre=payload.nombre,
+        apellido=payload.apellido,
+        email=str(payload.email),
+        cedula=payload.cedula,
+        telefono=payload.telefono,
+        password_hash=password_hash,
+        role=payload.role,
+    )
+    db.add(u)
+    await db.commit()
+    await db.refresh(u)
+    return u
+
+
+@router.put("/{user_id}", response_model=UserOut)
+async def update_user(
+    user_id: int,
+    payload: UserUpdateIn,
+    db: AsyncSession = Depends(get_async_db),
+    _admin: User = Depends(require_admin_async),
+):
+    u = await db.get(User, user_id)
+    if not u:
+        raise HTTPException(status_code=404, detail="Usuario no existe")
+
+    if payload.email and str(payload.email) != u.email:
+        if (await db.execute(select(User.id).where(User.email == str(payload.email)))).first():
+            raise HTTPException(status_code=400, detail="Email ya existe")
+        u.email = str(payload.email)
+
+    if payload.cedula and payload.cedula != u.cedula:
+        if (await db.execute(select(User.id).where(User.cedula == payload.cedula))).first():
+            raise HTTPException(status_code=400, detail="Cédula ya existe")
+        u.cedula = payload.cedula
+
+    if payload.nombre is not None:
+        u.nombre = payload.nombre
+    if payload.apellido is not None:
+        u.apellido = payload.apellido
+    if payload.telefono is not None:
+        u.telefono = payload.telefono
+    if payload.role is not None:
+        u.role = payload.role
+    if payload.password is not None:
+        try:
+            u.password_hash = await hash_password_async(payload.password)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    await db.commit()
+    await db.refresh(u)
+    principal_cache.invalidate_user(u.id)
+    return u
+
+
+@router.delete("/{user_id}", status_code=204)
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_async_db), _admin: User = Depends(require_admin_async)):
+    u = await db.get(User, user_id)
+    if not u:
+        raise HTTPException(status_code=404, detail="Usuario no existe")
+    await db.delete(u)
+    await db.commit()
+    principal_cache.invalidate_user(user_id)
+    return None
@@ -5,13 +5,109 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
     DATABASE_URL: str
+    # true: routers async (AsyncEngine); false: routers sync (threadpool)
+    DB_ASYNC: bool = False
+
+    # Pool de conexiones (por worker de uvicorn)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0        # segundos esperando conexión antes de error
+    DB_POOL_RECYCLE: int = 1800          # segundos; -1 = nunca reciclar
+    DB_POOL_PRE_PING: bool = True        # SELECT 1 en cada checkout; con recycle suele bastar en False
+    DB_PGBOUNCER: bool = False           # PgBouncer (transaction pooling): sin prepared statements
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24
+
+    # Caché de usuarios autenticados (get_current_user); maxsize 0 = desactivada
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+    PRINCIPAL_CACHE_MAXSIZE: int = 10_000
+    # true: si el token trae uid + role se confía en ellos (sin consultar BD).
+    # Cambios de rol / borrados no aplican hasta que el token expire.
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+
+    # Hash de contraseñas en ProcessPool (0 workers = en el mismo proceso)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64   # en vuelo por worker de uvicorn; más => 503
+    PASSWORD_HASH_TARGET_MS: float = 0    # >0: calibra rondas pbkdf2 al arrancar
+    PASSWORD_HASH_MIN_ROUNDS: int = 29_000
     STORAGE_DIR: str = "/data"
+    # archivos (reportes, comprobantes, caché de PDFs): local (STORAGE_DIR) | s3
+    STORAGE_BACKEND: str = "local"
+    STORAGE_SHARD_DEPTH: int = 2  # local: niveles de subdirectorios por hash de la clave
+    STORAGE_S3_BUCKET: str = ""
+    STORAGE_S3_PREFIX: str = ""
+    STORAGE_S3_ENDPOINT_URL: str = ""  # MinIO / R2 / otro compatible; vacío = AWS
+    STORAGE_S3_REGION: str = ""
+    STORAGE_S3_ACCESS_KEY: str = ""
+    STORAGE_S3_SECRET_KEY: str = ""
+    # s3: las descargas redirigen (307) a una URL prefirmada en vez de pasar por la API
+    STORAGE_PRESIGNED_REDIRECT: bool = True
+    STORAGE_PRESIGN_SECONDS: int = 300
+
+    # /reservations/blocked: ventana por defecto si no se envían fechas
+    BLOCKED_DEFAULT_WINDOW_DAYS: int = 365
+
+    # Vencimiento de reservas pending sin pago: POST /reservations y checkout (0 = no vencen).
+    # Las de /reservations/admin no vencen.
+    PENDING_HOLD_TTL_MINUTES: int = 30
+    SWEEP_BATCH_SIZE: int = 1000
+    SWEEP_INTERVAL_SECONDS: float = 60.0
+    SWEEPER_IN_APP: bool = False  # true: el barrido corre como tarea de fondo del API
+
+    # Reportes CSV: filas por lote al leer el detalle (yield_per) y por chunk enviado
+    REPORT_YIELD_PER: int = 2000
+    # períodos cerrados (fin <= hoy UTC): el CSV se genera una vez y se sirve guardado (ETag = sha256)
+    REPORT_SNAPSHOTS: bool = True
+    REPORT_PREBUILD_MAX_PERIODS: int = 1000  # POST /reports/prebuild: períodos por pedido
+
+    # Listados paginados (?limit=&cursor=)
+    PAGE_DEFAULT_LIMIT: int = 0   # 0 = sin ?limit se devuelve todo (como antes de paginar)
+    PAGE_MAX_LIMIT: int = 1000
+
+    # /reports/analytics: rango máximo en días
+    ANALYTICS_MAX_DAYS: int = 3660
+
+    # Render de PDFs en procesos aparte (0 = en el hilo del request)
+    PDF_RENDER_WORKERS: int = 2
+    PDF_RENDER_MAX_QUEUE: int = 32
+    # cache/pdf: se borran los PDF renderizados hace más de N días (app.workers.archive_receipts); 0 = nunca
+    PDF_CACHE_MAX_AGE_DAYS: int = 30
+
+    # true: los listados validan cada fila con su response_model (más lento; útil para depurar)
+    RESPONSE_VALIDATION: bool = False
+
+    # catálogo (rooms + room_types) en memoria: vida máxima de una foto; 0 = sin caché
+    CATALOG_CACHE_TTL_SECONDS: float = 300.0
+
+    # invalidación de cachés entre workers: auto (postgres si la BD lo es, si no local) | postgres | local | off
+    CACHE_BUS_BACKEND: str = "auto"
+    CACHE_BUS_CHANNEL: str = "cache_invalidation"
+    CACHE_BUS_RECONNECT_SECONDS: float = 1.0  # espera inicial antes de reconectar el LISTEN (se duplica hasta 30s)
+
+    # índice de disponibilidad en memoria (noches indexadas desde hoy)
+    AVAILABILITY_HORIZON_DAYS: int = 730
 
     PAYPAL_CLIENT_ID: str = ""
     PAYPAL_CLIENT_SECRET: str = ""
     PAYPAL_MODE: str = "sandbox"  # sandbox | live
+    PAYPAL_BASE_URL: str = ""     # override (ej. servidor PayPal falso en local)
+    PAYPAL_CONNECT_TIMEOUT: float = 5.0
+    PAYPAL_READ_TIMEOUT: float = 30.0
+    PAYPAL_MAX_RETRIES: int = 3
+    PAYPAL_TOTAL_TIMEOUT: float = 45.0   # tope por llamada (token + reintentos + esperas)
+    PAYPAL_RETRY_BACKOFF: float = 0.5    # segundos base (exponencial + jitter)
+    PAYPAL_POOL_SIZE: int = 10
+    PAYPAL_TOKEN_REFRESH_MARGIN: float = 120.0  # refresca el token N s antes de expirar
+    CAPTURE_CLAIM_MARGIN_SECONDS: float = 60.0  # reclamo de captura = PAYPAL_TOTAL_TIMEOUT + esto
+
+    # Checkout async: create-order solo encola; app/workers/paypal_outbox.py llama a PayPal
+    PAYPAL_CHECKOUT_ASYNC: bool = False
+    OUTBOX_BATCH_SIZE: int = 20
+    OUTBOX_CONCURRENCY: int = 4
+    OUTBOX_POLL_INTERVAL: float = 1.0
+    OUTBOX_LEASE_SECONDS: float = 60.0
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    OUTBOX_RETRY_BACKOFF: float = 2.0
 
     @field_validator("DATABASE_URL")
     @classmethod
@@ -20,4 +116,11 @@ class Settings(BaseSettings):
             return v.replace("postgresql://", "postgresql+psycopg://", 1)
         return v
 
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        # psycopg 3 sirve para sync y async; sqlite necesita aiosqlite
+        if self.DATABASE_URL.startswith("sqlite://"):
+            return self.DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+        return self.DATABASE_URL
+
 settings = Settings()
@@ -1,9 +1,44 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from app.core.config import settings
+from app.core.pool_metrics import MeteredQueuePool, MeteredAsyncQueuePool, attach_pool_events
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+def _engine_kwargs(url: str, poolclass) -> dict:
+    kwargs = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if url.startswith("sqlite"):
+        # sqlite (tests/local): pool por defecto del dialecto
+        return kwargs
+    kwargs.update(
+        poolclass=poolclass,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    if settings.DB_PGBOUNCER:
+        # psycopg 3: prepare_threshold=None desactiva prepared statements del servidor
+        kwargs["connect_args"] = {"prepare_threshold": None}
+    return kwargs
+
+engine = create_engine(settings.DATABASE_URL, **_engine_kwargs(settings.DATABASE_URL, MeteredQueuePool))
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+attach_pool_events(engine, MeteredQueuePool.metrics)
+
+# Modo async (settings.DB_ASYNC). expire_on_commit=False: los objetos se
+# serializan fuera de la sesión y no pueden hacer lazy-load sin greenlet.
+async_engine = (
+    create_async_engine(
+        settings.ASYNC_DATABASE_URL, **_engine_kwargs(settings.ASYNC_DATABASE_URL, MeteredAsyncQueuePool)
+    )
+    if settings.DB_ASYNC
+    else None
+)
+AsyncSessionLocal = (
+    async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False) if async_engine is not None else None
+)
+if async_engine is not None:
+    attach_pool_events(async_engine.sync_engine, MeteredAsyncQueuePool.metrics)
 
 def get_db():
     db = SessionLocal()
@@ -11,3 +46,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
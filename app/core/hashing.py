@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from passlib.hash import pbkdf2_sha256
+
+from app.core.config import settings
+from app.core.password_workers import build_context, hash_with, verify_with, warmup
+
+# Hash/verify de contraseñas fuera del worker de uvicorn: un ProcessPoolExecutor
+# acotado (PASSWORD_HASH_WORKERS) y un máximo de operaciones en vuelo
+# (PASSWORD_HASH_MAX_PENDING). Si se llena, 503 en vez de encolar sin límite.
+
+logger = logging.getLogger(__name__)
+
+_executor: ProcessPoolExecutor | None = None
+_slots = threading.BoundedSemaphore(max(settings.PASSWORD_HASH_MAX_PENDING, 1))
+_rounds: int | None = None
+# las rondas calibradas se redondean a este paso: el ruido de la medición
+# no cambia el resultado entre workers o reinicios. Un hash queda "needs_update"
+# si tiene menos de (calibradas - ROUNDS_STEP): un paso de tolerancia para el
+# ruido, pero los hashes de un costo realmente menor se rehacen al hacer login.
+ROUNDS_STEP = 10_000
+
+pwd_context = build_context()
+
+
+def calibrate_rounds(target_ms: float) -> int:
+    """Rondas pbkdf2_sha256 para que un hash tarde ~target_ms en esta máquina."""
+    probe = 20_000
+    t0 = perf_counter()
+    pbkdf2_sha256.using(rounds=probe).hash("calibracion")
+    elapsed = perf_counter() - t0
+    rounds = round(probe * (target_ms / 1000.0) / max(elapsed, 1e-6) / ROUNDS_STEP) * ROUNDS_STEP
+    # nunca por debajo del mínimo configurado (por defecto el de passlib)
+    return max(rounds, settings.PASSWORD_HASH_MIN_ROUNDS)
+
+
+def rehash_below(rounds: int) -> int:
+    """min_rounds del contexto para rounds calibradas (nunca bajo PASSWORD_HASH_MIN_ROUNDS)."""
+    return max(rounds - ROUNDS_STEP, settings.PASSWORD_HASH_MIN_ROUNDS)
+
+
+def start_password_hashing() -> None:
+    """Calibra rondas y levanta el pool (lifespan de app.main)."""
+    global _executor, _rounds, pwd_context
+    if settings.PASSWORD_HASH_TARGET_MS > 0:
+        _rounds = calibrate_rounds(settings.PASSWORD_HASH_TARGET_MS)
+        pwd_context = build_context(_rounds, rehash_below(_rounds))
+        logger.info("pbkdf2_sha256 calibrado: %s rondas (~%sms)", _rounds, settings.PASSWORD_HASH_TARGET_MS)
+    if settings.PASSWORD_HASH_WORKERS > 0 and _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=warmup,
+        )
+
+
+def shutdown_password_hashing() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _acquire_slot() -> None:
+    if not _slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=503,
+            detail="Servidor ocupado, intenta nuevamente",
+            headers={"Retry-After": "1"},
+        )
+
+
+def _run(fn, *args):
+    _acquire_slot()
+    try:
+        if _executor is None:
+            return fn(*args)
+        return _executor.submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+async def _run_async(fn, *args):
+    _acquire_slot()
+    try:
+        if _executor is None:
+            return await run_in_threadpool(fn, *args)
+        return await asyncio.wrap_future(_executor.submit(fn, *args))
+    finally:
+        _slots.release()
+
+
+def _check_length(password: str) -> None:
+    # (opcional) límite de seguridad contra payloads absurdos
+    if len(password.encode("utf-8")) > 4096:
+        raise ValueError("La contraseña es demasiado larga.")
+
+
+def hash_password(password: str) -> str:
+    _check_length(password)
+    return _run(hash_with, password, _rounds)
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    return _run(verify_with, password, password_hash)
+
+
+async def hash_password_async(password: str) -> str:
+    _check_length(password)
+    return await _run_async(hash_with, password, _rounds)
+
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    return await _run_async(verify_with, password, password_hash)
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """True si el hash usa un esquema deprecado o menos rondas que rehash_below(calibradas)."""
+    return pwd_context.needs_update(password_hash)
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from fastapi import Request, Response
+from fastapi.responses import RedirectResponse, StreamingResponse
+
+from app.core.config import settings
+from app.storage.base import StorageBackend
+
+# Validación condicional (ETag / If-None-Match) compartida por los endpoints
+# que sirven archivos o datos que cambian poco.
+
+
+def quote_etag(value: str) -> str:
+    return f'"{value}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True si el If-None-Match del cliente incluye etag (o es "*")."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]  # comparación débil, como pide RFC 9110 para If-None-Match
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+def gzip_etag(etag: str) -> str:
+    return etag[:-1] + '-gzip"'
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Rango único "bytes=a-b" / "bytes=a-" / "bytes=-n" -> (inicio, fin inclusivo).
+
+    None si no hay Range o trae varios rangos (se sirve completo);
+    ValueError si el rango no es satisfacible (416).
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if not first:
+            n = int(last)
+            if n <= 0:
+                raise ValueError("rango vacío")
+            return max(size - n, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        raise ValueError("Range inválido")
+    if start >= size or end < start:
+        raise ValueError("Range fuera del documento")
+    return start, min(end, size - 1)
+
+
+def serve_bytes(
+    request: Request,
+    data: bytes,
+    *,
+    etag: str,
+    media_type: str,
+    filename: str | None = None,
+    cache_control: str = "no-cache",
+    gzipped: bytes | None = None,
+) -> Response:
+    """Respuesta para un documento ya en memoria: 304, 206 (Range), gzip o 200.
+
+    gzipped es la versión precomprimida (None si no conviene); lleva su propio
+    ETag porque es otra representación del mismo recurso.
+    """
+    headers = {"Cache-Control": cache_control, "Accept-Ranges": "bytes"}
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    if gzipped is not None:
+        headers["Vary"] = "Accept-Encoding"
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range is not None and if_range != etag:
+        range_header = None  # el cliente tiene otra versión: va el documento completo
+
+    use_gzip = (
+        gzipped is not None
+        and range_header is None
+        and "gzip" in request.headers.get("accept-encoding", "")
+    )
+    headers["ETag"] = gzip_etag(etag) if use_gzip else etag
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(gzipped, media_type=media_type, headers=headers)
+
+    size = len(data)
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status_code=416, headers=headers)
+    if byte_range is None:
+        return Response(data, media_type=media_type, headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(data[start:end + 1], status_code=206, media_type=media_type, headers=headers)
+
+
+def serve_stored(
+    backend: StorageBackend,
+    key: str,
+    *,
+    media_type: str,
+    filename: str | None = None,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """Archivo del storage: redirección a URL prefirmada (s3) o streaming por chunks.
+
+    Bloquea (consulta tamaño/URL): en handlers async llamar con run_in_threadpool.
+    """
+    headers = dict(headers or {})
+    if settings.STORAGE_PRESIGNED_REDIRECT:
+        url = backend.presigned_url(key, filename=filename, media_type=media_type)
+        if url is not None:
+            return RedirectResponse(url, status_code=307, headers=headers)
+    headers["Content-Length"] = str(backend.size(key))
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return StreamingResponse(backend.iter_chunks(key), media_type=media_type, headers=headers)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from fastapi import HTTPException, Query, Response
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.responses import row_dicts, rows_response
+
+# Paginación keyset sobre id para los listados:
+#   ?limit=N&cursor=<id>  ->  WHERE id < cursor (o >) ORDER BY id LIMIT N+1
+# Cuesta lo mismo en la página 1 que en la 1000 (no hay OFFSET). Si hay más
+# filas, el id de la última va en el header X-Next-Cursor.
+# ?fields=id,status,... selecciona solo esas columnas en el SELECT.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass(frozen=True)
+class PageParams:
+    limit: int | None           # None = sin límite (no hay página siguiente)
+    cursor: int | None
+    fields: list[str] | None
+
+
+def page_params(
+    limit: int | None = Query(None, ge=1, le=settings.PAGE_MAX_LIMIT, description="Filas por página"),
+    cursor: int | None = Query(None, ge=0, description="Valor de X-Next-Cursor de la página anterior"),
+    fields: str | None = Query(None, description="Columnas separadas por coma (ej: id,status)"),
+) -> PageParams:
+    names = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    return PageParams(limit=limit or settings.PAGE_DEFAULT_LIMIT or None, cursor=cursor, fields=names)
+
+
+def field_names(schema: type[BaseModel], fields: list[str] | None) -> list[str]:
+    """Campos de schema, o solo los pedidos en fields (+ id, que usa el cursor)."""
+    allowed = list(schema.model_fields)
+    if fields is None:
+        return allowed
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Campos no válidos: {', '.join(unknown)}")
+    return ["id"] + [f for f in fields if f != "id"]
+
+
+def select_columns(model, schema: type[BaseModel], fields: list[str] | None) -> list:
+    """Columnas del modelo para el SELECT (ver field_names)."""
+    return [getattr(model, name) for name in field_names(schema, fields)]
+
+
+def keyset(stmt, id_col, page: PageParams, descending: bool = False):
+    if page.cursor is not None:
+        stmt = stmt.where(id_col < page.cursor if descending else id_col > page.cursor)
+    stmt = stmt.order_by(id_col.desc() if descending else id_col.asc())
+    return stmt if page.limit is None else stmt.limit(page.limit + 1)
+
+
+def paginate(rows, page: PageParams, response: Response):
+    """Filas (LIMIT N+1) -> página serializada; X-Next-Cursor si hay más.
+
+    Con fields la respuesta es parcial y nunca pasa por el response_model
+    (exige todas las columnas).
+    """
+    items = row_dicts(rows[: page.limit])
+    if page.limit is not None and len(rows) > page.limit:
+        response.headers[NEXT_CURSOR_HEADER] = str(items[-1]["id"])
+    return rows_response(items, headers=dict(response.headers), validate=page.fields is None)
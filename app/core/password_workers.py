@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+from passlib.context import CryptContext
+
+# Funciones que corren dentro del ProcessPoolExecutor de hashing (spawn).
+# Este módulo no importa nada de app.* para que los procesos hijos arranquen
+# rápido y sin tocar config/BD.
+
+
+@lru_cache(maxsize=8)
+def build_context(rounds: int | None = None, min_rounds: int | None = None) -> CryptContext:
+    kwargs = {}
+    if rounds:
+        kwargs["pbkdf2_sha256__default_rounds"] = rounds
+    if min_rounds:
+        # por debajo de las rondas calibradas (hashing.rehash_below): solo los
+        # hashes bajo este mínimo quedan "needs_update"
+        kwargs["pbkdf2_sha256__min_rounds"] = min_rounds
+    return CryptContext(schemes=["pbkdf2_sha256", "bcrypt"], deprecated=["bcrypt"], **kwargs)
+
+
+def hash_with(password: str, rounds: int | None) -> str:
+    return build_context(rounds).hash(password)
+
+
+def verify_with(password: str, password_hash: str) -> bool:
+    return build_context().verify(password, password_hash)
+
+
+def warmup() -> None:
+    build_context()
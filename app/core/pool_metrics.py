@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import threading
+from contextvars import ContextVar
+from time import perf_counter
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+# Métricas del pool de conexiones (por proceso / worker de uvicorn).
+# El tiempo de espera se mide alrededor de _do_get: incluye esperar una
+# conexión libre y, si hay overflow, abrir una nueva.
+
+# acumulador por request (lo inicializa el middleware de app.main)
+request_pool_wait: ContextVar[list[float] | None] = ContextVar("request_pool_wait", default=None)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0           # QueuePool agotado: TimeoutError tras DB_POOL_TIMEOUT
+        self.exhausted = 0          # checkouts que tuvieron que esperar con pool + overflow llenos
+        self.wait_total_s = 0.0
+        self.wait_max_s = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_total_s += seconds
+            if seconds > self.wait_max_s:
+                self.wait_max_s = seconds
+        acc = request_pool_wait.get()
+        if acc is not None:
+            acc[0] += seconds
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self, pool=None) -> dict:
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "exhausted": self.exhausted,
+                "wait_total_ms": round(self.wait_total_s * 1000, 3),
+                "wait_max_ms": round(self.wait_max_s * 1000, 3),
+                "wait_avg_ms": round(self.wait_total_s * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+            }
+        if isinstance(pool, QueuePool):
+            data.update(
+                {
+                    "size": pool.size(),
+                    "checked_in": pool.checkedin(),
+                    "checked_out": pool.checkedout(),
+                    "overflow": pool.overflow(),
+                }
+            )
+        return data
+
+
+class _MeteredMixin:
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        if self._max_overflow > -1 and self.checkedout() >= self.size() + self._max_overflow:
+            self.metrics.incr("exhausted")
+        t0 = perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.incr("timeouts")
+            raise
+        finally:
+            self.metrics.record_wait(perf_counter() - t0)
+
+
+class MeteredQueuePool(_MeteredMixin, QueuePool):
+    metrics = PoolMetrics()
+
+
+class MeteredAsyncQueuePool(_MeteredMixin, AsyncAdaptedQueuePool):
+    metrics = PoolMetrics()
+
+
+def attach_pool_events(engine, metrics: PoolMetrics) -> None:
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_conn, conn_record, conn_proxy):
+        metrics.incr("checkouts")
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_conn, conn_record):
+        metrics.incr("checkins")
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_conn, conn_record):
+        metrics.incr("connects")
+
+    @event.listens_for(engine, "invalidate")
+    def _invalidate(dbapi_conn, conn_record, exception):
+        metrics.incr("invalidations")
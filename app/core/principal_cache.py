@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import monotonic
+
+from app.core.config import settings
+
+# Caché TTL + LRU de usuarios autenticados, por `sub` del token (email).
+# Se guarda un Principal inmutable y no la instancia ORM: esa queda ligada
+# (y expirada) a la sesión del request que la cargó.
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    role: str
+
+
+class PrincipalCache:
+    def __init__(self, ttl_seconds: float, maxsize: int):
+        self.ttl = ttl_seconds
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, sub: str) -> Principal | None:
+        if not self.enabled:
+            return None
+        now = monotonic()
+        with self._lock:
+            item = self._data.get(sub)
+            if item is None or item[0] < now:
+                if item is not None:
+                    del self._data[sub]
+                self.misses += 1
+                return None
+            self._data.move_to_end(sub)
+            self.hits += 1
+            return item[1]
+
+    def put(self, sub: str, principal: Principal) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[sub] = (monotonic() + self.ttl, principal)
+            self._data.move_to_end(sub)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Borra las entradas de un usuario (update/delete; el email puede haber cambiado)."""
+        with self._lock:
+            for sub in [k for k, (_, p) in self._data.items() if p.id == user_id]:
+                del self._data[sub]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_TTL_SECONDS, settings.PRINCIPAL_CACHE_MAXSIZE)
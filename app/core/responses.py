@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+from app.core.config import settings
+
+# Respuesta JSON por defecto de la app (main.py): orjson serializa date/datetime
+# en C y mucho más rápido que json + jsonable_encoder.
+# Los listados además se saltan el response_model: construyen dicts desde
+# Row de un select() por columnas y los devuelven ya serializados (rows_response).
+# Con RESPONSE_VALIDATION=true vuelven a pasar por el response_model (debug).
+
+
+def _default(value: Any):
+    # Numeric de la BD: los schemas lo exponen como float
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+
+class FastJSONResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def row_dicts(rows) -> list[dict]:
+    """Row de un select() por columnas -> dicts (sin hidratar objetos ORM)."""
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def rows_response(items: list[dict], headers: dict | None = None, validate: bool = True):
+    """Devuelve los dicts ya serializados; el response_model del endpoint queda solo para la doc.
+
+    validate=False fuerza el camino directo (ej. ?fields=, donde el modelo no aplica).
+    """
+    if validate and settings.RESPONSE_VALIDATION:
+        return items
+    return FastJSONResponse(items, headers=headers)
@@ -5,36 +5,31 @@ from datetime import datetime, timedelta, timezone
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 
 from app.core.config import settings
-from app.core.database import get_db
-from app.models.user import User
-
-pwd_context = CryptContext(
-    schemes=["pbkdf2_sha256", "bcrypt"],
-    deprecated=["bcrypt"],
+from app.core.database import get_db, get_async_db
+from app.core.hashing import (  # noqa: F401 (re-export)
+    hash_password,
+    verify_password,
+    hash_password_async,
+    verify_password_async,
+    needs_rehash,
 )
+from app.core.principal_cache import Principal, principal_cache
+from app.models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 ALGORITHM = "HS256"
 
 
-def hash_password(password: str) -> str:
-    # (opcional) límite de seguridad contra payloads absurdos
-    if len(password.encode("utf-8")) > 4096:
-        raise ValueError("La contraseña es demasiado larga.")
-    return pwd_context.hash(password)
-
-
-def verify_password(password: str, password_hash: str) -> bool:
-    return pwd_context.verify(password, password_hash)
-
-
-def create_access_token(*, sub: str, role: str, expires_minutes: int) -> str:
+def create_access_token(*, sub: str, role: str, expires_minutes: int, uid: int | None = None) -> str:
     expire = datetime.now(timezone.utc) + timedelta(minutes=expires_minutes)
     payload = {"sub": sub, "role": role, "exp": expire}
+    if uid is not None:
+        payload["uid"] = uid
     return jwt.encode(payload, settings.SECRET_KEY, algorithm=ALGORITHM)
 
 
@@ -49,18 +44,57 @@ def decode_token(token: str) -> dict:
         )
 
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+def _principal_from_token(token: str) -> tuple[str, Principal | None]:
+    """Devuelve (sub, principal si se puede resolver sin BD)."""
     payload = decode_token(token)
     sub = payload.get("sub")
     if not sub:
         raise HTTPException(status_code=401, detail="Token sin subject")
-    user = db.query(User).filter(User.email == sub).first()
+    if settings.AUTH_TRUST_TOKEN_CLAIMS and payload.get("uid") is not None and payload.get("role"):
+        return sub, Principal(id=payload["uid"], email=sub, role=payload["role"])
+    return sub, principal_cache.get(sub)
+
+
+def _principal_stmt(sub: str):
+    # solo las columnas del Principal (sin hidratar User completo)
+    return select(User.id, User.email, User.role).where(User.email == sub)
+
+
+def _cache_principal(sub: str, user) -> Principal:
     if not user:
         raise HTTPException(status_code=401, detail="Usuario no existe")
-    return user
+    principal = Principal(id=user.id, email=user.email, role=user.role)
+    principal_cache.put(sub, principal)
+    return principal
+
+
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> Principal:
+    sub, principal = _principal_from_token(token)
+    if principal:
+        return principal
+    user = db.execute(_principal_stmt(sub)).first()
+    return _cache_principal(sub, user)
+
+
+def require_admin(current: Principal = Depends(get_current_user)) -> Principal:
+    if current.role != "admin":
+        raise HTTPException(status_code=403, detail="Solo admin")
+    return current
+
+
+# ---------- variantes async (settings.DB_ASYNC) ----------
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)
+) -> Principal:
+    sub, principal = _principal_from_token(token)
+    if principal:
+        return principal
+    user = (await db.execute(_principal_stmt(sub))).first()
+    return _cache_principal(sub, user)
 
 
-def require_admin(current: User = Depends(get_current_user)) -> User:
+async def require_admin_async(current: Principal = Depends(get_current_user_async)) -> Principal:
     if current.role != "admin":
         raise HTTPException(status_code=403, detail="Solo admin")
     return current
@@ -1,8 +1,47 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.router import api_router
+from app.core.config import settings
+from app.core.hashing import start_password_hashing, shutdown_password_hashing
+from app.core.pool_metrics import request_pool_wait
+from app.core.responses import FastJSONResponse
+from app.services.expiry_sweeper import sweeper_loop
+from app.services.pdf_render import pdf_renderer
+from app.services import cache_bus, paypal_service, report_snapshots, revenue_rollup
+from app.services.static_docs import static_documents
+
+# daily_revenue_rollup se actualiza en cada flush que toque reservas paid
+revenue_rollup.install()
+# cada flush que toque usuarios/catálogo/reservas avisa a los demás workers
+cache_bus.install()
+# cambios en reservas paid invalidan los reportes guardados de períodos cerrados
+report_snapshots.install()
+
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_password_hashing()
+    pdf_renderer.start()
+    static_documents.build_all()
+    sweeper = asyncio.create_task(sweeper_loop()) if settings.SWEEPER_IN_APP else None
+    bus = asyncio.create_task(cache_bus.listener_loop())
+    yield
+    bus.cancel()
+    with suppress(asyncio.CancelledError):
+        await bus
+    if sweeper is not None:
+        sweeper.cancel()
+        with suppress(asyncio.CancelledError):
+            await sweeper
+    await paypal_service.close_async_client()
+    pdf_renderer.shutdown()
+    shutdown_password_hashing()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 origins = [
     "https://hotelventura.com.ec",
@@ -21,4 +60,16 @@ app.add_middleware(
     expose_headers=["*"], 
 )
 
+@app.middleware("http")
+async def pool_wait_header(request: Request, call_next):
+    # tiempo esperando conexión del pool en este request (Server-Timing)
+    acc = [0.0]
+    token = request_pool_wait.set(acc)
+    try:
+        response = await call_next(request)
+    finally:
+        request_pool_wait.reset(token)
+    response.headers["Server-Timing"] = f"db-pool;dur={acc[0] * 1000:.2f}"
+    return response
+
 app.include_router(api_router, prefix="/api/v1")
@@ -2,3 +2,6 @@ from app.models.user import User
 from app.models.room_type import RoomType
 from app.models.room import Room
 from app.models.reservation import Reservation
+from app.models.payment_outbox import PaymentOutbox
+from app.models.daily_revenue_rollup import DailyRevenueRollup
+from app.models.report_snapshot import ReportSnapshot
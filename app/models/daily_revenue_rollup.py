@@ -0,0 +1,18 @@
+from datetime import date
+from sqlalchemy import Integer, ForeignKey, Date, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+from app.models.base import Base
+
+class DailyRevenueRollup(Base):
+    """Reservas paid e ingresos por día (de created_at) y tipo de habitación.
+
+    Se mantiene al hacer flush (app/services/revenue_rollup.py); los reportes
+    suman estas filas en vez de recorrer reservations.
+    """
+    __tablename__ = "daily_revenue_rollup"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    room_type_id: Mapped[int] = mapped_column(ForeignKey("room_types.id", ondelete="CASCADE"), primary_key=True)
+
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False, default=0)
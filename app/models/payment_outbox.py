@@ -0,0 +1,32 @@
+from datetime import datetime
+from sqlalchemy import Integer, ForeignKey, String, DateTime, Text, Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from app.models.base import Base
+
+class PaymentOutbox(Base):
+    """Trabajo pendiente con PayPal (checkout async, ver app/workers/paypal_outbox.py)."""
+    __tablename__ = "payment_outbox"
+    __table_args__ = (
+        # el worker toma lotes: status='pending' AND available_at <= now ORDER BY id
+        Index("ix_payment_outbox_status_available", "status", "available_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    reservation_id: Mapped[int] = mapped_column(
+        ForeignKey("reservations.id", ondelete="CASCADE"), nullable=False, unique=True, index=True
+    )
+
+    kind: Mapped[str] = mapped_column(String(20), nullable=False, default="create_order")
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")  # pending|done|failed
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    # lease: mientras un worker procesa la fila se corre hacia adelante;
+    # si el worker muere, la fila vuelve a estar disponible al vencer
+    available_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    processed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    approve_url: Mapped[str | None] = mapped_column(String(500), nullable=True)
+
+    reservation = relationship("Reservation")
@@ -0,0 +1,30 @@
+from datetime import date, datetime
+from sqlalchemy import Integer, String, Date, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from app.models.base import Base
+
+class ReportSnapshot(Base):
+    """CSV ya generado de un período cerrado (app/services/report_snapshots.py).
+
+    version sube cada vez que cambia una reserva que sale en el reporte;
+    el archivo sirve solo si built_version == version.
+    """
+    __tablename__ = "report_snapshots"
+    __table_args__ = (
+        # invalidación: períodos que contienen un día dado
+        Index("ix_report_snapshots_period", "start_date", "end_date"),
+    )
+
+    name: Mapped[str] = mapped_column(String(80), primary_key=True)  # daily_2025-01-01, monthly_2025_01...
+    kind: Mapped[str] = mapped_column(String(10), nullable=False)  # daily|weekly|monthly
+    start_date: Mapped[date] = mapped_column(Date, nullable=False)
+    end_date: Mapped[date] = mapped_column(Date, nullable=False)
+
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    built_version: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    # clave en el storage (incluye el hash: cada contenido es un objeto inmutable)
+    path: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    size: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    built_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
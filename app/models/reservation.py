@@ -1,10 +1,23 @@
 from datetime import datetime
-from sqlalchemy import Integer, ForeignKey, Date, Numeric, String, DateTime
+from sqlalchemy import Integer, ForeignKey, Date, Numeric, String, DateTime, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.models.base import Base
 
 class Reservation(Base):
     __tablename__ = "reservations"
+    __table_args__ = (
+        # disponibilidad / solapes: room_id + status + rango de fechas
+        Index("ix_reservations_room_status_dates", "room_id", "status", "fecha_inicio", "fecha_fin"),
+        # detalle de reportes: status='paid' AND created_at en rango
+        Index("ix_reservations_status_created_at", "status", "created_at"),
+        # solo las pending con vencimiento (lo que recorre el sweeper)
+        Index(
+            "ix_reservations_pending_expires_at",
+            "expires_at",
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
@@ -22,9 +35,12 @@ class Reservation(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
 
     # PayPal
-    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")  # pending|paid|cancelled
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")  # pending|capturing|paid|cancelled
     paypal_order_id: Mapped[str | None] = mapped_column(String(80), nullable=True, index=True)
     paypal_capture_id: Mapped[str | None] = mapped_column(String(80), nullable=True, index=True)
 
+    # vencimiento de la reserva pending (None = no vence); ver app/services/expiry_sweeper.py
+    expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
     user = relationship("User")
     room = relationship("Room")
@@ -8,8 +8,12 @@ class PayPalCreateOrderIn(BaseModel):
 
 class PayPalCreateOrderOut(BaseModel):
     reservation_id: int
-    paypal_order_id: str
+    paypal_order_id: str | None = None  # None mientras el checkout async está en cola
     approve_url: str | None = None
+    status: str = "ready"  # queued|ready|failed (|not_found en GET /orders: sin outbox ni orden)
+
+class PayPalOrderStatusOut(PayPalCreateOrderOut):
+    reservation_status: str
 
 class PayPalCaptureIn(BaseModel):
     reservation_id: int
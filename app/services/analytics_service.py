@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import csv
+import io
+from dataclasses import dataclass
+from datetime import date
+from typing import Literal
+
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.responses import dumps
+from app.models.reservation import Reservation
+from app.models.room import Room
+from app.models.room_type import RoomType
+from app.services.availability_index import ACTIVE_STATUSES
+
+# Analítica de ocupación e ingresos sobre un rango arbitrario [start, end).
+# Se leen columnas (habitaciones y reservas que tocan el rango) a arrays de
+# NumPy y se agrega sin bucles por fila:
+#   - por tiempo: "difference arrays" (bincount en inicio/fin + cumsum) dan
+#     noches ocupadas e ingresos por día; luego se suman por semana/mes
+#   - por tipo / piso: bincount de noches dentro del rango por grupo
+# Ocupación = noches ocupadas (pending + paid) / noches-habitación disponibles.
+# Ingresos = paid, prorrateados por noche de estadía (costo_total / noches),
+# no por created_at como los CSV de /reports/daily|weekly|monthly.
+# Las habitaciones disponibles son las que existen hoy (no hay histórico de altas/bajas).
+
+GroupBy = Literal["day", "week", "month", "room_type", "piso"]
+OutputFormat = Literal["json", "csv", "arrow", "parquet"]
+
+COLUMNS = ("group", "available_room_nights", "booked_nights", "paid_nights", "occupancy", "revenue", "adr", "revpar")
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+@dataclass(frozen=True)
+class OccupancyFrame:
+    """Columnas de habitaciones y reservas activas, con fechas como offsets desde start."""
+    start: date
+    days: int
+    room_ids: np.ndarray        # ordenado
+    room_numero: np.ndarray     # object (str)
+    room_piso: np.ndarray
+    room_tipo: np.ndarray       # object (str)
+    res_room: np.ndarray        # índice en room_ids
+    res_start: np.ndarray       # offset de fecha_inicio (puede ser < 0)
+    res_end: np.ndarray         # offset de fecha_fin (puede ser > days)
+    res_paid: np.ndarray        # bool
+    res_amount: np.ndarray      # costo_total si paid, 0 si pending
+
+
+def assert_valid_range(start: date, end: date) -> int:
+    days = (end - start).days
+    if days <= 0:
+        raise ValueError("end debe ser mayor que start")
+    if days > settings.ANALYTICS_MAX_DAYS:
+        raise ValueError(f"Rango máximo: {settings.ANALYTICS_MAX_DAYS} días")
+    return days
+
+
+def _rooms_stmt():
+    return (
+        select(Room.id, Room.numero, Room.piso, RoomType.tipo)
+        .join(RoomType, RoomType.id == Room.room_type_id)
+        .order_by(Room.id.asc())
+    )
+
+
+def _reservations_stmt(start: date, end: date):
+    return select(
+        Reservation.room_id,
+        Reservation.fecha_inicio,
+        Reservation.fecha_fin,
+        Reservation.costo_total,
+        Reservation.status,
+    ).where(
+        Reservation.status.in_(ACTIVE_STATUSES),
+        Reservation.fecha_inicio < end,
+        Reservation.fecha_fin > start,
+    )
+
+
+def _day_offsets(values, start: date) -> np.ndarray:
+    return (np.array(values, dtype="datetime64[D]") - np.datetime64(start, "D")).astype(np.int64)
+
+
+def _frame(start: date, days: int, rooms: list, reservations: list) -> OccupancyFrame:
+    room_ids, room_numero, room_piso, room_tipo = zip(*rooms) if rooms else ((), (), (), ())
+    r_room, r_fi, r_ff, r_costo, r_status = zip(*reservations) if reservations else ((), (), (), (), ())
+    room_ids = np.array(room_ids, dtype=np.int64)
+    r_room = np.array(r_room, dtype=np.int64)
+    # FK RESTRICT: toda reserva tiene habitación; el filtro es por si se borró entre las dos consultas
+    known = np.isin(r_room, room_ids)
+    paid = np.array(r_status, dtype=object) == "paid"
+    amount = np.array(r_costo, dtype=np.float64)
+    return OccupancyFrame(
+        start=start,
+        days=days,
+        room_ids=room_ids,
+        room_numero=np.array(room_numero, dtype=object),
+        room_piso=np.array(room_piso, dtype=np.int64),
+        room_tipo=np.array(room_tipo, dtype=object),
+        res_room=np.searchsorted(room_ids, r_room[known]),
+        res_start=_day_offsets(r_fi, start)[known],
+        res_end=_day_offsets(r_ff, start)[known],
+        res_paid=paid[known],
+        res_amount=np.where(paid, amount, 0.0)[known],
+    )
+
+
+def load_frame(db: Session, start: date, end: date) -> OccupancyFrame:
+    days = assert_valid_range(start, end)
+    rooms = db.execute(_rooms_stmt()).all()
+    reservations = db.execute(_reservations_stmt(start, end)).all()
+    return _frame(start, days, rooms, reservations)
+
+
+async def load_frame_async(db: AsyncSession, start: date, end: date) -> OccupancyFrame:
+    days = assert_valid_range(start, end)
+    rooms = (await db.execute(_rooms_stmt())).all()
+    reservations = (await db.execute(_reservations_stmt(start, end))).all()
+    return _frame(start, days, rooms, reservations)
+
+
+def _daily_series(f: OccupancyFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(ocupadas, pagadas, ingresos) por día del rango."""
+    d = f.days
+    s = np.clip(f.res_start, 0, d)
+    e = np.clip(f.res_end, 0, d)
+    nights = np.maximum(f.res_end - f.res_start, 1)
+    rate = f.res_amount / nights
+    paid = f.res_paid.astype(np.float64)
+
+    def painted(weights):
+        diff = np.bincount(s, weights=weights, minlength=d + 1) - np.bincount(e, weights=weights, minlength=d + 1)
+        return np.cumsum(diff)[:d]
+
+    return painted(None), painted(paid), painted(rate)
+
+
+def _time_labels(f: OccupancyFrame, group_by: GroupBy) -> np.ndarray:
+    days = np.datetime64(f.start, "D") + np.arange(f.days)
+    if group_by == "week":
+        # 1970-01-01 fue jueves: (n + 3) % 7 = día de la semana con lunes = 0
+        days = days - ((days.astype(np.int64) + 3) % 7)
+    elif group_by == "month":
+        return days.astype("datetime64[M]").astype(str)
+    return days.astype(str)
+
+
+def aggregate(f: OccupancyFrame, group_by: GroupBy) -> dict[str, list]:
+    """Tabla columnar (COLUMNS) agrupada por group_by."""
+    n_rooms = len(f.room_ids)
+    if group_by in ("day", "week", "month"):
+        booked_d, paid_d, revenue_d = _daily_series(f)
+        labels, codes = np.unique(_time_labels(f, group_by), return_inverse=True)
+        available = np.bincount(codes, minlength=len(labels)) * float(n_rooms)
+        booked = np.bincount(codes, weights=booked_d, minlength=len(labels))
+        paid = np.bincount(codes, weights=paid_d, minlength=len(labels))
+        revenue = np.bincount(codes, weights=revenue_d, minlength=len(labels))
+        group = labels.tolist()
+    else:
+        keys = f.room_piso if group_by == "piso" else f.room_tipo
+        labels, room_codes = np.unique(keys, return_inverse=True)
+        codes = room_codes[f.res_room]
+        nights_in = np.clip(f.res_end, 0, f.days) - np.clip(f.res_start, 0, f.days)
+        nights = np.maximum(f.res_end - f.res_start, 1)
+        available = np.bincount(room_codes, minlength=len(labels)) * float(f.days)
+        booked = np.bincount(codes, weights=nights_in, minlength=len(labels))
+        paid = np.bincount(codes, weights=nights_in * f.res_paid, minlength=len(labels))
+        revenue = np.bincount(codes, weights=f.res_amount / nights * nights_in, minlength=len(labels))
+        group = labels.tolist()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        occupancy = np.where(available > 0, booked / available, 0.0)
+        adr = np.where(paid > 0, revenue / paid, 0.0)
+        revpar = np.where(available > 0, revenue / available, 0.0)
+
+    return {
+        "group": group,
+        "available_room_nights": available.astype(np.int64).tolist(),
+        "booked_nights": booked.astype(np.int64).tolist(),
+        "paid_nights": paid.astype(np.int64).tolist(),
+        "occupancy": np.round(occupancy, 4).tolist(),
+        "revenue": np.round(revenue, 2).tolist(),
+        "adr": np.round(adr, 2).tolist(),
+        "revpar": np.round(revpar, 2).tolist(),
+    }
+
+
+def render_table(table: dict[str, list], fmt: OutputFormat, meta: dict) -> bytes:
+    if fmt == "json":
+        return dumps({**meta, "rows": [dict(zip(COLUMNS, row)) for row in zip(*(table[c] for c in COLUMNS))]})
+    if fmt == "csv":
+        out = io.StringIO()
+        w = csv.writer(out)
+        w.writerow(COLUMNS)
+        w.writerows(zip(*(table[c] for c in COLUMNS)))
+        return out.getvalue().encode("utf-8")
+
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ValueError(f"Formato {fmt} no disponible (falta pyarrow)")
+    arrow_table = pa.table({c: table[c] for c in COLUMNS}).replace_schema_metadata({k: str(v) for k, v in meta.items()})
+    sink = pa.BufferOutputStream()
+    if fmt == "arrow":
+        with pa.ipc.new_stream(sink, arrow_table.schema) as writer:
+            writer.write_table(arrow_table)
+    else:
+        import pyarrow.parquet as pq
+        pq.write_table(arrow_table, sink)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import threading
+from datetime import date, timedelta
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.reservation import Reservation
+from app.models.room import Room
+
+# Índice en memoria de noches ocupadas: un bitset (int de Python) por habitación.
+# Bit i = noche (origin + i) ocupada por una reserva activa (ACTIVE_STATUSES).
+# Las operaciones AND/OR/shift sobre int trabajan por palabras de máquina,
+# así que "¿libre en [s, e)?" es una máscara y un AND, sin tocar la BD.
+
+# capturing: pending reclamada mientras PayPal captura (ver payments_paypal.capture_order)
+ACTIVE_STATUSES = ("pending", "capturing", "paid")
+
+
+def _range_mask(offset: int, nights: int) -> int:
+    return ((1 << nights) - 1) << offset
+
+
+class AvailabilityIndex:
+    def __init__(self, horizon_days: int):
+        self.horizon_days = horizon_days
+        self.origin: date | None = None
+        self._bits: dict[int, int] = {}
+        self._lock = threading.Lock()
+        # Las consultas a la BD van fuera del lock: en modo async esto corre en
+        # el hilo del event loop (run_sync) y otra corrutina que esperara el
+        # lock lo bloquearía. Cada carga toma un ticket antes de leer y solo
+        # publica si nadie más nuevo publicó antes (lecturas viejas no pisan).
+        self._ticket = 0
+        self._generation = 0            # ticket del último rebuild/invalidate
+        self._room_ticket: dict[int, int] = {}
+
+    # ---------- carga ----------
+
+    def _window(self, origin: date | None = None) -> tuple[date, date]:
+        origin = origin or self.origin
+        assert origin is not None
+        return origin, origin + timedelta(days=self.horizon_days)
+
+    def _paint(self, bits: int, start: date, end: date, origin: date | None = None) -> int:
+        h_start, h_end = self._window(origin)
+        s = max(start, h_start)
+        e = min(end, h_end)
+        if e <= s:
+            return bits
+        return bits | _range_mask((s - h_start).days, (e - s).days)
+
+    def _active_stmt(self, origin: date | None = None):
+        h_start, h_end = self._window(origin)
+        return select(Reservation.room_id, Reservation.fecha_inicio, Reservation.fecha_fin).where(
+            Reservation.status.in_(ACTIVE_STATUSES),
+            Reservation.fecha_inicio < h_end,
+            Reservation.fecha_fin > h_start,
+        )
+
+    def _next_ticket(self) -> int:
+        with self._lock:
+            self._ticket += 1
+            return self._ticket
+
+    def rebuild(self, db: Session) -> None:
+        """Reconstruye todo el índice para [hoy, hoy + horizonte)."""
+        ticket = self._next_ticket()
+        origin = date.today()
+        bits: dict[int, int] = {rid: 0 for rid in db.execute(select(Room.id)).scalars()}
+        for r in db.execute(self._active_stmt(origin)).all():
+            bits[r.room_id] = self._paint(bits.get(r.room_id, 0), r.fecha_inicio, r.fecha_fin, origin)
+        with self._lock:
+            if ticket < self._generation:
+                return
+            self._generation = ticket
+            # los refresh_room que leyeron después que este rebuild ganan
+            newer = {rid: t for rid, t in self._room_ticket.items() if t > ticket}
+            for rid in newer:
+                if rid in self._bits:
+                    bits[rid] = self._bits[rid]
+                else:
+                    bits.pop(rid, None)
+            self._room_ticket = newer
+            self.origin = origin
+            self._bits = bits
+
+    def ensure_current(self, db: Session) -> None:
+        # ventana móvil: al cambiar de día se reconstruye
+        if self.origin != date.today():
+            self.rebuild(db)
+
+    def refresh_room(self, db: Session, room_id: int) -> None:
+        """Recalcula el bitset de una habitación (llamar después de commit)."""
+        origin = self.origin
+        if origin is None:
+            return  # aún no cargado; se construirá completo en la primera consulta
+        ticket = self._next_ticket()
+        exists = db.get(Room, room_id) is not None
+        bits = 0
+        if exists:
+            for r in db.execute(self._active_stmt(origin).where(Reservation.room_id == room_id)).all():
+                bits = self._paint(bits, r.fecha_inicio, r.fecha_fin, origin)
+        with self._lock:
+            if self.origin != origin or ticket < self._generation or ticket < self._room_ticket.get(room_id, 0):
+                return
+            self._room_ticket[room_id] = ticket
+            if exists:
+                self._bits[room_id] = bits
+            else:
+                self._bits.pop(room_id, None)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._ticket += 1
+            self._generation = self._ticket
+            self._room_ticket = {}
+            self.origin = None
+            self._bits = {}
+
+    # ---------- consultas ----------
+
+    def _mask_for(self, start: date, end: date) -> int | None:
+        # llamar con el lock tomado
+        if self.origin is None:
+            return None
+        h_start, h_end = self._window()
+        if not (h_start <= start < end <= h_end):
+            return None
+        return _range_mask((start - h_start).days, (end - start).days)
+
+    def is_free(self, room_id: int, start: date, end: date) -> bool | None:
+        """True/False si la habitación está libre en [start, end); None si el rango no está indexado."""
+        with self._lock:
+            mask = self._mask_for(start, end)
+            bits = self._bits.get(room_id)
+        if mask is None or bits is None:
+            return None
+        return bits & mask == 0
+
+    def free_rooms(self, start: date, end: date) -> list[int] | None:
+        """Ids de habitaciones libres en [start, end); None si el rango no está indexado."""
+        with self._lock:
+            mask = self._mask_for(start, end)
+            items = list(self._bits.items())
+        if mask is None:
+            return None
+        return sorted(rid for rid, bits in items if bits & mask == 0)
+
+
+availability_index = AvailabilityIndex(settings.AVAILABILITY_HORIZON_DAYS)
+
+
+def free_room_ids_sql(db: Session, start: date, end: date) -> list[int]:
+    """Misma consulta que free_rooms pero contra la BD (fuera del horizonte)."""
+    busy = select(Reservation.room_id).where(
+        Reservation.status.in_(ACTIVE_STATUSES),
+        Reservation.fecha_inicio < end,
+        Reservation.fecha_fin > start,
+    )
+    stmt = select(Room.id).where(Room.id.not_in(busy)).order_by(Room.id.asc())
+    return list(db.execute(stmt).scalars())
+
+
+def free_room_ids(db: Session, start: date, end: date) -> list[int]:
+    availability_index.ensure_current(db)
+    ids = availability_index.free_rooms(start, end)
+    if ids is None:
+        ids = free_room_ids_sql(db, start, end)
+    return ids
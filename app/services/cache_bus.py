@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Iterable
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.principal_cache import principal_cache
+from app.models.reservation import Reservation
+from app.models.room import Room
+from app.models.room_type import RoomType
+from app.models.user import User
+from app.services.availability_index import availability_index
+from app.services.catalog_cache import catalog_cache
+
+# Invalidación de cachés en memoria entre workers (varios uvicorn / procesos).
+# Los cambios se detectan en cada flush (como revenue_rollup):
+#   user      -> principal_cache.invalidate_user
+#   room      -> catalog_cache.bump + availability_index.refresh_room
+#   room_type -> catalog_cache.bump
+#   availability (reserva creada/movida/cancelada/borrada) -> refresh_room
+# Backends (CACHE_BUS_BACKEND):
+#   postgres: pg_notify dentro de la misma transacción; Postgres solo lo
+#             entrega si hay commit. Cada worker escucha con LISTEN en su
+#             propia conexión y tras reconectar resincroniza todo (pudo
+#             perder avisos mientras estaba caído).
+#   local:    mismo flujo dentro del proceso (SQLite / tests), tras el commit.
+# El worker que escribe también recibe su aviso: aplicarlo otra vez es inocuo.
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "cache_bus_events"
+_CASCADE_KEY = "cache_bus_cascade"
+# límite de payload de NOTIFY: 8000 bytes
+MAX_PAYLOAD = 7900
+_RESERVATION_ATTRS = ("room_id", "fecha_inicio", "fecha_fin", "status")
+
+Event = tuple[str, int]
+
+
+def backend_name() -> str:
+    name = settings.CACHE_BUS_BACKEND
+    if name == "auto":
+        return "postgres" if settings.DATABASE_URL.startswith("postgresql") else "local"
+    return name
+
+
+def encode(events: Iterable[Event]) -> str:
+    payload = json.dumps(sorted(set(events)), separators=(",", ":"))
+    if len(payload.encode("utf-8")) > MAX_PAYLOAD:
+        return "resync"
+    return payload
+
+
+def decode(payload: str) -> list[Event] | None:
+    """Eventos del aviso; None = resincronizar todo."""
+    if payload == "resync":
+        return None
+    return [(entity, int(key)) for entity, key in json.loads(payload)]
+
+
+# ---------- aplicar ----------
+
+def _refresh_rooms(room_ids: set[int]) -> None:
+    db = SessionLocal()
+    try:
+        for room_id in sorted(room_ids):
+            availability_index.refresh_room(db, room_id)
+    finally:
+        db.close()
+
+
+def resync() -> None:
+    """Descarta todo lo cacheado en este worker; se recarga en la próxima lectura."""
+    principal_cache.clear()
+    catalog_cache.bump()
+    availability_index.invalidate()
+
+
+async def apply(events: list[Event] | None) -> None:
+    if events is None:
+        resync()
+        return
+    rooms: set[int] = set()
+    catalog = False
+    for entity, key in events:
+        if entity == "user":
+            principal_cache.invalidate_user(key)
+        elif entity == "room":
+            catalog = True
+            rooms.add(key)
+        elif entity == "room_type":
+            catalog = True
+        elif entity == "availability":
+            rooms.add(key)
+    if catalog:
+        catalog_cache.bump()
+    if rooms:
+        await asyncio.to_thread(_refresh_rooms, rooms)
+
+
+# ---------- detectar cambios (listeners de Session) ----------
+
+def _reservation_rooms(obj: Reservation) -> set[int]:
+    state = inspect(obj)
+    if not any(state.attrs[a].history.has_changes() for a in _RESERVATION_ATTRS):
+        return set()
+    hist = state.attrs.room_id.history
+    return {rid for rid in (*hist.added, *hist.unchanged, *hist.deleted) if rid is not None}
+
+
+def _collect(session: Session) -> set[Event]:
+    events: set[Event] = set()
+    for obj in session.new:
+        if isinstance(obj, Reservation):
+            events.add(("availability", obj.room_id))
+        elif isinstance(obj, Room):
+            events.add(("room", obj.id))
+        elif isinstance(obj, RoomType):
+            events.add(("room_type", obj.id))
+    for obj in session.dirty:
+        if isinstance(obj, Reservation):
+            events.update(("availability", rid) for rid in _reservation_rooms(obj))
+        elif isinstance(obj, User):
+            events.add(("user", obj.id))
+        elif isinstance(obj, Room):
+            events.add(("room", obj.id))
+        elif isinstance(obj, RoomType):
+            events.add(("room_type", obj.id))
+    for obj in session.deleted:
+        if isinstance(obj, Reservation):
+            events.add(("availability", obj.room_id))
+        elif isinstance(obj, User):
+            events.add(("user", obj.id))
+        elif isinstance(obj, Room):
+            events.add(("room", obj.id))
+        elif isinstance(obj, RoomType):
+            events.add(("room_type", obj.id))
+    return events
+
+
+def _before_flush(session: Session, flush_context, instances) -> None:
+    # borrar un usuario borra sus reservas por ON DELETE CASCADE (sin pasar por el ORM)
+    user_ids = [obj.id for obj in session.deleted if isinstance(obj, User)]
+    if user_ids:
+        stmt = select(Reservation.room_id).where(Reservation.user_id.in_(user_ids)).distinct()
+        session.info[_CASCADE_KEY] = list(session.connection().execute(stmt).scalars())
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    events = _collect(session)
+    events.update(("availability", rid) for rid in session.info.pop(_CASCADE_KEY, ()))
+    notify(session, events)
+
+
+def notify(session: Session, events: Iterable[Event]) -> None:
+    """Encola avisos en la transacción actual (para UPDATE masivos que el flush no ve)."""
+    events = set(events)
+    name = backend_name()
+    if not events or name == "off":
+        return
+    if name == "postgres":
+        stmt = select(func.pg_notify(settings.CACHE_BUS_CHANNEL, encode(events)))
+        session.connection().execute(stmt)
+    else:
+        session.info.setdefault(_PENDING_KEY, set()).update(events)
+
+
+def _after_commit(session: Session) -> None:
+    events = session.info.pop(_PENDING_KEY, None)
+    if events:
+        local_bus.publish(encode(events))
+
+
+def _after_soft_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_CASCADE_KEY, None)
+
+
+def install() -> None:
+    """Registra los listeners en todas las Session (también las de AsyncSession)."""
+    if backend_name() == "off" or event.contains(Session, "after_flush", _after_flush):
+        return
+    event.listen(Session, "before_flush", _before_flush)
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_soft_rollback", _after_soft_rollback)
+
+
+# ---------- escuchar ----------
+
+class LocalBus:
+    """Backend en proceso: los commits (de cualquier hilo) encolan en el loop del listener."""
+
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue[str] | None = None
+
+    def publish(self, payload: str) -> None:
+        loop, queue = self._loop, self._queue
+        if loop is None or queue is None:
+            return  # sin listener (workers, tests sin lifespan): nada que invalidar
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, payload)
+        except RuntimeError:
+            pass  # loop cerrado
+
+    async def listen(self, on_payload) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        try:
+            while True:
+                await on_payload(await self._queue.get())
+        finally:
+            self._loop = None
+            self._queue = None
+
+
+local_bus = LocalBus()
+
+
+class BusStats:
+    def __init__(self):
+        self.received = 0
+        self.resyncs = 0
+        self.reconnects = 0
+        self.connected = False
+
+    def snapshot(self) -> dict:
+        return {
+            "backend": backend_name(),
+            "connected": self.connected,
+            "received": self.received,
+            "resyncs": self.resyncs,
+            "reconnects": self.reconnects,
+        }
+
+
+stats = BusStats()
+
+
+async def _on_payload(payload: str) -> None:
+    stats.received += 1
+    try:
+        events = decode(payload)
+    except (ValueError, TypeError):
+        logger.warning("cache_bus: aviso inválido: %r", payload[:200])
+        events = None
+    if events is None:
+        stats.resyncs += 1
+    await apply(events)
+
+
+def _listen_dsn() -> str:
+    # psycopg directo (sin SQLAlchemy): la conexión queda fuera del pool
+    return make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+async def _listen_postgres() -> None:
+    import psycopg
+
+    first = True
+    delay = settings.CACHE_BUS_RECONNECT_SECONDS
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(_listen_dsn(), autocommit=True) as conn:
+                await conn.execute(f'LISTEN "{settings.CACHE_BUS_CHANNEL}"')
+                stats.connected = True
+                delay = settings.CACHE_BUS_RECONNECT_SECONDS
+                if not first:
+                    # pudimos perder avisos mientras no escuchábamos
+                    stats.reconnects += 1
+                    stats.resyncs += 1
+                    resync()
+                first = False
+                async for n in conn.notifies():
+                    await _on_payload(n.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("cache_bus: conexión LISTEN perdida; reintento en %.1fs", delay)
+        stats.connected = False
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 30.0)
+
+
+async def listener_loop() -> None:
+    """Tarea de fondo (lifespan): aplica los avisos de invalidación de todos los workers."""
+    name = backend_name()
+    if name == "postgres":
+        await _listen_postgres()
+    elif name == "local":
+        stats.connected = True
+        try:
+            await local_bus.listen(_on_payload)
+        finally:
+            stats.connected = False
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from bisect import bisect_right
+from dataclasses import dataclass
+from decimal import Decimal
+from time import monotonic
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.http_cache import etag_matches, quote_etag
+from app.core.pagination import NEXT_CURSOR_HEADER, PageParams, field_names, select_columns
+from app.core.responses import dumps, row_dicts
+from app.models.room import Room
+from app.models.room_type import RoomType
+from app.schemas.room import RoomOut
+from app.schemas.room_type import RoomTypeOut
+
+# Catálogo (habitaciones + tipos) en memoria, con número de versión.
+# Los handlers de rooms.py / room_types.py llaman bump() después de cada
+# commit; la siguiente lectura ve la versión nueva y recarga la foto completa
+# (son pocas filas). Cada foto trae el JSON ya serializado y su ETag, así que
+# GET /rooms y /room-types no tocan la BD y responden 304 si no cambió nada.
+# CATALOG_CACHE_TTL_SECONDS acota lo que puede durar una foto si el cambio
+# vino de fuera de este proceso (otro worker, scripts); 0 = sin caché.
+
+CACHE_CONTROL = "public, no-cache"
+
+
+@dataclass(frozen=True)
+class CatalogTable:
+    items: tuple[dict, ...]  # ordenado por id
+    ids: tuple[int, ...]
+    body: bytes              # JSON de todas las filas
+    digest: str
+
+    @classmethod
+    def build(cls, rows) -> "CatalogTable":
+        items = tuple(row_dicts(rows))
+        body = dumps(list(items))
+        return cls(
+            items=items,
+            ids=tuple(it["id"] for it in items),
+            body=body,
+            digest=hashlib.sha256(body).hexdigest()[:32],
+        )
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: int
+    loaded_at: float
+    rooms: CatalogTable
+    room_types: CatalogTable
+    room_type_of: dict[int, int]     # room_id -> room_type_id
+    price_of: dict[int, Decimal]     # room_type_id -> precio_noche
+
+    def room_price(self, room_id: int) -> tuple[bool, Decimal | None]:
+        """(habitación conocida, precio por noche de su tipo)."""
+        rt_id = self.room_type_of.get(room_id)
+        if rt_id is None:
+            return False, None
+        return True, self.price_of.get(rt_id)
+
+
+class CatalogCache:
+    def __init__(self, ttl_seconds: float):
+        self.ttl = ttl_seconds
+        self.version = 0
+        self._snapshot: CatalogSnapshot | None = None
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def _fresh(self, snap: CatalogSnapshot | None) -> bool:
+        return (
+            snap is not None
+            and snap.version == self.version
+            and self.ttl > 0
+            and monotonic() - snap.loaded_at < self.ttl
+        )
+
+    def current(self) -> CatalogSnapshot | None:
+        """Foto vigente sin tocar la BD (None si hay que recargar)."""
+        snap = self._snapshot
+        return snap if self._fresh(snap) else None
+
+    def _load(self, db: Session, version: int) -> CatalogSnapshot:
+        rooms = db.execute(select(*select_columns(Room, RoomOut, None)).order_by(Room.id.asc())).all()
+        room_types = db.execute(select(*select_columns(RoomType, RoomTypeOut, None)).order_by(RoomType.id.asc())).all()
+        self.loads += 1
+        return CatalogSnapshot(
+            version=version,
+            loaded_at=monotonic(),
+            rooms=CatalogTable.build(rooms),
+            room_types=CatalogTable.build(room_types),
+            room_type_of={r.id: r.room_type_id for r in rooms},
+            price_of={rt.id: Decimal(str(rt.precio_noche)) for rt in room_types},
+        )
+
+    def get(self, db: Session) -> CatalogSnapshot:
+        snap = self.current()
+        if snap is not None:
+            return snap
+        # la carga va fuera del lock: en modo async corre en el hilo del event
+        # loop (run_sync) y otra corrutina esperando el lock lo bloquearía
+        snap = self._load(db, self.version)
+        with self._lock:
+            current = self._snapshot
+            if current is None or current.version < snap.version or (
+                current.version == snap.version and current.loaded_at < snap.loaded_at
+            ):
+                self._snapshot = snap
+        return snap
+
+    def bump(self) -> int:
+        """Marca el catálogo como cambiado (llamar después del commit)."""
+        with self._lock:
+            self.version += 1
+            return self.version
+
+
+catalog_cache = CatalogCache(settings.CATALOG_CACHE_TTL_SECONDS)
+
+
+async def get_catalog_async(db: AsyncSession) -> CatalogSnapshot:
+    # con la foto vigente no hace falta pasar por run_sync
+    return catalog_cache.current() or await db.run_sync(catalog_cache.get)
+
+
+def _page(table: CatalogTable, page: PageParams) -> tuple[list[dict], int | None]:
+    i = bisect_right(table.ids, page.cursor) if page.cursor is not None else 0
+    if page.limit is None:
+        return list(table.items[i:]), None
+    items = list(table.items[i : i + page.limit])
+    more = i + page.limit < len(table.items)
+    return items, (items[-1]["id"] if more and items else None)
+
+
+def catalog_response(request: Request, table: CatalogTable, page: PageParams, schema) -> Response:
+    """Página del catálogo (misma semántica que paginate) servida desde memoria, con ETag."""
+    names = field_names(schema, page.fields)
+    whole = page.cursor is None and page.fields is None and (page.limit is None or len(table.items) <= page.limit)
+    if whole:
+        etag = quote_etag(table.digest)
+    else:
+        # la página depende solo de la foto y de los parámetros
+        key = f"{page.limit}:{page.cursor}:{','.join(names) if page.fields else ''}"
+        etag = quote_etag(f"{table.digest}-{hashlib.sha256(key.encode()).hexdigest()[:8]}")
+
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    items, next_cursor = (None, None) if whole else _page(table, page)
+    if next_cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = str(next_cursor)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    if whole:
+        return Response(table.body, media_type="application/json", headers=headers)
+    if page.fields is not None:
+        items = [{k: it[k] for k in names} for it in items]
+    return Response(dumps(items), media_type="application/json", headers=headers)
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.payment_outbox import PaymentOutbox
+from app.models.reservation import Reservation
+from app.services import paypal_service
+from app.services.availability_index import availability_index
+
+# Checkout async: el endpoint deja reserva pending + fila en payment_outbox
+# en la misma transacción; el worker (app/workers/paypal_outbox.py) crea la
+# orden en PayPal fuera del request y guarda paypal_order_id / approve_url.
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_create_order(db: Session, reservation: Reservation) -> PaymentOutbox:
+    """Agrega la fila del outbox (sin commit: va en la transacción de la reserva)."""
+    entry = PaymentOutbox(reservation_id=reservation.id, kind="create_order", status="pending")
+    db.add(entry)
+    return entry
+
+
+def claim_batch(db: Session, size: int, lease_seconds: float) -> list[int]:
+    """Toma hasta `size` filas disponibles y las reserva por `lease_seconds`.
+
+    SKIP LOCKED permite varios workers en paralelo sin pisarse (en SQLite se ignora).
+    """
+    now = datetime.utcnow()
+    stmt = (
+        select(PaymentOutbox.id)
+        .where(PaymentOutbox.status == "pending", PaymentOutbox.available_at <= now)
+        .order_by(PaymentOutbox.id.asc())
+        .limit(size)
+        .with_for_update(skip_locked=True)
+    )
+    ids = list(db.execute(stmt).scalars())
+    if ids:
+        db.execute(
+            update(PaymentOutbox)
+            .where(PaymentOutbox.id.in_(ids))
+            .values(available_at=now + timedelta(seconds=lease_seconds))
+        )
+    db.commit()
+    return ids
+
+
+def _fail(db: Session, entry: PaymentOutbox, res: Reservation | None, error: str) -> None:
+    entry.attempts += 1
+    entry.last_error = error[:2000]
+    if entry.attempts >= settings.OUTBOX_MAX_ATTEMPTS or res is None:
+        entry.status = "failed"
+        entry.processed_at = datetime.utcnow()
+        if res is not None and res.status == "pending":
+            # mismo criterio que el checkout sync: sin orden no se bloquea la habitación
+            res.status = "cancelled"
+    else:
+        entry.available_at = datetime.utcnow() + timedelta(seconds=settings.OUTBOX_RETRY_BACKOFF * (2 ** entry.attempts))
+    db.commit()
+    if res is not None and res.status == "cancelled":
+        availability_index.refresh_room(db, res.room_id)
+
+
+def process_entry(db: Session, entry_id: int) -> None:
+    entry = db.get(PaymentOutbox, entry_id)
+    if not entry or entry.status != "pending":
+        return
+    res = db.get(Reservation, entry.reservation_id)
+    if res is None or res.status != "pending":
+        # cancelada/borrada mientras esperaba: no se crea orden
+        entry.status = "done"
+        entry.last_error = "reserva no está pending"
+        entry.processed_at = datetime.utcnow()
+        db.commit()
+        return
+
+    try:
+        order = paypal_service.create_order(
+            amount=f"{float(res.costo_total):.2f}",
+            currency="USD",
+            reference_id=str(res.id),
+            request_id=f"reserva-{res.id}",
+        )
+    except Exception as e:
+        logger.warning("outbox %s: PayPal error: %s", entry_id, e)
+        _fail(db, entry, res, f"PayPal error: {e}")
+        return
+
+    order_id = order.get("id")
+    if not order_id:
+        _fail(db, entry, res, "PayPal no devolvió order id")
+        return
+
+    res.paypal_order_id = order_id
+    entry.approve_url = paypal_service.extract_approve_url(order)
+    entry.status = "done"
+    entry.processed_at = datetime.utcnow()
+    db.commit()
+
+
+def _process_in_session(entry_id: int) -> None:
+    db = SessionLocal()
+    try:
+        process_entry(db, entry_id)
+    except Exception:
+        logger.exception("outbox %s: error inesperado", entry_id)
+        db.rollback()
+    finally:
+        db.close()
+
+
+def drain_once(pool: ThreadPoolExecutor | None = None) -> int:
+    """Procesa un lote; devuelve cuántas filas tomó."""
+    db = SessionLocal()
+    try:
+        ids = claim_batch(db, settings.OUTBOX_BATCH_SIZE, settings.OUTBOX_LEASE_SECONDS)
+    finally:
+        db.close()
+    if pool is None:
+        for entry_id in ids:
+            _process_in_session(entry_id)
+    else:
+        list(pool.map(_process_in_session, ids))
+    return len(ids)
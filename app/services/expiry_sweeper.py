@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.reservation import Reservation
+from app.services import cache_bus
+from app.services.availability_index import availability_index
+from app.services.reservations_service import hold_expires_at
+
+# Cancela reservas pending vencidas (expires_at < ahora) por lotes:
+#   UPDATE reservations SET status='cancelled'
+#   WHERE id IN (SELECT id ... WHERE status='pending' AND expires_at < now
+#                ORDER BY expires_at LIMIT n FOR UPDATE SKIP LOCKED)
+#   RETURNING id, room_id
+# Un commit por lote: no bloquea la tabla y varios sweepers pueden convivir.
+# Las reservas en 'capturing' cuyo reclamo venció (el proceso murió mientras
+# PayPal capturaba) vuelven a pending con un vencimiento nuevo: el usuario
+# puede reintentar la captura (PayPal-Request-Id fijo, no cobra dos veces).
+
+logger = logging.getLogger(__name__)
+
+
+def sweep_batch(db: Session, batch_size: int, now: datetime | None = None) -> list[tuple[int, int]]:
+    now = now or datetime.utcnow()
+    victims = (
+        select(Reservation.id)
+        .where(
+            Reservation.status == "pending",
+            Reservation.expires_at.is_not(None),
+            Reservation.expires_at < now,
+        )
+        .order_by(Reservation.expires_at.asc())
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(Reservation)
+        .where(Reservation.id.in_(victims), Reservation.status == "pending")
+        .values(status="cancelled")
+        .returning(Reservation.id, Reservation.room_id)
+        .execution_options(synchronize_session=False)
+    )
+    rows = [(r.id, r.room_id) for r in db.execute(stmt).all()]
+    # UPDATE masivo: el flush no lo ve, se avisa a mano a los demás workers
+    cache_bus.notify(db, {("availability", room_id) for _, room_id in rows})
+    db.commit()
+    return rows
+
+
+def release_stale_captures(db: Session, now: datetime | None = None) -> int:
+    now = now or datetime.utcnow()
+    stmt = (
+        update(Reservation)
+        .where(Reservation.status == "capturing", Reservation.expires_at < now)
+        .values(status="pending", expires_at=hold_expires_at(True))
+        .execution_options(synchronize_session=False)
+    )
+    released = db.execute(stmt).rowcount
+    db.commit()
+    if released:
+        logger.warning("capturas sin terminar devueltas a pending: %s", released)
+    return released
+
+
+def sweep_expired_holds(db: Session, batch_size: int | None = None) -> int:
+    """Barre lotes hasta que no queden vencidas; devuelve cuántas canceló."""
+    batch_size = batch_size or settings.SWEEP_BATCH_SIZE
+    now = datetime.utcnow()
+    release_stale_captures(db, now)
+    total = 0
+    rooms: set[int] = set()
+    while True:
+        rows = sweep_batch(db, batch_size, now)
+        total += len(rows)
+        rooms.update(room_id for _, room_id in rows)
+        if len(rows) < batch_size:
+            break
+
+    for room_id in rooms:
+        availability_index.refresh_room(db, room_id)
+    if total:
+        logger.info("reservas pending vencidas canceladas: %s", total)
+    return total
+
+
+def run_sweep() -> int:
+    db = SessionLocal()
+    try:
+        return sweep_expired_holds(db)
+    finally:
+        db.close()
+
+
+async def sweeper_loop() -> None:
+    """Tarea de fondo (lifespan) si SWEEPER_IN_APP=true."""
+    while True:
+        try:
+            await asyncio.to_thread(run_sweep)
+        except Exception:
+            logger.exception("sweeper: error")
+        await asyncio.sleep(settings.SWEEP_INTERVAL_SECONDS)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+import numpy as np
+
+from app.services.analytics_service import OccupancyFrame
+
+# Mapa de ocupación habitaciones x días (int8):
+#   0 = libre, 1 = pending (o capturing), 2 = paid
+# Se pinta cada intervalo [inicio, fin) con un "difference array" por fila:
+# +1 en el offset de inicio, -1 en el de fin, y cumsum a lo largo de los días.
+# Los índices (habitación, día) se aplanan para usar bincount en vez de un
+# bucle por reserva.
+
+FREE, PENDING, PAID = 0, 1, 2
+
+
+def _paint(f: OccupancyFrame, mask: np.ndarray) -> np.ndarray:
+    """Matriz bool rooms x days: True donde alguna reserva de mask ocupa la noche."""
+    rooms, days = len(f.room_ids), f.days
+    width = days + 1
+    s = np.clip(f.res_start[mask], 0, days)
+    e = np.clip(f.res_end[mask], 0, days)
+    row = f.res_room[mask] * width
+    size = rooms * width
+    diff = np.bincount(row + s, minlength=size) - np.bincount(row + e, minlength=size)
+    return np.cumsum(diff.reshape(rooms, width), axis=1)[:, :days] > 0
+
+
+def occupancy_matrix(f: OccupancyFrame) -> np.ndarray:
+    active = np.ones(len(f.res_room), dtype=bool)
+    matrix = _paint(f, active).astype(np.int8)
+    matrix[_paint(f, f.res_paid)] = PAID
+    return matrix
+
+
+def utilization_by_type(f: OccupancyFrame, matrix: np.ndarray) -> dict[str, float]:
+    """% de noches ocupadas por tipo de habitación en el rango."""
+    tipos, codes = np.unique(f.room_tipo, return_inverse=True)
+    booked = np.bincount(codes, weights=(matrix > FREE).sum(axis=1), minlength=len(tipos))
+    available = np.bincount(codes, minlength=len(tipos)) * float(f.days)
+    pct = np.where(available > 0, booked * 100.0 / np.maximum(available, 1), 0.0)
+    return dict(zip(tipos.tolist(), np.round(pct, 2).tolist()))
+
+
+def heatmap_payload(f: OccupancyFrame) -> dict:
+    matrix = occupancy_matrix(f)
+    days = np.datetime64(f.start, "D") + np.arange(f.days)
+    occupied = (matrix > FREE).sum(axis=0)
+    rooms = len(f.room_ids)
+    # una cadena por habitación ("0012..."): mucho más compacto que listas JSON
+    raw = (matrix + ord("0")).astype(np.uint8).tobytes().decode("ascii")
+    return {
+        "start": f.start.isoformat(),
+        "end": (f.start + timedelta(days=f.days)).isoformat(),
+        "days": days.astype(str).tolist(),
+        "legend": {"0": "libre", "1": "pending", "2": "paid"},
+        "rooms": [
+            {"id": rid, "numero": numero, "piso": piso, "tipo": tipo}
+            for rid, numero, piso, tipo in zip(f.room_ids.tolist(), f.room_numero.tolist(), f.room_piso.tolist(), f.room_tipo.tolist())
+        ],
+        "matrix": [raw[i * f.days:(i + 1) * f.days] for i in range(rooms)],
+        "occupancy_by_day": np.round(occupied * 100.0 / max(rooms, 1), 2).tolist(),
+        "utilization_by_type": utilization_by_type(f, matrix),
+    }
@@ -1,34 +1,46 @@
 from __future__ import annotations
 
-import base64
+import asyncio
+import random
+import threading
+import time
+import uuid
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Any, Dict, Optional
 
 from app.core.config import settings
 
+# Cliente PayPal con:
+# - token OAuth cacheado hasta poco antes de expires_in (un solo refresh concurrente)
+# - conexiones keep-alive reutilizadas (requests.Session / httpx.AsyncClient)
+# - timeouts connect/read separados y un tope total por llamada
+#   (PAYPAL_TOTAL_TIMEOUT: token + intentos + esperas entre intentos)
+# - reintentos con backoff + jitter; los POST van con PayPal-Request-Id, así
+#   PayPal los trata como idempotentes y reintentar no duplica órdenes/capturas
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
 def _base_url() -> str:
+    if settings.PAYPAL_BASE_URL:
+        return settings.PAYPAL_BASE_URL.rstrip("/")
     return "https://api-m.sandbox.paypal.com" if settings.PAYPAL_MODE == "sandbox" else "https://api-m.paypal.com"
 
-def get_access_token() -> str:
-    url = f"{_base_url()}/v1/oauth2/token"
-    auth = base64.b64encode(f"{settings.PAYPAL_CLIENT_ID}:{settings.PAYPAL_CLIENT_SECRET}".encode()).decode()
-    headers = {
-        "Authorization": f"Basic {auth}",
-        "Content-Type": "application/x-www-form-urlencoded",
-    }
-    data = {"grant_type": "client_credentials"}
-    r = requests.post(url, headers=headers, data=data, timeout=30)
-    r.raise_for_status()
-    return r.json()["access_token"]
-
-def create_order(*, amount: str, currency: str = "USD", reference_id: str) -> Dict[str, Any]:
-    token = get_access_token()
-    url = f"{_base_url()}/v2/checkout/orders"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
-    payload = {
+
+def _backoff(attempt: int) -> float:
+    # exponencial con "full jitter"
+    return random.uniform(0, settings.PAYPAL_RETRY_BACKOFF * (2 ** attempt))
+
+
+def _give_up(attempt: int, delay: float, deadline: float) -> bool:
+    # sin más intentos, o sin presupuesto para esperar y volver a intentar
+    return attempt >= settings.PAYPAL_MAX_RETRIES or time.monotonic() + delay >= deadline
+
+
+def _order_payload(amount: str, currency: str, reference_id: str) -> Dict[str, Any]:
+    return {
         "intent": "CAPTURE",
         "purchase_units": [
             {
@@ -37,20 +49,272 @@ def create_order(*, amount: str, currency: str = "USD", reference_id: str) -> Di
             }
         ],
     }
-    r = requests.post(url, headers=headers, json=payload, timeout=30)
-    r.raise_for_status()
-    return r.json()
-
-def capture_order(order_id: str) -> Dict[str, Any]:
-    token = get_access_token()
-    url = f"{_base_url()}/v2/checkout/orders/{order_id}/capture"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
-    r = requests.post(url, headers=headers, json={}, timeout=30)
-    r.raise_for_status()
-    return r.json()
+
+
+class _TokenCache:
+    def __init__(self):
+        self.token: str | None = None
+        self.expires_at = 0.0
+
+    def valid(self) -> str | None:
+        if self.token and time.monotonic() < self.expires_at - settings.PAYPAL_TOKEN_REFRESH_MARGIN:
+            return self.token
+        return None
+
+    def store(self, data: Dict[str, Any]) -> str:
+        self.token = data["access_token"]
+        self.expires_at = time.monotonic() + float(data.get("expires_in", 0))
+        return self.token
+
+    def clear(self) -> None:
+        self.token = None
+        self.expires_at = 0.0
+
+
+class PayPalClient:
+    """Cliente sync (requests.Session con pool keep-alive)."""
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        client_id: str | None = None,
+        client_secret: str | None = None,
+        tokens: _TokenCache | None = None,
+    ):
+        self.base_url = base_url or _base_url()
+        self.client_id = client_id if client_id is not None else settings.PAYPAL_CLIENT_ID
+        self.client_secret = client_secret if client_secret is not None else settings.PAYPAL_CLIENT_SECRET
+        self.timeout = (settings.PAYPAL_CONNECT_TIMEOUT, settings.PAYPAL_READ_TIMEOUT)
+        self._tokens = tokens or _TokenCache()
+        self._token_lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.PAYPAL_POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _timeout(self, deadline: float | None) -> tuple[float, float]:
+        if deadline is None:
+            return self.timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise requests.Timeout("PayPal: se agotó PAYPAL_TOTAL_TIMEOUT")
+        return (min(self.timeout[0], remaining), min(self.timeout[1], remaining))
+
+    def get_access_token(self, deadline: float | None = None) -> str:
+        token = self._tokens.valid()
+        if token:
+            return token
+        wait = -1 if deadline is None else max(deadline - time.monotonic(), 0)
+        if not self._token_lock.acquire(timeout=wait):
+            raise requests.Timeout("PayPal: se agotó PAYPAL_TOTAL_TIMEOUT esperando el token")
+        try:
+            # otro hilo pudo refrescarlo mientras esperábamos el lock
+            token = self._tokens.valid()
+            if token:
+                return token
+            r = self.session.post(
+                f"{self.base_url}/v1/oauth2/token",
+                auth=(self.client_id, self.client_secret),
+                data={"grant_type": "client_credentials"},
+                timeout=self._timeout(deadline),
+            )
+            r.raise_for_status()
+            return self._tokens.store(r.json())
+        finally:
+            self._token_lock.release()
+
+    def _post(self, path: str, payload: Dict[str, Any], request_id: str) -> Dict[str, Any]:
+        deadline = time.monotonic() + settings.PAYPAL_TOTAL_TIMEOUT
+        attempt = 0
+        while True:
+            headers = {
+                "Authorization": f"Bearer {self.get_access_token(deadline)}",
+                "Content-Type": "application/json",
+                "PayPal-Request-Id": request_id,
+            }
+            delay = _backoff(attempt)
+            try:
+                r = self.session.post(
+                    f"{self.base_url}{path}", headers=headers, json=payload, timeout=self._timeout(deadline)
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                if _give_up(attempt, delay, deadline):
+                    raise
+            else:
+                if r.status_code == 401 and attempt == 0:
+                    self._tokens.clear()  # token revocado/expirado antes de tiempo
+                elif r.status_code not in RETRY_STATUS or _give_up(attempt, delay, deadline):
+                    r.raise_for_status()
+                    return r.json()
+            time.sleep(delay)
+            attempt += 1
+
+    def create_order(
+        self, *, amount: str, currency: str = "USD", reference_id: str, request_id: str | None = None
+    ) -> Dict[str, Any]:
+        return self._post(
+            "/v2/checkout/orders",
+            _order_payload(amount, currency, reference_id),
+            request_id or f"create-{reference_id}-{uuid.uuid4().hex}",
+        )
+
+    def capture_order(self, order_id: str, request_id: str | None = None) -> Dict[str, Any]:
+        return self._post(f"/v2/checkout/orders/{order_id}/capture", {}, request_id or f"capture-{order_id}")
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class AsyncPayPalClient:
+    """Cliente async (httpx.AsyncClient con pool keep-alive).
+
+    Mismos reintentos, PayPal-Request-Id y tope PAYPAL_TOTAL_TIMEOUT que
+    PayPalClient. Puede compartir su _TokenCache; el refresh concurrente lo
+    serializa un asyncio.Lock (uno por client, o sea por event loop).
+    """
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        client_id: str | None = None,
+        client_secret: str | None = None,
+        tokens: _TokenCache | None = None,
+    ):
+        self.base_url = base_url or _base_url()
+        self.client_id = client_id if client_id is not None else settings.PAYPAL_CLIENT_ID
+        self.client_secret = client_secret if client_secret is not None else settings.PAYPAL_CLIENT_SECRET
+        self._tokens = tokens or _TokenCache()
+        self._token_lock = asyncio.Lock()
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(settings.PAYPAL_READ_TIMEOUT, connect=settings.PAYPAL_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.PAYPAL_POOL_SIZE, max_keepalive_connections=settings.PAYPAL_POOL_SIZE
+            ),
+        )
+
+    def _timeout(self, deadline: float | None) -> httpx.Timeout:
+        read, connect = settings.PAYPAL_READ_TIMEOUT, settings.PAYPAL_CONNECT_TIMEOUT
+        if deadline is None:
+            return httpx.Timeout(read, connect=connect)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise httpx.TimeoutException("PayPal: se agotó PAYPAL_TOTAL_TIMEOUT")
+        return httpx.Timeout(min(read, remaining), connect=min(connect, remaining))
+
+    async def get_access_token(self, deadline: float | None = None) -> str:
+        token = self._tokens.valid()
+        if token:
+            return token
+        wait = None if deadline is None else max(deadline - time.monotonic(), 0)
+        try:
+            await asyncio.wait_for(self._token_lock.acquire(), wait)
+        except asyncio.TimeoutError:
+            raise httpx.TimeoutException("PayPal: se agotó PAYPAL_TOTAL_TIMEOUT esperando el token") from None
+        try:
+            # otra corrutina pudo refrescarlo mientras esperábamos el lock
+            token = self._tokens.valid()
+            if token:
+                return token
+            r = await self.client.post(
+                "/v1/oauth2/token",
+                auth=(self.client_id, self.client_secret),
+                data={"grant_type": "client_credentials"},
+                timeout=self._timeout(deadline),
+            )
+            r.raise_for_status()
+            return self._tokens.store(r.json())
+        finally:
+            self._token_lock.release()
+
+    async def _post(self, path: str, payload: Dict[str, Any], request_id: str) -> Dict[str, Any]:
+        deadline = time.monotonic() + settings.PAYPAL_TOTAL_TIMEOUT
+        attempt = 0
+        while True:
+            headers = {
+                "Authorization": f"Bearer {await self.get_access_token(deadline)}",
+                "PayPal-Request-Id": request_id,
+            }
+            delay = _backoff(attempt)
+            try:
+                r = await self.client.post(path, headers=headers, json=payload, timeout=self._timeout(deadline))
+            except (httpx.ConnectError, httpx.TimeoutException):
+                if _give_up(attempt, delay, deadline):
+                    raise
+            else:
+                if r.status_code == 401 and attempt == 0:
+                    self._tokens.clear()  # token revocado/expirado antes de tiempo
+                elif r.status_code not in RETRY_STATUS or _give_up(attempt, delay, deadline):
+                    r.raise_for_status()
+                    return r.json()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def create_order(
+        self, *, amount: str, currency: str = "USD", reference_id: str, request_id: str | None = None
+    ) -> Dict[str, Any]:
+        return await self._post(
+            "/v2/checkout/orders",
+            _order_payload(amount, currency, reference_id),
+            request_id or f"create-{reference_id}-{uuid.uuid4().hex}",
+        )
+
+    async def capture_order(self, order_id: str, request_id: str | None = None) -> Dict[str, Any]:
+        return await self._post(f"/v2/checkout/orders/{order_id}/capture", {}, request_id or f"capture-{order_id}")
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+# cliente por proceso (mantiene token y conexiones entre requests)
+paypal_client = PayPalClient()
+
+
+def new_async_client() -> AsyncPayPalClient:
+    """AsyncPayPalClient con el mismo token que paypal_client (uno por event loop)."""
+    return AsyncPayPalClient(tokens=paypal_client._tokens)
+
+
+# cliente async del proceso (routers con DB_ASYNC): se crea en el primer uso
+# dentro del event loop de la app y lo cierra el lifespan al apagar
+_async_client: AsyncPayPalClient | None = None
+_async_loop: asyncio.AbstractEventLoop | None = None
+
+
+def async_client() -> AsyncPayPalClient:
+    global _async_client, _async_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_loop is not loop:
+        # otro event loop (la app se levantó de nuevo en el mismo proceso): su pool no sirve aquí
+        _async_client, _async_loop = new_async_client(), loop
+    return _async_client
+
+
+async def close_async_client() -> None:
+    global _async_client, _async_loop
+    client, _async_client, _async_loop = _async_client, None, None
+    if client is not None:
+        await client.aclose()
+
+
+def get_access_token() -> str:
+    return paypal_client.get_access_token()
+
+def create_order(*, amount: str, currency: str = "USD", reference_id: str, request_id: str | None = None) -> Dict[str, Any]:
+    return paypal_client.create_order(amount=amount, currency=currency, reference_id=reference_id, request_id=request_id)
+
+def capture_order(order_id: str, request_id: str | None = None) -> Dict[str, Any]:
+    return paypal_client.capture_order(order_id, request_id=request_id)
+
+async def create_order_async(
+    *, amount: str, currency: str = "USD", reference_id: str, request_id: str | None = None
+) -> Dict[str, Any]:
+    return await async_client().create_order(
+        amount=amount, currency=currency, reference_id=reference_id, request_id=request_id
+    )
+
+async def capture_order_async(order_id: str, request_id: str | None = None) -> Dict[str, Any]:
+    return await async_client().capture_order(order_id, request_id=request_id)
 
 def extract_approve_url(order_json: Dict[str, Any]) -> Optional[str]:
     for link in order_json.get("links", []):
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.reservation import Reservation
+from app.models.room import Room
+from app.models.room_type import RoomType
+from app.models.user import User
+from app.services.pdf_generator import RESERVATION_TEMPLATE_VERSION, reservation_pdf_bytes
+from app.services.pdf_render import pdf_renderer
+from app.storage import storage
+
+# Caché de comprobantes PDF direccionada por contenido:
+#   clave = sha256(datos que salen en el PDF + versión de plantilla)
+#   archivo = cache/pdf/<clave>.pdf en el storage (el backend lo reparte en subdirectorios)
+# Si nada cambió la clave es la misma y se sirve el archivo ya renderizado;
+# cualquier cambio (estado, fechas, huésped...) produce otra clave.
+# Las claves viejas (y las de reservas borradas, con datos del huésped) no
+# se reutilizan: prune borra las renderizadas hace más de PDF_CACHE_MAX_AGE_DAYS;
+# si se vuelven a pedir, se regeneran.
+
+CACHE_DIR = "cache/pdf"
+HOTEL_NAME = "Hotel Ventura"
+
+
+class _KeyLocks:
+    """Un lock por clave (se libera cuando nadie lo usa)."""
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks: dict[str, list] = {}  # clave -> [lock, usuarios]
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[None]:
+        with self._guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._locks.pop(key, None)
+
+
+_render_locks = _KeyLocks()
+
+
+def reservation_pdf_fields(r: Reservation, guest: User | None, room: Room | None, rtype: RoomType | None) -> dict[str, Any]:
+    """kwargs de generate_reservation_pdf a partir de la reserva y sus relaciones."""
+    return {
+        "hotel_name": HOTEL_NAME,
+        "reservation_id": r.id,
+        "guest_fullname": f"{guest.nombre} {guest.apellido}" if guest else "N/A",
+        "guest_email": guest.email if guest else "N/A",
+        "room_numero": room.numero if room else "N/A",
+        "room_tipo": rtype.tipo if rtype else "N/A",
+        "fecha_inicio": str(r.fecha_inicio),
+        "fecha_fin": str(r.fecha_fin),
+        "costo_total": str(r.costo_total),
+        "status": r.status,
+    }
+
+
+def load_reservation_fields(db: Session, r: Reservation) -> dict[str, Any]:
+    guest = db.get(User, r.user_id)
+    room = db.get(Room, r.room_id)
+    rtype = db.get(RoomType, room.room_type_id) if room else None
+    return reservation_pdf_fields(r, guest, room, rtype)
+
+
+async def load_reservation_fields_async(db: AsyncSession, r: Reservation) -> dict[str, Any]:
+    guest = await db.get(User, r.user_id)
+    room = await db.get(Room, r.room_id)
+    rtype = await db.get(RoomType, room.room_type_id) if room else None
+    return reservation_pdf_fields(r, guest, room, rtype)
+
+
+def render_key(fields: dict[str, Any]) -> str:
+    payload = json.dumps({"v": RESERVATION_TEMPLATE_VERSION, **fields}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cached_rel_path(key: str) -> str:
+    return f"{CACHE_DIR}/{key}.pdf"
+
+
+def get_or_render(fields: dict[str, Any], key: str | None = None) -> str:
+    """Clave en el storage del PDF para fields; lo renderiza solo si no está en caché.
+
+    El lock por clave evita dos renders iguales en el mismo proceso; entre
+    procesos, la escritura atómica del storage deja siempre un archivo completo.
+    """
+    key = key or render_key(fields)
+    rel = cached_rel_path(key)
+    if storage.exists(rel):
+        return rel
+    with _render_locks.hold(key):
+        if storage.exists(rel):  # otro hilo lo generó mientras esperábamos
+            return rel
+        storage.put(rel, pdf_renderer.render(reservation_pdf_bytes, **fields))
+    return rel
+
+
+# renders en curso del router async (clave -> tarea), uno por clave
+_inflight: dict[str, asyncio.Task] = {}
+
+
+async def _render_and_store(fields: dict[str, Any], rel: str) -> None:
+    data = await pdf_renderer.render_async(reservation_pdf_bytes, **fields)
+    await storage.put_async(rel, data)
+
+
+async def get_or_render_async(fields: dict[str, Any], key: str | None = None) -> str:
+    """get_or_render para handlers async: espera el render del pool sin bloquear un hilo.
+
+    Corrutinas que piden la misma clave esperan la misma tarea.
+    """
+    key = key or render_key(fields)
+    rel = cached_rel_path(key)
+    if await storage.exists_async(rel):
+        return rel
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_render_and_store(fields, rel))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # shield: si este request se cancela, el render sigue para los demás
+    await asyncio.shield(task)
+    return rel
+
+
+def prerender_background(fields: dict[str, Any]) -> str:
+    """Encola el render para que la primera descarga ya sea un acierto de caché.
+
+    No espera ni falla: si la cola está llena se omite y el PDF se genera al
+    descargarlo. Devuelve la ruta relativa que tendrá el archivo.
+    """
+    key = render_key(fields)
+    rel = cached_rel_path(key)
+    if not storage.exists(rel):
+        pdf_renderer.render_background(reservation_pdf_bytes, on_done=lambda data: storage.put(rel, data), **fields)
+    return rel
+
+
+def prune(now: datetime | None = None, max_age_days: int | None = None) -> int:
+    """Borra de cache/pdf los PDF renderizados hace más de max_age_days; devuelve cuántos."""
+    days = settings.PDF_CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    if days <= 0:
+        return 0
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=days)
+    old = [key for key, mtime in storage.scan(CACHE_DIR) if mtime < cutoff]
+    for key in old:
+        storage.delete(key)
+    return len(old)
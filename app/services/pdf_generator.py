@@ -1,69 +1,160 @@
 from __future__ import annotations
 
+from io import BytesIO
 from pathlib import Path
 from datetime import datetime
+from typing import Any, BinaryIO, Iterable
 
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowable, ListItem, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowable, ListItem, Table, TableStyle, PageBreak
 from reportlab.lib import colors
 
+# subir al cambiar el diseño del comprobante: invalida los PDFs cacheados (pdf_cache.py)
+RESERVATION_TEMPLATE_VERSION = 1
+# idem para la bienvenida (static_docs.py la pre-renderiza al arrancar). Se renderiza
+# determinista (invariant + esta fecha en vez de la hora actual): todos los workers y
+# reinicios producen los mismos bytes, así el ETag y los Range sirven entre procesos.
+WELCOME_TEMPLATE_VERSION = 1
+WELCOME_TEMPLATE_DATE = "2025-01-01"
 
-def _build_doc(path: Path):
-    path.parent.mkdir(parents=True, exist_ok=True)
+# ---------- estilos compartidos ----------
+# Se construyen una vez por proceso (antes: getSampleStyleSheet + ParagraphStyle
+# + TableStyle en cada render). No se modifican después: los flowables solo los leen.
+
+_SAMPLE = getSampleStyleSheet()
+H1 = ParagraphStyle("h1", parent=_SAMPLE["Heading1"], spaceAfter=12)
+H2 = ParagraphStyle("h2", parent=_SAMPLE["Heading2"], spaceBefore=10, spaceAfter=8)
+BODY = _SAMPLE["BodyText"]
+SMALL = ParagraphStyle("small", parent=BODY, fontSize=9, textColor=colors.grey)
+
+RECEIPT_TABLE_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (0, -1), colors.whitesmoke),
+        ("BOX", (0, 0), (-1, -1), 0.6, colors.grey),
+        ("INNERGRID", (0, 0), (-1, -1), 0.3, colors.lightgrey),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
+        ("FONTSIZE", (0, 0), (-1, -1), 10),
+        ("PADDING", (0, 0), (-1, -1), 6),
+    ]
+)
+RECEIPT_COL_WIDTHS = (110, 360)
+RECEIPT_LABELS = ("Reserva #", "Huésped", "Email", "Habitación", "Fechas", "Total", "Estado")
+
+WELCOME_RULES = (
+    "Check-in desde 14:00 y check-out hasta 12:00 (ajusta horarios según tu hotel).",
+    "Presentar documento de identidad al ingresar.",
+    "Prohibido fumar en habitaciones y áreas internas.",
+    "Evitar ruidos fuertes entre 22:00 y 08:00.",
+    "Cuidar instalaciones; daños intencionales podrán ser cobrados.",
+    "No se permite el ingreso de personas no registradas sin autorización de recepción.",
+    "Política de mascotas: (define aquí si tu hotel permite o no).",
+)
+
+# Puedes inspirarte en el formato “¡Gracias por su Reserva!” del PDF de ejemplo (estructura por secciones),
+# cambiando el contenido a tu hotel.
+RECEIPT_RULES = (
+    "Check-in/Check-out según política del hotel.",
+    "Presentar identificación al ingreso.",
+    "Política de mascotas: define si aplica (en el ejemplo se especifica que no se permiten).",
+)
+
+
+def _build_doc(target: Path | BinaryIO, invariant: bool = False):
+    if isinstance(target, Path):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target = str(target)
     return SimpleDocTemplate(
-        str(path),
+        target,
         pagesize=A4,
         leftMargin=40,
         rightMargin=40,
         topMargin=40,
         bottomMargin=40,
         title="Hotel Ventura",
+        # invariant: CreationDate fija e ID del documento derivado del contenido
+        invariant=1 if invariant else 0,
     )
 
 
-def generate_welcome_pdf(out_path: Path, hotel_name: str = "Hotel Ventura") -> Path:
+def _bullets(items: Iterable[str]) -> ListFlowable:
+    return ListFlowable(
+        [ListItem(Paragraph(text, BODY), leftIndent=14) for text in items],
+        bulletType="bullet",
+        leftIndent=18,
+    )
+
+
+def _generated_at() -> str:
+    return f"Documento generado: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC"
+
+
+def generate_welcome_pdf(out_path: Path | BinaryIO, hotel_name: str = "Hotel Ventura") -> Path | BinaryIO:
     """
     PDF estático: Bienvenida + reglas generales (ajustables).
     """
-    styles = getSampleStyleSheet()
-    h1 = ParagraphStyle("h1", parent=styles["Heading1"], spaceAfter=12)
-    h2 = ParagraphStyle("h2", parent=styles["Heading2"], spaceBefore=10, spaceAfter=8)
-    body = styles["BodyText"]
-
-    rules = [
-        "Check-in desde 14:00 y check-out hasta 12:00 (ajusta horarios según tu hotel).",
-        "Presentar documento de identidad al ingresar.",
-        "Prohibido fumar en habitaciones y áreas internas.",
-        "Evitar ruidos fuertes entre 22:00 y 08:00.",
-        "Cuidar instalaciones; daños intencionales podrán ser cobrados.",
-        "No se permite el ingreso de personas no registradas sin autorización de recepción.",
-        "Política de mascotas: (define aquí si tu hotel permite o no).",
-    ]
-
-    doc = _build_doc(out_path)
+    doc = _build_doc(out_path, invariant=True)
     story = [
-        Paragraph(f"¡Bienvenido a {hotel_name}!", h1),
-        Paragraph("Gracias por elegirnos. A continuación encontrarás reglas generales y recomendaciones para tu estadía.", body),
+        Paragraph(f"¡Bienvenido a {hotel_name}!", H1),
+        Paragraph("Gracias por elegirnos. A continuación encontrarás reglas generales y recomendaciones para tu estadía.", BODY),
         Spacer(1, 10),
-        Paragraph("Reglas y recomendaciones", h2),
-        ListFlowable(
-            [ListItem(Paragraph(r, body), leftIndent=14) for r in rules],
-            bulletType="bullet",
-            leftIndent=18,
-        ),
+        Paragraph("Reglas y recomendaciones", H2),
+        _bullets(WELCOME_RULES),
         Spacer(1, 12),
-        Paragraph(
-            f"Documento generado: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC",
-            ParagraphStyle("small", parent=body, fontSize=9, textColor=colors.grey),
-        ),
+        Paragraph(f"Vigente desde {WELCOME_TEMPLATE_DATE} (versión {WELCOME_TEMPLATE_VERSION})", SMALL),
     ]
     doc.build(story)
     return out_path
 
 
+def welcome_pdf_bytes(hotel_name: str = "Hotel Ventura") -> bytes:
+    buf = BytesIO()
+    generate_welcome_pdf(buf, hotel_name=hotel_name)
+    return buf.getvalue()
+
+
+def _receipt_story(
+    generated_at: str,
+    *,
+    hotel_name: str,
+    reservation_id: int,
+    guest_fullname: str,
+    guest_email: str,
+    room_numero: str,
+    room_tipo: str,
+    fecha_inicio: str,
+    fecha_fin: str,
+    costo_total: str,
+    status: str,
+) -> list:
+    # plantilla fija: solo cambian los valores de la segunda columna
+    values = (
+        str(reservation_id),
+        guest_fullname,
+        guest_email,
+        f"{room_numero} ({room_tipo})",
+        f"{fecha_inicio} → {fecha_fin}",
+        f"${costo_total}",
+        status,
+    )
+    tbl = Table(list(zip(RECEIPT_LABELS, values)), colWidths=RECEIPT_COL_WIDTHS)
+    tbl.setStyle(RECEIPT_TABLE_STYLE)
+    return [
+        Paragraph(f"{hotel_name} — Confirmación de Reserva", H1),
+        Paragraph("¡Gracias por su reserva! Este documento sirve como comprobante informativo.", BODY),
+        Spacer(1, 10),
+        tbl,
+        Spacer(1, 14),
+        Paragraph("Reglas rápidas", H2),
+        _bullets(RECEIPT_RULES),
+        Spacer(1, 12),
+        Paragraph(generated_at, SMALL),
+    ]
+
+
 def generate_reservation_pdf(
-    out_path: Path,
+    out_path: Path | BinaryIO,
     *,
     hotel_name: str,
     reservation_id: int,
@@ -75,65 +166,56 @@ def generate_reservation_pdf(
     fecha_fin: str,
     costo_total: str,
     status: str,
-) -> Path:
+) -> Path | BinaryIO:
     """
     PDF de reserva: comprobante + resumen + reglas (puedes reusar el texto estilo “Gracias por su reserva”).
     """
-    styles = getSampleStyleSheet()
-    h1 = ParagraphStyle("h1", parent=styles["Heading1"], spaceAfter=12)
-    h2 = ParagraphStyle("h2", parent=styles["Heading2"], spaceBefore=10, spaceAfter=8)
-    body = styles["BodyText"]
-
     doc = _build_doc(out_path)
-
-    table_data = [
-        ["Reserva #", str(reservation_id)],
-        ["Huésped", guest_fullname],
-        ["Email", guest_email],
-        ["Habitación", f"{room_numero} ({room_tipo})"],
-        ["Fechas", f"{fecha_inicio} → {fecha_fin}"],
-        ["Total", f"${costo_total}"],
-        ["Estado", status],
-    ]
-
-    tbl = Table(table_data, colWidths=[110, 360])
-    tbl.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (0, -1), colors.whitesmoke),
-                ("BOX", (0, 0), (-1, -1), 0.6, colors.grey),
-                ("INNERGRID", (0, 0), (-1, -1), 0.3, colors.lightgrey),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
-                ("FONTSIZE", (0, 0), (-1, -1), 10),
-                ("PADDING", (0, 0), (-1, -1), 6),
-            ]
+    doc.build(
+        _receipt_story(
+            _generated_at(),
+            hotel_name=hotel_name,
+            reservation_id=reservation_id,
+            guest_fullname=guest_fullname,
+            guest_email=guest_email,
+            room_numero=room_numero,
+            room_tipo=room_tipo,
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            costo_total=costo_total,
+            status=status,
         )
     )
-
-    # Puedes inspirarte en el formato “¡Gracias por su Reserva!” del PDF de ejemplo (estructura por secciones),
-    # cambiando el contenido a tu hotel. :contentReference[oaicite:2]{index=2}
-    story = [
-        Paragraph(f"{hotel_name} — Confirmación de Reserva", h1),
-        Paragraph("¡Gracias por su reserva! Este documento sirve como comprobante informativo.", body),
-        Spacer(1, 10),
-        tbl,
-        Spacer(1, 14),
-        Paragraph("Reglas rápidas", h2),
-        ListFlowable(
-            [
-                ListItem(Paragraph("Check-in/Check-out según política del hotel.", body), leftIndent=14),
-                ListItem(Paragraph("Presentar identificación al ingreso.", body), leftIndent=14),
-                ListItem(Paragraph("Política de mascotas: define si aplica (en el ejemplo se especifica que no se permiten).", body), leftIndent=14),
-            ],
-            bulletType="bullet",
-            leftIndent=18,
-        ),
-        Spacer(1, 12),
-        Paragraph(
-            f"Documento generado: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC",
-            ParagraphStyle("small", parent=body, fontSize=9, textColor=colors.grey),
-        ),
-    ]
-    doc.build(story)
     return out_path
+
+
+def reservation_pdf_bytes(**fields) -> bytes:
+    buf = BytesIO()
+    generate_reservation_pdf(buf, **fields)
+    return buf.getvalue()
+
+
+def generate_reservation_pdfs(reservations: Iterable[dict[str, Any]], merged: bool = False) -> list[bytes]:
+    """
+    Comprobantes en lote (cada dict = kwargs de generate_reservation_pdf).
+    merged=False: un PDF por reserva. merged=True: un solo PDF, una reserva por página.
+    """
+    generated_at = _generated_at()
+    if not merged:
+        out = []
+        for fields in reservations:
+            buf = BytesIO()
+            _build_doc(buf).build(_receipt_story(generated_at, **fields))
+            out.append(buf.getvalue())
+        return out
+
+    story: list = []
+    for fields in reservations:
+        if story:
+            story.append(PageBreak())
+        story.extend(_receipt_story(generated_at, **fields))
+    if not story:
+        return []
+    buf = BytesIO()
+    _build_doc(buf).build(story)
+    return [buf.getvalue()]
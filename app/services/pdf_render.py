@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from time import perf_counter
+from typing import Any, Callable
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services.pdf_workers import timed, warmup
+
+# Render de PDFs (ReportLab, CPU puro) fuera del worker de uvicorn:
+# - ProcessPoolExecutor acotado (PDF_RENDER_WORKERS) con estilos/fuentes precargados
+# - como mucho PDF_RENDER_MAX_QUEUE trabajos en vuelo; si se llena, 503 (o se
+#   descarta el trabajo en segundo plano) en vez de encolar sin límite
+# - métricas por proceso en /metrics/pdf-render
+# Con PDF_RENDER_WORKERS=0 se renderiza en el hilo que llama (como antes).
+
+logger = logging.getLogger(__name__)
+
+
+class PdfRenderMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0           # cola llena
+        self.in_flight = 0          # encolados + renderizando
+        self.render_total_s = 0.0   # tiempo de ReportLab en el hijo
+        self.render_max_s = 0.0
+        self.wait_total_s = 0.0     # tiempo en cola + IPC
+
+    def incr(self, name: str, delta: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + delta)
+
+    def record(self, render_s: float, total_s: float) -> None:
+        with self._lock:
+            self.completed += 1
+            self.render_total_s += render_s
+            self.render_max_s = max(self.render_max_s, render_s)
+            self.wait_total_s += max(total_s - render_s, 0.0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            done = self.completed or 1
+            return {
+                "workers": settings.PDF_RENDER_WORKERS,
+                "max_queue": settings.PDF_RENDER_MAX_QUEUE,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "queue_depth": self.in_flight,
+                "render_avg_ms": round(self.render_total_s * 1000 / done, 3),
+                "render_max_ms": round(self.render_max_s * 1000, 3),
+                "wait_avg_ms": round(self.wait_total_s * 1000 / done, 3),
+            }
+
+
+class PdfRenderService:
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.metrics = PdfRenderMetrics()
+        self._executor: ProcessPoolExecutor | None = None
+        self._slots = threading.BoundedSemaphore(max(max_queue, 1))
+
+    def start(self) -> None:
+        if self.workers > 0 and self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=warmup,
+            )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _submit(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Future | None:
+        """Encola el trabajo; None si la cola está llena."""
+        if not self._slots.acquire(blocking=False):
+            self.metrics.incr("rejected")
+            return None
+        self.metrics.incr("submitted")
+        self.metrics.incr("in_flight")
+        t0 = perf_counter()
+
+        def _done(fut: Future) -> None:
+            self._slots.release()
+            self.metrics.incr("in_flight", -1)
+            if fut.cancelled() or fut.exception() is not None:
+                self.metrics.incr("failed")
+            else:
+                self.metrics.record(fut.result()[1], perf_counter() - t0)
+
+        if self._executor is None:
+            fut: Future = Future()
+            try:
+                fut.set_result(timed(fn, args, kwargs))
+            except Exception as e:
+                fut.set_exception(e)
+        else:
+            fut = self._executor.submit(timed, fn, args, kwargs)
+        fut.add_done_callback(_done)
+        return fut
+
+    def _submit_or_503(self, fn, args, kwargs) -> Future:
+        fut = self._submit(fn, args, kwargs)
+        if fut is None:
+            raise HTTPException(
+                status_code=503,
+                detail="Generador de PDF ocupado, intenta nuevamente",
+                headers={"Retry-After": "2"},
+            )
+        return fut
+
+    def render(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Renderiza y espera el resultado (503 si la cola está llena)."""
+        return self._submit_or_503(fn, args, kwargs).result()[0]
+
+    async def render_async(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Como render, pero espera sin ocupar un hilo del threadpool."""
+        if self._executor is None:
+            # sin pool se renderiza en el hilo que llama: que no sea el del event loop
+            return await asyncio.to_thread(self.render, fn, *args, **kwargs)
+        fut = self._submit_or_503(fn, args, kwargs)
+        return (await asyncio.wrap_future(fut))[0]
+
+    def render_background(self, fn: Callable[..., Any], *args, on_done: Callable[[Any], None], **kwargs) -> bool:
+        """Fire-and-forget: on_done(resultado) corre al terminar. False si se descartó por cola llena."""
+        fut = self._submit(fn, args, kwargs)
+        if fut is None:
+            return False
+
+        def _callback(f: Future) -> None:
+            if f.cancelled():
+                return
+            if f.exception() is not None:
+                logger.error("render PDF en segundo plano falló", exc_info=f.exception())
+                return
+            try:
+                on_done(f.result()[0])
+            except Exception:
+                logger.exception("render PDF en segundo plano: error al guardar")
+
+        fut.add_done_callback(_callback)
+        return True
+
+
+pdf_renderer = PdfRenderService(settings.PDF_RENDER_WORKERS, settings.PDF_RENDER_MAX_QUEUE)
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from time import perf_counter
+from typing import Any, Callable
+
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+# Funciones que corren dentro del ProcessPoolExecutor de PDFs (spawn).
+# Como password_workers.py, no importa config ni BD: solo ReportLab y
+# pdf_generator, así los procesos hijos arrancan rápido.
+
+
+def warmup() -> None:
+    # primera carga de hojas de estilo y métricas de fuentes: que no la pague el primer render
+    getSampleStyleSheet()
+    for font in ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Times-Roman"):
+        stringWidth("Hotel Ventura", font, 10)
+    from app.services import pdf_generator  # noqa: F401
+
+
+def timed(fn: Callable[..., Any], args: tuple, kwargs: dict) -> tuple[Any, float]:
+    """Ejecuta fn y devuelve (resultado, segundos de render en el hijo)."""
+    t0 = perf_counter()
+    result = fn(*args, **kwargs)
+    return result, perf_counter() - t0
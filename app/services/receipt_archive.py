@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import logging
+import mimetypes
+import zipfile
+from collections import defaultdict
+from datetime import date, datetime
+
+from fastapi import Response
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from app.models.reservation import Reservation
+from app.storage import storage
+
+# Archivo mensual de comprobantes .txt (payments_paypal.capture_order escribe
+# uno por reserva pagada en reservas/YYYY/MM/reserva_{id}.txt).
+# Cada mes cerrado se empaqueta en un zip (deflate, con directorio central):
+#   archives/reservas/YYYY/MM.zip
+# y reporte_path pasa a apuntar al miembro: "archives/reservas/2025/01.zip#reserva_15.txt".
+# Para leer uno se abre el zip con seek (en S3, GETs con Range) y se lee solo
+# ese miembro; no se extrae nada. Si llegan comprobantes tardíos de un mes ya
+# archivado, la siguiente pasada los agrega al zip existente.
+# Los PDF de cache/pdf no se archivan ni van en reporte_path: son una caché
+# regenerable (su clave sale del contenido).
+# Antes /reservations/{id}/report escribía reservations/reserva_{id}.pdf y
+# pisaba reporte_path con esa ruta: restore_receipt_paths lo devuelve al
+# comprobante y purge_legacy_pdfs borra esos PDF (se regeneran al pedirlos).
+
+RECEIPTS_DIR = "reservas"
+LEGACY_PDF_DIR = "reservations"
+ARCHIVE_DIR = "archives/reservas"
+MEMBER_SEP = "#"
+
+logger = logging.getLogger(__name__)
+
+
+def receipt_key(reservation_id: int, created_at: datetime) -> str:
+    """Clave del comprobante .txt suelto (antes de archivar)."""
+    return f"{RECEIPTS_DIR}/{created_at.year}/{created_at.month:02d}/reserva_{reservation_id}.txt"
+
+
+def archive_key(year: int, month: int) -> str:
+    return f"{ARCHIVE_DIR}/{year}/{month:02d}.zip"
+
+
+def split_ref(path: str) -> tuple[str, str | None]:
+    """reporte_path -> (clave en el storage, miembro del zip o None)."""
+    key, sep, member = path.partition(MEMBER_SEP)
+    return key, (member if sep else None)
+
+
+def read_stored(path: str) -> bytes:
+    """Contenido de reporte_path, esté suelto o dentro de un zip mensual."""
+    key, member = split_ref(path)
+    if member is None:
+        return storage.get(key)
+    f = storage.open_random(key)
+    try:
+        with zipfile.ZipFile(f) as zf:
+            try:
+                return zf.read(member)
+            except KeyError:
+                raise FileNotFoundError(path)
+    finally:
+        f.close()
+
+
+def receipt_response(path: str, data: bytes) -> Response:
+    key, member = split_ref(path)
+    filename = (member or key).rsplit("/", 1)[-1]
+    return Response(
+        data,
+        media_type=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "private, no-cache"},
+    )
+
+
+def _month_of(path: str) -> tuple[int, int] | None:
+    # reservas/YYYY/MM/reserva_{id}.txt
+    parts = path.split("/")
+    if len(parts) != 4 or parts[0] != RECEIPTS_DIR:
+        return None
+    try:
+        return int(parts[1]), int(parts[2])
+    except ValueError:
+        return None
+
+
+def _archive_members(key: str) -> set[str]:
+    if not storage.exists(key):
+        return set()
+    f = storage.open_random(key)
+    try:
+        with zipfile.ZipFile(f) as zf:
+            return set(zf.namelist())
+    finally:
+        f.close()
+
+
+def restore_receipt_paths(db: Session) -> int:
+    """reporte_path = reservations/reserva_{id}.pdf -> comprobante suelto, miembro del zip o None."""
+    rows = db.execute(
+        select(Reservation.id, Reservation.reporte_path, Reservation.created_at).where(
+            Reservation.reporte_path.like(f"{LEGACY_PDF_DIR}/reserva_%.pdf")
+        )
+    ).all()
+    if not rows:
+        return 0
+    members: dict[str, set[str]] = {}
+    fixed: list[dict] = []
+    for rid, old, created_at in rows:
+        loose = receipt_key(rid, created_at)
+        key = archive_key(created_at.year, created_at.month)
+        if key not in members:
+            members[key] = _archive_members(key)
+        member = loose.rsplit("/", 1)[-1]
+        if storage.exists(loose):
+            new = loose
+        elif member in members[key]:
+            new = f"{key}{MEMBER_SEP}{member}"
+        else:
+            new = None  # nunca tuvo comprobante (reserva sin pagar)
+        fixed.append({"rid": rid, "old": old, "new": new})
+    table = Reservation.__table__
+    db.execute(
+        update(table)
+        .where(table.c.id == bindparam("rid"), table.c.reporte_path == bindparam("old"))
+        .values(reporte_path=bindparam("new")),
+        fixed,
+    )
+    db.commit()
+    return len(fixed)
+
+
+def purge_legacy_pdfs() -> int:
+    """Borra los reservations/reserva_{id}.pdf sueltos (después de restore_receipt_paths)."""
+    deleted = 0
+    for key, _ in list(storage.scan(LEGACY_PDF_DIR)):
+        name = key.rsplit("/", 1)[-1]
+        if name.startswith("reserva_") and name.endswith(".pdf"):
+            storage.delete(key)
+            deleted += 1
+    return deleted
+
+
+def pending_months(db: Session, today: date | None = None) -> dict[tuple[int, int], list[tuple[int, str]]]:
+    """Comprobantes sueltos de meses cerrados: (año, mes) -> [(reservation_id, path)]."""
+    today = today or date.today()
+    current = (today.year, today.month)
+    stmt = select(Reservation.id, Reservation.reporte_path).where(
+        Reservation.reporte_path.like(f"{RECEIPTS_DIR}/%")
+    )
+    out: dict[tuple[int, int], list[tuple[int, str]]] = defaultdict(list)
+    for rid, path in db.execute(stmt):
+        month = _month_of(path)
+        if month is not None and month < current:
+            out[month].append((rid, path))
+    return dict(sorted(out.items()))
+
+
+def _write_archive(key: str, files: dict[str, bytes]) -> None:
+    """Escribe el zip con files + los miembros que ya tuviera (escritura atómica del storage)."""
+    previous: dict[str, bytes] = {}
+    if storage.exists(key):
+        f = storage.open_random(key)
+        try:
+            with zipfile.ZipFile(f) as zf:
+                previous = {name: zf.read(name) for name in zf.namelist() if name not in files}
+        finally:
+            f.close()
+    with storage.writer(key) as out, zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+        for name, data in sorted({**previous, **files}.items()):
+            zf.writestr(name, data)
+
+
+def archive_month(db: Session, year: int, month: int, receipts: list[tuple[int, str]]) -> int:
+    """Empaqueta los comprobantes del mes; devuelve cuántos quedaron archivados."""
+    key = archive_key(year, month)
+    files: dict[str, bytes] = {}
+    moved: list[dict] = []
+    for rid, path in receipts:
+        try:
+            data = storage.get(path)
+        except FileNotFoundError:
+            logger.warning("comprobante no encontrado, se omite: %s", path)
+            continue
+        member = path.rsplit("/", 1)[-1]
+        files[member] = data
+        moved.append({"rid": rid, "old": path, "new": f"{key}{MEMBER_SEP}{member}"})
+    if not moved:
+        return 0
+
+    # 1) zip completo en el storage, 2) reporte_path apunta al zip, 3) se borran los sueltos.
+    # Si algo falla antes del commit, los sueltos siguen siendo la copia válida.
+    _write_archive(key, files)
+    table = Reservation.__table__
+    db.execute(
+        update(table)
+        .where(table.c.id == bindparam("rid"), table.c.reporte_path == bindparam("old"))
+        .values(reporte_path=bindparam("new")),
+        moved,
+    )
+    db.commit()
+    for m in moved:
+        storage.delete(m["old"])
+    return len(moved)
+
+
+def archive_closed_months(db: Session, today: date | None = None) -> int:
+    restored = restore_receipt_paths(db)
+    if restored:
+        logger.info("reporte_path restaurado en %s reservas (apuntaba a %s/)", restored, LEGACY_PDF_DIR)
+    purged = purge_legacy_pdfs()
+    if purged:
+        logger.info("PDF sueltos de %s/ borrados: %s", LEGACY_PDF_DIR, purged)
+    total = 0
+    for (year, month), receipts in pending_months(db, today).items():
+        n = archive_month(db, year, month, receipts)
+        logger.info("comprobantes %04d-%02d: %s archivados en %s", year, month, n, archive_key(year, month))
+        total += n
+    return total
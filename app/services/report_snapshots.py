@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import AsyncIterator, Iterable, Literal
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, event, inspect, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.http_cache import etag_matches, quote_etag, serve_stored
+from app.models.report_snapshot import ReportSnapshot
+from app.models.reservation import Reservation
+from app.models.user import User
+from app.services.reports_service import iter_csv, iter_csv_async, range_for_daily, range_for_month, range_for_week
+from app.storage import storage
+
+# Reportes CSV de períodos cerrados (end <= hoy UTC): se generan una vez y
+# se sirven desde el storage con ETag = sha256 del contenido.
+#   report_snapshots: una fila por período (daily_2025-01-01, monthly_2025_01...)
+#   archivo: reports/closed/<período>_<sha[:16]>.csv (inmutable; cada contenido es otro objeto)
+# El CSV no se arma en memoria: iter_csv va directo al storage bajo una clave
+# temporal (reports/closed/tmp/) mientras se calcula el sha256, y al terminar
+# se renombra a la clave por contenido.
+# Invalidación (en el mismo flush, como revenue_rollup): si cambia una reserva
+# paid (o deja / pasa a serlo), version += 1 en los períodos que contienen su
+# created_at. El archivo solo vale si built_version == version; si la reserva
+# cambia mientras se genera, la escritura no se marca como vigente.
+# Renombrar habitaciones o tipos no invalida: el reporte guarda lo que había al cerrarse
+# (POST /reports/prebuild?force=true para regenerarlo).
+
+SNAPSHOT_DIR = "reports/closed"
+STAGING_DIR = f"{SNAPSHOT_DIR}/tmp"
+_REPORT_ATTRS = ("status", "costo_total", "room_id", "fecha_inicio", "fecha_fin", "created_at", "user_id")
+_PENDING_KEY = "report_snapshots_days"
+
+PeriodKind = Literal["daily", "weekly", "monthly"]
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Period:
+    kind: PeriodKind
+    start: date
+    end: date
+    name: str
+
+    @property
+    def filename(self) -> str:
+        return f"{self.name}.csv"
+
+    @property
+    def rel(self) -> str:
+        # clave de ?persist=true (períodos abiertos)
+        return f"reports/{self.filename}"
+
+
+@dataclass(frozen=True)
+class StoredReport:
+    path: str
+    sha256: str
+    size: int
+
+    @property
+    def etag(self) -> str:
+        return quote_etag(self.sha256)
+
+
+def daily_period(day: date) -> Period:
+    s, e = range_for_daily(day)
+    return Period("daily", s, e, f"daily_{s.isoformat()}")
+
+
+def weekly_period(start: date) -> Period:
+    s, e = range_for_week(start)
+    return Period("weekly", s, e, f"weekly_{s.isoformat()}_{e.isoformat()}")
+
+
+def monthly_period(year: int, month: int) -> Period:
+    s, e = range_for_month(year, month)
+    return Period("monthly", s, e, f"monthly_{year}_{month:02d}")
+
+
+def today_utc() -> date:
+    # created_at se guarda en UTC
+    return datetime.now(timezone.utc).date()
+
+
+def is_closed(period: Period, today: date | None = None) -> bool:
+    return settings.REPORT_SNAPSHOTS and period.end <= (today or today_utc())
+
+
+def closed_periods(kind: PeriodKind, start: date, end: date) -> list[Period]:
+    """Períodos cerrados de kind que empiezan en [start, end) (semanas: de 7 en 7 desde start)."""
+    if end <= start:
+        raise ValueError("end debe ser posterior a start")
+    out: list[Period] = []
+    day = start
+    while day < end:
+        if len(out) == settings.REPORT_PREBUILD_MAX_PERIODS:
+            raise ValueError(f"Máximo {settings.REPORT_PREBUILD_MAX_PERIODS} períodos por pedido")
+        if kind == "monthly":
+            period = monthly_period(day.year, day.month)
+            day = period.end
+        else:
+            period = daily_period(day) if kind == "daily" else weekly_period(day)
+            day += timedelta(days=1 if kind == "daily" else 7)
+        out.append(period)
+    today = today_utc()
+    return [p for p in out if is_closed(p, today)]
+
+
+# ---------- generar / servir ----------
+
+def _stored(row: ReportSnapshot | None) -> StoredReport | None:
+    if row is None or row.path is None or row.built_version != row.version:
+        return None
+    return StoredReport(row.path, row.sha256, row.size)
+
+
+def _snapshot_path(period: Period, sha: str) -> str:
+    return f"{SNAPSHOT_DIR}/{period.name}_{sha[:16]}.csv"
+
+
+def _new_row(period: Period) -> ReportSnapshot:
+    return ReportSnapshot(name=period.name, kind=period.kind, start_date=period.start, end_date=period.end, version=0)
+
+
+def _mark_built_stmt(period: Period, version: int, stored: StoredReport):
+    return (
+        update(ReportSnapshot)
+        .where(ReportSnapshot.name == period.name, ReportSnapshot.version == version)
+        .values(
+            built_version=version,
+            path=stored.path,
+            sha256=stored.sha256,
+            size=stored.size,
+            built_at=datetime.now(timezone.utc),
+        )
+    )
+
+
+def _claim(db: Session, period: Period) -> tuple[int, str | None]:
+    """(version, path anterior) del período, creando la fila si falta.
+
+    Se lee antes de generar el CSV: un cambio confirmado después sube version
+    y la escritura de este build deja de valer.
+    """
+    if db.get(ReportSnapshot, period.name) is None:
+        db.add(_new_row(period))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # otro worker la creó a la vez
+    row = db.get(ReportSnapshot, period.name)
+    claimed = (row.version, row.path)
+    db.commit()
+    return claimed
+
+
+def _staging_path(period: Period) -> str:
+    return f"{STAGING_DIR}/{period.name}_{uuid.uuid4().hex}.csv"
+
+
+def _publish(period: Period, tmp: str, sha: str, size: int) -> StoredReport:
+    stored = StoredReport(_snapshot_path(period, sha), sha, size)
+    if storage.exists(stored.path):
+        storage.delete(tmp)  # mismo contenido ya guardado
+    else:
+        storage.rename(tmp, stored.path)
+    return stored
+
+
+def _write(period: Period, chunks: Iterable[bytes]) -> StoredReport:
+    """Guarda chunks a medida que llegan; si el stream falla, no queda archivo."""
+    tmp = _staging_path(period)
+    sha, size = hashlib.sha256(), 0
+    for chunk in storage.tee(chunks, tmp):
+        sha.update(chunk)
+        size += len(chunk)
+    return _publish(period, tmp, sha.hexdigest(), size)
+
+
+async def _write_async(period: Period, chunks: AsyncIterator[bytes]) -> StoredReport:
+    tmp = _staging_path(period)
+    sha, size = hashlib.sha256(), 0
+    async for chunk in storage.tee_async(chunks, tmp):
+        sha.update(chunk)
+        size += len(chunk)
+    return await run_in_threadpool(_publish, period, tmp, sha.hexdigest(), size)
+
+
+def _finish(db: Session, period: Period, version: int, old_path: str | None, stored: StoredReport) -> StoredReport:
+    marked = db.execute(_mark_built_stmt(period, version, stored)).rowcount == 1
+    db.commit()
+    if not marked:
+        logger.info("reporte %s cambió mientras se generaba; se regenerará en el próximo pedido", period.name)
+    elif old_path and old_path != stored.path:
+        storage.delete(old_path)
+    return stored
+
+
+def get_or_build(db: Session, period: Period, force: bool = False) -> StoredReport:
+    """Reporte guardado del período cerrado; lo genera si falta o quedó invalidado."""
+    if not force:
+        stored = _stored(db.get(ReportSnapshot, period.name))
+        if stored is not None and storage.exists(stored.path):
+            return stored
+    version, old_path = _claim(db, period)
+    stored = _write(period, iter_csv(db, period.start, period.end))
+    return _finish(db, period, version, old_path, stored)
+
+
+async def _claim_async(db: AsyncSession, period: Period) -> tuple[int, str | None]:
+    if await db.get(ReportSnapshot, period.name) is None:
+        db.add(_new_row(period))
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+    row = await db.get(ReportSnapshot, period.name)
+    claimed = (row.version, row.path)
+    await db.commit()
+    return claimed
+
+
+async def get_or_build_async(db: AsyncSession, period: Period, force: bool = False) -> StoredReport:
+    if not force:
+        stored = _stored(await db.get(ReportSnapshot, period.name))
+        if stored is not None and await storage.exists_async(stored.path):
+            return stored
+    version, old_path = await _claim_async(db, period)
+    stored = await _write_async(period, iter_csv_async(db, period.start, period.end))
+    marked = (await db.execute(_mark_built_stmt(period, version, stored))).rowcount == 1
+    await db.commit()
+    if not marked:
+        logger.info("reporte %s cambió mientras se generaba; se regenerará en el próximo pedido", period.name)
+    elif old_path and old_path != stored.path:
+        await run_in_threadpool(storage.delete, old_path)
+    return stored
+
+
+def snapshot_response(request: Request, period: Period, stored: StoredReport) -> Response:
+    """304 si el cliente ya tiene esta versión; si no, el archivo (o redirección s3).
+
+    Bloquea (storage): en handlers async llamar con run_in_threadpool.
+    """
+    headers = {"ETag": stored.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, stored.etag):
+        return Response(status_code=304, headers=headers)
+    return serve_stored(storage, stored.path, media_type="text/csv", filename=period.filename, headers=headers)
+
+
+def prebuild(periods: list[Period], force: bool = False) -> int:
+    """Genera los reportes que falten (o todos con force); tarea de fondo de POST /reports/prebuild."""
+    built = 0
+    db = SessionLocal()
+    try:
+        for period in periods:
+            try:
+                get_or_build(db, period, force=force)
+                built += 1
+            except Exception:
+                db.rollback()
+                logger.exception("no se pudo generar el reporte %s", period.name)
+    finally:
+        db.close()
+    logger.info("reportes cerrados listos: %s de %s", built, len(periods))
+    return built
+
+
+# ---------- invalidación (listeners de Session) ----------
+
+def _day(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _history_values(obj: Reservation, attr: str) -> list:
+    hist = inspect(obj).attrs[attr].history
+    return [v for v in (*hist.added, *hist.unchanged, *hist.deleted) if v is not None]
+
+
+def _dirty_days(obj: Reservation) -> set[date]:
+    # solo importan las que son o eran paid y cambiaron algo que sale en el reporte
+    state = inspect(obj)
+    if "paid" not in _history_values(obj, "status"):
+        return set()
+    if not any(state.attrs[a].history.has_changes() for a in _REPORT_ATTRS):
+        return set()
+    return {_day(v) for v in _history_values(obj, "created_at")}
+
+
+def _before_flush(session: Session, flush_context, instances) -> None:
+    # borradas (también por ON DELETE CASCADE al borrar un usuario): se mira antes de que desaparezcan
+    days = {_day(obj.created_at) for obj in session.deleted if isinstance(obj, Reservation) and obj.status == "paid"}
+    user_ids = [obj.id for obj in session.deleted if isinstance(obj, User)]
+    if user_ids:
+        stmt = select(Reservation.created_at).where(Reservation.user_id.in_(user_ids), Reservation.status == "paid")
+        days.update(_day(v) for v in session.connection().execute(stmt).scalars())
+    if days:
+        session.info[_PENDING_KEY] = days
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    days: set[date] = session.info.pop(_PENDING_KEY, set())
+    for obj in session.new:
+        if isinstance(obj, Reservation) and obj.status == "paid":
+            days.add(_day(obj.created_at))
+    for obj in session.dirty:
+        if isinstance(obj, Reservation):
+            days.update(_dirty_days(obj))
+    invalidate_days(session, days)
+
+
+def invalidate_days(session: Session, days: set[date]) -> None:
+    """version += 1 en los reportes guardados cuyo período contiene alguno de days."""
+    if not days:
+        return
+    periods = [and_(ReportSnapshot.start_date <= d, ReportSnapshot.end_date > d) for d in sorted(days)]
+    stmt = update(ReportSnapshot).where(or_(*periods)).values(version=ReportSnapshot.version + 1)
+    session.connection().execute(stmt)
+
+
+def install() -> None:
+    """Registra los listeners en todas las Session (también las de AsyncSession)."""
+    if not event.contains(Session, "before_flush", _before_flush):
+        event.listen(Session, "before_flush", _before_flush)
+        event.listen(Session, "after_flush", _after_flush)
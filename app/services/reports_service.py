@@ -3,13 +3,24 @@ from __future__ import annotations
 import csv
 import io
 from datetime import date, timedelta
+from typing import AsyncIterator, Iterator
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 
+from app.core.config import settings
+from app.core.database import SessionLocal, AsyncSessionLocal
+from app.models.daily_revenue_rollup import DailyRevenueRollup
 from app.models.reservation import Reservation
 from app.models.room import Room
 from app.models.room_type import RoomType
 
+# Reportes CSV en streaming:
+# - totales y conteo por tipo salen de daily_revenue_rollup (SUM/GROUP BY)
+# - el detalle se lee con yield_per (cursor del lado del servidor en Postgres)
+#   y se emite en bloques de REPORT_YIELD_PER filas
+# Así un export anual no vive entero en memoria (ni filas, ni StringIO, ni bytes).
+
 def range_for_daily(day: date) -> tuple[date, date]:
     return day, day + timedelta(days=1)
 
@@ -24,9 +35,16 @@ def range_for_month(year: int, month: int) -> tuple[date, date]:
         end = date(year, month + 1, 1)
     return start, end
 
-def build_csv(db: Session, start: date, end: date) -> bytes:
+def _paid_in_range(start: date, end: date):
+    return (
+        Reservation.status == "paid",
+        Reservation.created_at >= start,
+        Reservation.created_at < end,
+    )
+
+def _paid_rows_stmt(start: date, end: date):
     # Trae reservas paid dentro del rango
-    stmt = (
+    return (
         select(
             Reservation.id,
             Reservation.fecha_inicio,
@@ -38,37 +56,101 @@ def build_csv(db: Session, start: date, end: date) -> bytes:
         )
         .join(Room, Room.id == Reservation.room_id)
         .join(RoomType, RoomType.id == Room.room_type_id)
-        .where(
-            Reservation.status == "paid",
-            Reservation.created_at >= start,
-            Reservation.created_at < end,
-        )
+        .where(*_paid_in_range(start, end))
         .order_by(Reservation.created_at.asc())
     )
-    rows = db.execute(stmt).all()
 
-    # Totales
-    total_ingresos = sum(float(r.costo_total) for r in rows) if rows else 0.0
-    total_reservas = len(rows)
+# totales desde daily_revenue_rollup: un mes son como mucho 31 días x tipos
+def _rollup_in_range(start: date, end: date):
+    return (DailyRevenueRollup.day >= start, DailyRevenueRollup.day < end)
 
-    by_tipo = {}
-    for r in rows:
-        by_tipo[r.tipo] = by_tipo.get(r.tipo, 0) + 1
+def _totals_stmt(start: date, end: date):
+    return select(
+        func.coalesce(func.sum(DailyRevenueRollup.count), 0),
+        func.coalesce(func.sum(DailyRevenueRollup.revenue), 0),
+    ).where(*_rollup_in_range(start, end))
+
+def _by_tipo_stmt(start: date, end: date):
+    cantidad = func.sum(DailyRevenueRollup.count)
+    return (
+        select(RoomType.tipo, cantidad)
+        .join(RoomType, RoomType.id == DailyRevenueRollup.room_type_id)
+        .where(*_rollup_in_range(start, end))
+        .group_by(RoomType.tipo)
+        .having(cantidad > 0)
+        .order_by(RoomType.tipo.asc())
+    )
+
+class _CsvChunks:
+    """csv.writer sobre un buffer que se vacía en cada flush()."""
+
+    def __init__(self):
+        self._buf = io.StringIO()
+        self.writer = csv.writer(self._buf)
 
-    out = io.StringIO()
-    w = csv.writer(out)
+    def flush(self) -> bytes:
+        data = self._buf.getvalue().encode("utf-8")
+        self._buf.seek(0)
+        self._buf.truncate()
+        return data
+
+def _header_chunk(start: date, end: date, totals, by_tipo) -> bytes:
+    total_reservas, total_ingresos = totals
+    out = _CsvChunks()
+    w = out.writer
     w.writerow(["reporte_desde", start.isoformat(), "reporte_hasta", end.isoformat()])
     w.writerow(["total_reservas", total_reservas])
-    w.writerow(["total_ingresos", f"{total_ingresos:.2f}"])
+    w.writerow(["total_ingresos", f"{float(total_ingresos):.2f}"])
     w.writerow([])
     w.writerow(["reservas_por_tipo"])
     w.writerow(["tipo", "cantidad"])
-    for k, v in sorted(by_tipo.items()):
-        w.writerow([k, v])
+    for tipo, cantidad in by_tipo:
+        w.writerow([tipo, cantidad])
     w.writerow([])
     w.writerow(["detalle_reservas"])
     w.writerow(["reservation_id", "user_id", "room_numero", "tipo", "fecha_inicio", "fecha_fin", "costo_total"])
+    return out.flush()
+
+def _detail_chunk(out: _CsvChunks, rows) -> bytes:
     for r in rows:
-        w.writerow([r.id, r.user_id, r.numero, r.tipo, r.fecha_inicio.isoformat(), r.fecha_fin.isoformat(), f"{float(r.costo_total):.2f}"])
+        out.writer.writerow(
+            [r.id, r.user_id, r.numero, r.tipo, r.fecha_inicio.isoformat(), r.fecha_fin.isoformat(), f"{float(r.costo_total):.2f}"]
+        )
+    return out.flush()
+
+def iter_csv(db: Session, start: date, end: date) -> Iterator[bytes]:
+    yield _header_chunk(start, end, db.execute(_totals_stmt(start, end)).one(), db.execute(_by_tipo_stmt(start, end)).all())
+    stmt = _paid_rows_stmt(start, end).execution_options(yield_per=settings.REPORT_YIELD_PER)
+    out = _CsvChunks()
+    for rows in db.execute(stmt).partitions():
+        yield _detail_chunk(out, rows)
+
+async def iter_csv_async(db: AsyncSession, start: date, end: date) -> AsyncIterator[bytes]:
+    totals = (await db.execute(_totals_stmt(start, end))).one()
+    by_tipo = (await db.execute(_by_tipo_stmt(start, end))).all()
+    yield _header_chunk(start, end, totals, by_tipo)
+    stmt = _paid_rows_stmt(start, end).execution_options(yield_per=settings.REPORT_YIELD_PER)
+    out = _CsvChunks()
+    result = await db.stream(stmt)
+    async for rows in result.partitions():
+        yield _detail_chunk(out, rows)
+
+def stream_csv(start: date, end: date) -> Iterator[bytes]:
+    """iter_csv con su propia sesión: el StreamingResponse se consume después
+    de que el endpoint (y su get_db) ya terminaron."""
+    db = SessionLocal()
+    try:
+        yield from iter_csv(db, start, end)
+    finally:
+        db.close()
+
+async def stream_csv_async(start: date, end: date) -> AsyncIterator[bytes]:
+    async with AsyncSessionLocal() as db:
+        async for chunk in iter_csv_async(db, start, end):
+            yield chunk
+
+def build_csv(db: Session, start: date, end: date) -> bytes:
+    return b"".join(iter_csv(db, start, end))
 
-    return out.getvalue().encode("utf-8")
+async def build_csv_async(db: AsyncSession, start: date, end: date) -> bytes:
+    return b"".join([chunk async for chunk in iter_csv_async(db, start, end)])
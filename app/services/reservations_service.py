@@ -1,12 +1,21 @@
 from __future__ import annotations
 
-from datetime import date
+from datetime import date, datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, update, literal, exists, func, DateTime, and_, or_
+from sqlalchemy.exc import IntegrityError
 
+from app.core.config import settings
 from app.models.reservation import Reservation
 from app.models.room import Room
 from app.models.room_type import RoomType
+from app.services import cache_bus
+from app.services.availability_index import ACTIVE_STATUSES, availability_index
+from app.services.catalog_cache import CatalogSnapshot, catalog_cache, get_catalog_async
+
+# SQLSTATE de exclusion_violation (ex_reservations_room_dates, ver migración 0003)
+EXCLUSION_VIOLATION = "23P01"
 
 
 def nights_between(start: date, end: date) -> int:
@@ -21,69 +30,247 @@ def assert_valid_dates(start: date, end: date) -> None:
         raise ValueError("fecha_fin debe ser mayor a fecha_inicio")
 
 
-def has_overlap(db: Session, room_id: int, start: date, end: date) -> bool:
-    # Solape si existe reserva pending/paid donde:
+def _overlap_stmt(room_id: int, start: date, end: date, exclude_id: int | None = None):
+    # Solape si existe reserva activa (pending/capturing/paid) donde:
     # existing_start < new_end AND existing_end > new_start
     stmt = (
         select(Reservation.id)
         .where(
             Reservation.room_id == room_id,
-            Reservation.status.in_(["pending", "paid"]),
+            Reservation.status.in_(ACTIVE_STATUSES),
             Reservation.fecha_inicio < end,
             Reservation.fecha_fin > start,
         )
         .limit(1)
     )
-    return db.execute(stmt).first() is not None
+    if exclude_id is not None:
+        stmt = stmt.where(Reservation.id != exclude_id)
+    return stmt
 
 
-def has_overlap_excluding(db: Session, *, reservation_id: int, room_id: int, start: date, end: date) -> bool:
-    """Igual que has_overlap, pero excluye la reserva actual (para updates)."""
+def blocked_stmt(dialect_name: str, start: date, end: date):
+    """Reservas pending/paid que solapan [start, end) (para /reservations/blocked)."""
     stmt = (
-        select(Reservation.id)
-        .where(
-            Reservation.id != reservation_id,
-            Reservation.room_id == room_id,
-            Reservation.status.in_(["pending", "paid"]),
-            Reservation.fecha_inicio < end,
-            Reservation.fecha_fin > start,
-        )
-        .limit(1)
+        select(Reservation.room_id, Reservation.fecha_inicio, Reservation.fecha_fin, Reservation.status)
+        .where(Reservation.status.in_(ACTIVE_STATUSES))
+        .order_by(Reservation.room_id.asc(), Reservation.fecha_inicio.asc())
     )
-    return db.execute(stmt).first() is not None
+    if dialect_name == "postgresql":
+        # misma condición expresada como daterange && daterange (usa ix_reservations_daterange)
+        return stmt.where(
+            func.daterange(Reservation.fecha_inicio, Reservation.fecha_fin).op("&&")(func.daterange(start, end))
+        )
+    return stmt.where(Reservation.fecha_inicio < end, Reservation.fecha_fin > start)
 
 
-def calculate_total(db: Session, room_id: int, start: date, end: date) -> float:
-    room = db.get(Room, room_id)
-    if not room:
-        raise ValueError("Habitación no existe")
-    rt = db.get(RoomType, room.room_type_id)
+def list_filters(
+    *,
+    user_id: int | None = None,
+    status: str | None = None,
+    room_id: int | None = None,
+    start: date | None = None,
+    end: date | None = None,
+) -> list:
+    """Filtros de los listados de reservas; start/end = estadías que tocan [start, end)."""
+    conds = []
+    if user_id is not None:
+        conds.append(Reservation.user_id == user_id)
+    if status is not None:
+        conds.append(Reservation.status == status)
+    if room_id is not None:
+        conds.append(Reservation.room_id == room_id)
+    if start is not None:
+        conds.append(Reservation.fecha_fin > start)
+    if end is not None:
+        conds.append(Reservation.fecha_inicio < end)
+    return conds
+
+
+def _free_in_index(db: Session, room_id: int, start: date, end: date) -> bool:
+    """True si availability_index dice que la habitación está libre y eso basta.
+
+    Solo se confía en el "libre" del índice con Postgres: si quedó viejo, el
+    constraint EXCLUDE rechaza el solape al hacer commit. "Ocupado" o rango
+    fuera del horizonte se confirman siempre con SQL (la reserva que se
+    actualiza también está pintada en el índice).
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    availability_index.ensure_current(db)
+    return availability_index.is_free(room_id, start, end) is True
+
+
+def has_overlap(db: Session, room_id: int, start: date, end: date) -> bool:
+    if _free_in_index(db, room_id, start, end):
+        return False
+    return db.execute(_overlap_stmt(room_id, start, end)).first() is not None
+
+
+def has_overlap_excluding(db: Session, *, reservation_id: int, room_id: int, start: date, end: date) -> bool:
+    """Igual que has_overlap, pero excluye la reserva actual (para updates)."""
+    if _free_in_index(db, room_id, start, end):
+        return False
+    return db.execute(_overlap_stmt(room_id, start, end, reservation_id)).first() is not None
+
+
+def _total_for(rt: RoomType | None, start: date, end: date) -> float:
     if not rt:
         raise ValueError("Tipo de habitación no existe")
+    return _total_from_price(rt.precio_noche, start, end)
 
+
+def _total_from_price(precio_noche, start: date, end: date) -> float:
     nights = nights_between(start, end)
     if nights <= 0:
         raise ValueError("Rango inválido")
-    return float(rt.precio_noche) * nights
+    return float(precio_noche) * nights
 
 
-def create_pending_reservation(db: Session, *, user_id: int, room_id: int, start: date, end: date) -> Reservation:
-    assert_valid_dates(start, end)
-    if has_overlap(db, room_id, start, end):
-        raise ValueError("La habitación ya está reservada en ese rango")
-    total = calculate_total(db, room_id, start, end)
-
-    res = Reservation(
-        user_id=user_id,
-        room_id=room_id,
-        fecha_inicio=start,
-        fecha_fin=end,
-        costo_total=total,
-        status="pending",
+def _cached_total(catalog: CatalogSnapshot, room_id: int, start: date, end: date) -> float | None:
+    """Total con el precio del catálogo en memoria; None si la habitación no está en la foto."""
+    known, price = catalog.room_price(room_id)
+    if not known:
+        return None  # puede ser más nueva que la foto: se consulta la BD
+    if price is None:
+        raise ValueError("Tipo de habitación no existe")
+    return _total_from_price(price, start, end)
+
+
+def calculate_total(db: Session, room_id: int, start: date, end: date) -> float:
+    total = _cached_total(catalog_cache.get(db), room_id, start, end)
+    if total is not None:
+        return total
+    room = db.get(Room, room_id)
+    if not room:
+        raise ValueError("Habitación no existe")
+    return _total_for(db.get(RoomType, room.room_type_id), start, end)
+
+
+def is_overlap_violation(exc: IntegrityError) -> bool:
+    return getattr(exc.orig, "sqlstate", None) == EXCLUSION_VIOLATION
+
+
+def hold_expires_at(expires: bool) -> datetime | None:
+    """Vencimiento de la reserva pending (None = no vence, p. ej. creada por admin)."""
+    if not expires or settings.PENDING_HOLD_TTL_MINUTES <= 0:
+        return None
+    return datetime.utcnow() + timedelta(minutes=settings.PENDING_HOLD_TTL_MINUTES)
+
+
+def _claim_stmt(reservation_id: int):
+    lease = timedelta(seconds=settings.PAYPAL_TOTAL_TIMEOUT + settings.CAPTURE_CLAIM_MARGIN_SECONDS)
+    return (
+        update(Reservation)
+        .where(Reservation.id == reservation_id, Reservation.status == "pending")
+        .values(status="capturing", expires_at=datetime.utcnow() + lease)
+        .execution_options(synchronize_session=False)
     )
-    db.add(res)
+
+
+def _release_stmt(reservation_id: int, expires_at: datetime | None):
+    return (
+        update(Reservation)
+        .where(Reservation.id == reservation_id, Reservation.status == "capturing")
+        .values(status="pending", expires_at=expires_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def claim_for_capture(db: Session, reservation_id: int) -> bool:
+    """pending -> capturing con un UPDATE condicional, y commit.
+
+    Mientras PayPal captura no queda transacción ni conexión tomada: el
+    sweeper solo cancela pending y una segunda captura concurrente no gana el
+    UPDATE. expires_at pasa a ser el vencimiento del reclamo (si el proceso
+    muere a mitad, expiry_sweeper.release_stale_captures la devuelve a pending).
+    """
+    claimed = db.execute(_claim_stmt(reservation_id)).rowcount == 1
     db.commit()
-    db.refresh(res)
+    return claimed
+
+
+def release_capture(db: Session, reservation_id: int, expires_at: datetime | None) -> None:
+    """Deshace claim_for_capture (la captura falló): vuelve a pending con su vencimiento."""
+    db.execute(_release_stmt(reservation_id, expires_at))
+    db.commit()
+
+
+def _insert_pending_stmt(*, user_id: int, room_id: int, start: date, end: date, expires_at: datetime | None):
+    overlap = exists().where(
+        Reservation.room_id == room_id,
+        Reservation.status.in_(ACTIVE_STATUSES),
+        Reservation.fecha_inicio < end,
+        Reservation.fecha_fin > start,
+    )
+    source = (
+        select(
+            literal(user_id),
+            Room.id,
+            literal(start),
+            literal(end),
+            RoomType.precio_noche * nights_between(start, end),
+            literal("pending"),
+            literal(expires_at, DateTime(timezone=True)),
+        )
+        .join(RoomType, RoomType.id == Room.room_type_id)
+        .where(Room.id == room_id, ~overlap)
+    )
+    return (
+        insert(Reservation)
+        .from_select(
+            ["user_id", "room_id", "fecha_inicio", "fecha_fin", "costo_total", "status", "expires_at"], source
+        )
+        .returning(Reservation)
+    )
+
+
+def create_pending_reservation(
+    db: Session,
+    *,
+    user_id: int,
+    room_id: int,
+    start: date,
+    end: date,
+    commit: bool = True,
+    expires: bool = True,
+) -> Reservation:
+    """Crea la reserva pending en un solo INSERT ... SELECT ... RETURNING.
+
+    El precio sale del JOIN rooms/room_types dentro del mismo statement y el
+    NOT EXISTS descarta solapes. En Postgres el constraint EXCLUDE es quien
+    garantiza que dos reservas concurrentes no puedan quedar solapadas.
+
+    commit=False deja la transacción abierta (p. ej. para agregar la fila del
+    outbox); quien llama hace commit (con él sale el aviso del cache_bus) y
+    refresca availability_index.
+    expires=False: la reserva no vence (PENDING_HOLD_TTL_MINUTES no aplica).
+    """
+    assert_valid_dates(start, end)
+    stmt = _insert_pending_stmt(
+        user_id=user_id, room_id=room_id, start=start, end=end, expires_at=hold_expires_at(expires)
+    )
+
+    try:
+        res = db.execute(stmt).scalar_one_or_none()
+        if res is not None:
+            # INSERT directo: el flush no lo ve, se avisa a mano a los demás workers
+            cache_bus.notify(db, {("availability", room_id)})
+        if commit:
+            db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if is_overlap_violation(e):
+            raise ValueError("La habitación ya está reservada en ese rango")
+        raise
+
+    if res is None:
+        # no insertó: o no existe la habitación o hay solape
+        if not db.get(Room, room_id):
+            raise ValueError("Habitación no existe")
+        raise ValueError("La habitación ya está reservada en ese rango")
+
+    if commit:
+        availability_index.refresh_room(db, room_id)
     return res
 
 
@@ -101,6 +288,7 @@ def update_reservation_admin(
 
     Recalcula costo_total si cambia el rango o la habitación.
     """
+    old_room_id = reservation.room_id
     new_user_id = reservation.user_id if user_id is None else user_id
     new_room_id = reservation.room_id if room_id is None else room_id
     new_start = reservation.fecha_inicio if start is None else start
@@ -112,7 +300,7 @@ def update_reservation_admin(
         assert_valid_dates(new_start, new_end)
 
         # Si queda en un estado que bloquea fechas, validamos solapes
-        if new_status in ["pending", "paid"]:
+        if new_status in ACTIVE_STATUSES:
             if has_overlap_excluding(db, reservation_id=reservation.id, room_id=new_room_id, start=new_start, end=new_end):
                 raise ValueError("La habitación ya está reservada en ese rango")
 
@@ -125,6 +313,142 @@ def update_reservation_admin(
     reservation.status = new_status
 
     db.add(reservation)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if is_overlap_violation(e):
+            raise ValueError("La habitación ya está reservada en ese rango")
+        raise
     db.refresh(reservation)
+
+    availability_index.refresh_room(db, new_room_id)
+    if old_room_id != new_room_id:
+        availability_index.refresh_room(db, old_room_id)
+    return reservation
+
+
+# ---------- variantes async (settings.DB_ASYNC) ----------
+# Misma lógica y mismos statements; el índice de disponibilidad sigue siendo
+# sync, así que se refresca con run_sync (usa la misma conexión async).
+
+async def has_overlap_async(db: AsyncSession, room_id: int, start: date, end: date) -> bool:
+    if await db.run_sync(_free_in_index, room_id, start, end):
+        return False
+    return (await db.execute(_overlap_stmt(room_id, start, end))).first() is not None
+
+
+async def has_overlap_excluding_async(
+    db: AsyncSession, *, reservation_id: int, room_id: int, start: date, end: date
+) -> bool:
+    if await db.run_sync(_free_in_index, room_id, start, end):
+        return False
+    return (await db.execute(_overlap_stmt(room_id, start, end, reservation_id))).first() is not None
+
+
+async def calculate_total_async(db: AsyncSession, room_id: int, start: date, end: date) -> float:
+    total = _cached_total(await get_catalog_async(db), room_id, start, end)
+    if total is not None:
+        return total
+    room = await db.get(Room, room_id)
+    if not room:
+        raise ValueError("Habitación no existe")
+    return _total_for(await db.get(RoomType, room.room_type_id), start, end)
+
+
+async def claim_for_capture_async(db: AsyncSession, reservation_id: int) -> bool:
+    claimed = (await db.execute(_claim_stmt(reservation_id))).rowcount == 1
+    await db.commit()
+    return claimed
+
+
+async def release_capture_async(db: AsyncSession, reservation_id: int, expires_at: datetime | None) -> None:
+    await db.execute(_release_stmt(reservation_id, expires_at))
+    await db.commit()
+
+
+async def create_pending_reservation_async(
+    db: AsyncSession,
+    *,
+    user_id: int,
+    room_id: int,
+    start: date,
+    end: date,
+    commit: bool = True,
+    expires: bool = True,
+) -> Reservation:
+    assert_valid_dates(start, end)
+    stmt = _insert_pending_stmt(
+        user_id=user_id, room_id=room_id, start=start, end=end, expires_at=hold_expires_at(expires)
+    )
+
+    try:
+        res = (await db.execute(stmt)).scalar_one_or_none()
+        if res is not None:
+            await db.run_sync(cache_bus.notify, {("availability", room_id)})
+        if commit:
+            await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if is_overlap_violation(e):
+            raise ValueError("La habitación ya está reservada en ese rango")
+        raise
+
+    if res is None:
+        if not await db.get(Room, room_id):
+            raise ValueError("Habitación no existe")
+        raise ValueError("La habitación ya está reservada en ese rango")
+
+    if commit:
+        await db.run_sync(availability_index.refresh_room, room_id)
+    return res
+
+
+async def update_reservation_admin_async(
+    db: AsyncSession,
+    reservation: Reservation,
+    *,
+    user_id: int | None = None,
+    room_id: int | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    status: str | None = None,
+) -> Reservation:
+    old_room_id = reservation.room_id
+    new_user_id = reservation.user_id if user_id is None else user_id
+    new_room_id = reservation.room_id if room_id is None else room_id
+    new_start = reservation.fecha_inicio if start is None else start
+    new_end = reservation.fecha_fin if end is None else end
+    new_status = reservation.status if status is None else status
+
+    if start is not None or end is not None or room_id is not None:
+        assert_valid_dates(new_start, new_end)
+
+        if new_status in ACTIVE_STATUSES:
+            if await has_overlap_excluding_async(
+                db, reservation_id=reservation.id, room_id=new_room_id, start=new_start, end=new_end
+            ):
+                raise ValueError("La habitación ya está reservada en ese rango")
+
+        reservation.costo_total = await calculate_total_async(db, new_room_id, new_start, new_end)
+
+    reservation.user_id = new_user_id
+    reservation.room_id = new_room_id
+    reservation.fecha_inicio = new_start
+    reservation.fecha_fin = new_end
+    reservation.status = new_status
+
+    db.add(reservation)
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if is_overlap_violation(e):
+            raise ValueError("La habitación ya está reservada en ese rango")
+        raise
+    await db.refresh(reservation)
+
+    await db.run_sync(availability_index.refresh_room, new_room_id)
+    if old_room_id != new_room_id:
+        await db.run_sync(availability_index.refresh_room, old_room_id)
     return reservation
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import event, select, delete, insert, func, inspect, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.daily_revenue_rollup import DailyRevenueRollup
+from app.models.reservation import Reservation
+from app.models.room import Room
+from app.models.user import User
+
+# Mantiene daily_revenue_rollup en la misma transacción que el cambio:
+#   before_flush: aporte "viejo" (lo que hay en BD) de las reservas que cambian
+#   after_flush:  aporte "nuevo" de esas mismas reservas (ya escritas)
+#   delta = nuevo - viejo, aplicado con upsert por (día, tipo)
+# Solo cuentan las paid. Cubre capture (pending -> paid), edición admin
+# (estado, habitación, costo), borrado de reservas, borrado de usuarios
+# (ON DELETE CASCADE) y cambio de tipo de una habitación.
+# Los UPDATE masivos (sweeper, outbox) solo tocan pending, así que no aplican.
+
+_ROLLUP_ATTRS = ("status", "costo_total", "room_id", "created_at")
+_PENDING_KEY = "revenue_rollup_old"
+
+Contribution = dict[tuple[date, int], list]  # (día, room_type_id) -> [count, revenue]
+
+
+def _day(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):  # sqlite: date() devuelve texto
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def _contributions(session: Session, criteria: list, lock: bool = False) -> Contribution:
+    out: Contribution = defaultdict(lambda: [0, Decimal("0")])
+    if not criteria:
+        return out
+    stmt = (
+        select(Reservation.created_at, Room.room_type_id, Reservation.costo_total, Reservation.status)
+        .join(Room, Room.id == Reservation.room_id)
+        .where(or_(*criteria))
+    )
+    if lock:
+        # aporte viejo: FOR UPDATE sobre todas las filas (no solo paid), así otra
+        # transacción que cambie la misma reserva espera y lee lo ya confirmado
+        stmt = stmt.with_for_update(of=Reservation)
+    for created_at, room_type_id, costo, status in session.connection().execute(stmt):
+        if status != "paid":
+            continue
+        bucket = out[(_day(created_at), room_type_id)]
+        bucket[0] += 1
+        bucket[1] += Decimal(costo)
+    return out
+
+
+def _reservation_changed(obj: Reservation) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[a].history.has_changes() for a in _ROLLUP_ATTRS)
+
+
+def _criteria(session: Session) -> list:
+    """Filtros de las filas de reservations cuyo aporte puede cambiar en este flush."""
+    res_ids: set[int] = set()
+    user_ids: set[int] = set()
+    room_ids: set[int] = set()
+    for obj in session.deleted:
+        if isinstance(obj, Reservation):
+            res_ids.add(obj.id)
+        elif isinstance(obj, User):
+            user_ids.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Reservation) and _reservation_changed(obj):
+            res_ids.add(obj.id)
+        elif isinstance(obj, Room) and inspect(obj).attrs.room_type_id.history.has_changes():
+            room_ids.add(obj.id)
+
+    criteria = []
+    if res_ids:
+        criteria.append(Reservation.id.in_(res_ids))
+    if user_ids:
+        criteria.append(Reservation.user_id.in_(user_ids))
+    if room_ids:
+        criteria.append(Reservation.room_id.in_(room_ids))
+    return criteria
+
+
+def _upsert_stmt(dialect_name: str, rows: list[dict]):
+    mod = postgresql if dialect_name == "postgresql" else sqlite
+    stmt = mod.insert(DailyRevenueRollup).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[DailyRevenueRollup.day, DailyRevenueRollup.room_type_id],
+        set_={
+            "count": DailyRevenueRollup.count + stmt.excluded.count,
+            "revenue": DailyRevenueRollup.revenue + stmt.excluded.revenue,
+        },
+    )
+
+
+def apply_deltas(session: Session, old: Contribution, new: Contribution) -> None:
+    rows = []
+    for key in set(old) | set(new):
+        o = old.get(key, (0, Decimal("0")))
+        n = new.get(key, (0, Decimal("0")))
+        if n[0] != o[0] or n[1] != o[1]:
+            rows.append({"day": key[0], "room_type_id": key[1], "count": n[0] - o[0], "revenue": n[1] - o[1]})
+    if rows:
+        conn = session.connection()
+        conn.execute(_upsert_stmt(conn.dialect.name, rows))
+
+
+def _before_flush(session: Session, flush_context, instances) -> None:
+    criteria = _criteria(session)
+    session.info[_PENDING_KEY] = (criteria, _contributions(session, criteria, lock=True))
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    # en after_flush session.new/dirty/deleted aún muestran lo que se escribió
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending is None:
+        return
+    criteria, old = pending
+    # las reservas nuevas no tenían aporte viejo; ahora ya tienen id
+    new_ids = [obj.id for obj in session.new if isinstance(obj, Reservation)]
+    if new_ids:
+        criteria = criteria + [Reservation.id.in_(new_ids)]
+    if criteria:
+        apply_deltas(session, old, _contributions(session, criteria))
+
+
+def install() -> None:
+    """Registra los listeners en todas las Session (también las de AsyncSession)."""
+    if not event.contains(Session, "before_flush", _before_flush):
+        event.listen(Session, "before_flush", _before_flush)
+        event.listen(Session, "after_flush", _after_flush)
+
+
+def rebuild(db: Session, start: date | None = None, end: date | None = None) -> int:
+    """Recalcula el rollup desde reservations (todo, o días [start, end)). Devuelve filas escritas."""
+    day_col = func.date(Reservation.created_at)
+    q = (
+        select(day_col, Room.room_type_id, func.count(Reservation.id), func.sum(Reservation.costo_total))
+        .join(Room, Room.id == Reservation.room_id)
+        .where(Reservation.status == "paid")
+        .group_by(day_col, Room.room_type_id)
+    )
+    d = delete(DailyRevenueRollup)
+    if start is not None:
+        q = q.where(Reservation.created_at >= start)
+        d = d.where(DailyRevenueRollup.day >= start)
+    if end is not None:
+        q = q.where(Reservation.created_at < end)
+        d = d.where(DailyRevenueRollup.day < end)
+
+    db.execute(d)
+    rows = [
+        {"day": _day(day), "room_type_id": room_type_id, "count": count, "revenue": revenue}
+        for day, room_type_id, count, revenue in db.execute(q)
+    ]
+    if rows:
+        db.execute(insert(DailyRevenueRollup), rows)
+    db.commit()
+    return len(rows)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Callable
+
+from app.core.http_cache import quote_etag
+from app.services.pdf_generator import WELCOME_TEMPLATE_VERSION, welcome_pdf_bytes
+
+# Documentos estáticos (no dependen de la BD) renderizados una sola vez y
+# servidos desde memoria. Se construyen en el lifespan de la app; si alguien
+# los pide antes, el primero los construye y el resto espera el mismo lock.
+
+# gzip solo si ahorra al menos un 10% (los PDF de ReportLab ya van comprimidos)
+GZIP_MIN_SAVING = 0.10
+
+
+@dataclass(frozen=True)
+class StaticDocument:
+    data: bytes
+    etag: str
+    media_type: str
+    filename: str
+    gzipped: bytes | None
+
+
+@dataclass(frozen=True)
+class _Spec:
+    render: Callable[[], bytes]
+    version: int
+    media_type: str
+    filename: str
+
+
+def _build(spec: _Spec) -> StaticDocument:
+    data = spec.render()
+    digest = hashlib.sha256(data).hexdigest()
+    packed = gzip.compress(data, compresslevel=9, mtime=0)
+    return StaticDocument(
+        data=data,
+        etag=quote_etag(f"v{spec.version}-{digest[:32]}"),
+        media_type=spec.media_type,
+        filename=spec.filename,
+        gzipped=packed if len(packed) <= len(data) * (1 - GZIP_MIN_SAVING) else None,
+    )
+
+
+class StaticDocuments:
+    def __init__(self):
+        self._specs: dict[str, _Spec] = {}
+        self._docs: dict[str, StaticDocument] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, render: Callable[[], bytes], *, version: int, media_type: str, filename: str) -> None:
+        self._specs[name] = _Spec(render, version, media_type, filename)
+
+    def build_all(self) -> None:
+        with self._lock:
+            for name, spec in self._specs.items():
+                if name not in self._docs:
+                    self._docs[name] = _build(spec)
+
+    def get(self, name: str) -> StaticDocument:
+        doc = self._docs.get(name)
+        if doc is None:
+            with self._lock:
+                doc = self._docs.get(name)
+                if doc is None:
+                    doc = self._docs[name] = _build(self._specs[name])
+        return doc
+
+
+static_documents = StaticDocuments()
+static_documents.register(
+    "welcome",
+    welcome_pdf_bytes,
+    version=WELCOME_TEMPLATE_VERSION,
+    media_type="application/pdf",
+    filename="bienvenida_hotel_ventura.pdf",
+)
@@ -0,0 +1,23 @@
+from app.core.config import settings
+from app.storage.base import StorageBackend
+from app.storage.local import LocalStorage
+
+
+def _build_storage() -> StorageBackend:
+    if settings.STORAGE_BACKEND == "s3":
+        from app.storage.s3 import S3Storage
+
+        return S3Storage(
+            settings.STORAGE_S3_BUCKET,
+            prefix=settings.STORAGE_S3_PREFIX,
+            endpoint_url=settings.STORAGE_S3_ENDPOINT_URL,
+            region=settings.STORAGE_S3_REGION,
+            access_key=settings.STORAGE_S3_ACCESS_KEY,
+            secret_key=settings.STORAGE_S3_SECRET_KEY,
+            presign_seconds=settings.STORAGE_PRESIGN_SECONDS,
+        )
+    return LocalStorage(settings.STORAGE_DIR, shard_depth=settings.STORAGE_SHARD_DEPTH)
+
+
+# backend por proceso (STORAGE_BACKEND)
+storage = _build_storage()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import sys
+from abc import ABC, abstractmethod
+from contextlib import AbstractContextManager
+from datetime import datetime
+from typing import AsyncIterator, BinaryIO, Iterable, Iterator
+
+from fastapi.concurrency import run_in_threadpool
+
+# Interfaz de almacenamiento de archivos por clave lógica
+# ("reports/daily_2024-01-01.csv", "cache/pdf/<sha>.pdf"): es lo que se
+# guarda en reservations.reporte_path. Cada backend decide dónde vive el
+# archivo (disco con directorios por hash, bucket S3...).
+# Los métodos *_async hacen el mismo trabajo en el threadpool para no
+# bloquear el event loop.
+
+CHUNK_SIZE = 64 * 1024
+
+
+def check_key(key: str) -> str:
+    parts = key.split("/")
+    if not key or key.startswith("/") or any(p in ("", ".", "..") for p in parts):
+        raise ValueError(f"Clave de almacenamiento inválida: {key!r}")
+    return key
+
+
+class StorageBackend(ABC):
+    name: str
+
+    # ---------- primitivas ----------
+
+    @abstractmethod
+    def writer(self, key: str) -> AbstractContextManager[BinaryIO]:
+        """Archivo para escribir key; queda visible (completo) solo si el bloque termina sin error."""
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Archivo para leer key (FileNotFoundError si no existe)."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool: ...
+
+    @abstractmethod
+    def size(self, key: str) -> int: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    def rename(self, src: str, dst: str) -> None:
+        """Mueve src a dst (reemplaza dst si existe; FileNotFoundError si falta src)."""
+
+    @abstractmethod
+    def scan(self, prefix: str) -> Iterator[tuple[str, datetime]]:
+        """(clave, última modificación UTC) de cada archivo bajo prefix (para limpiezas)."""
+
+    def open_random(self, key: str) -> BinaryIO:
+        """Como open, pero con seek (para leer un miembro de un zip sin bajar el archivo entero)."""
+        return self.open(key)
+
+    def presigned_url(self, key: str, *, filename: str | None = None, media_type: str | None = None) -> str | None:
+        """URL temporal para descargar key directo del backend (None si no aplica)."""
+        return None
+
+    # ---------- derivadas ----------
+
+    def put(self, key: str, data: bytes) -> None:
+        with self.writer(key) as f:
+            f.write(data)
+
+    def get(self, key: str) -> bytes:
+        f = self.open(key)
+        try:
+            return f.read()
+        finally:
+            f.close()
+
+    def iter_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        f = self.open(key)
+        try:
+            while chunk := f.read(chunk_size):
+                yield chunk
+        finally:
+            f.close()
+
+    def tee(self, chunks: Iterable[bytes], key: str) -> Iterator[bytes]:
+        """Reenvía chunks y a la vez los guarda en key.
+
+        El archivo aparece solo si el stream se consumió completo; si el
+        cliente corta a medias, se descarta.
+        """
+        with self.writer(key) as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+
+    async def put_async(self, key: str, data: bytes) -> None:
+        await run_in_threadpool(self.put, key, data)
+
+    async def get_async(self, key: str) -> bytes:
+        return await run_in_threadpool(self.get, key)
+
+    async def exists_async(self, key: str) -> bool:
+        return await run_in_threadpool(self.exists, key)
+
+    async def tee_async(self, chunks: AsyncIterator[bytes], key: str) -> AsyncIterator[bytes]:
+        cm = self.writer(key)
+        f = await run_in_threadpool(cm.__enter__)
+        try:
+            async for chunk in chunks:
+                await run_in_threadpool(f.write, chunk)
+                yield chunk
+        except BaseException:
+            await run_in_threadpool(cm.__exit__, *sys.exc_info())
+            raise
+        await run_in_threadpool(cm.__exit__, None, None, None)
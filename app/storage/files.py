@@ -1,25 +1,26 @@
 from __future__ import annotations
 
-import os
-from pathlib import Path
-from app.core.config import settings
-
-def ensure_dir(path: Path) -> None:
-    path.mkdir(parents=True, exist_ok=True)
-
-def storage_root() -> Path:
-    return Path(settings.STORAGE_DIR)
-
-def write_bytes(relative_path: str, data: bytes) -> Path:
-    root = storage_root()
-    dest = root / relative_path
-    ensure_dir(dest.parent)
-    dest.write_bytes(data)
-    return dest
-
-def write_text(relative_path: str, text: str, encoding: str = "utf-8") -> Path:
-    root = storage_root()
-    dest = root / relative_path
-    ensure_dir(dest.parent)
-    dest.write_text(text, encoding=encoding)
-    return dest
+from typing import AsyncIterator, Iterable, Iterator
+
+from app.storage import storage
+
+# Atajos sobre el backend configurado (app.storage.storage). Las rutas
+# relativas son claves lógicas: lo que se guarda en reporte_path.
+
+
+def write_bytes(relative_path: str, data: bytes) -> str:
+    storage.put(relative_path, data)
+    return relative_path
+
+
+def write_text(relative_path: str, text: str, encoding: str = "utf-8") -> str:
+    return write_bytes(relative_path, text.encode(encoding))
+
+
+def tee_to_storage(chunks: Iterable[bytes], relative_path: str) -> Iterator[bytes]:
+    """Reenvía chunks y a la vez los guarda en relative_path (solo si el stream termina)."""
+    return storage.tee(chunks, relative_path)
+
+
+def tee_to_storage_async(chunks: AsyncIterator[bytes], relative_path: str) -> AsyncIterator[bytes]:
+    return storage.tee_async(chunks, relative_path)
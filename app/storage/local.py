@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+from app.storage.base import StorageBackend, check_key
+
+# Disco local (STORAGE_DIR). Cada archivo va en subdirectorios por hash de
+# su clave: reports/daily_2024-01-01.csv -> reports/3f/a2/daily_2024-01-01.csv,
+# así ningún directorio crece sin límite. Las claves escritas antes del
+# sharding siguen leyéndose desde su ruta plana.
+
+
+def ensure_dir(path: Path) -> None:
+    path.mkdir(parents=True, exist_ok=True)
+
+
+def _fsync_dir(path: Path) -> None:
+    # el rename queda persistido cuando se sincroniza el directorio (POSIX)
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_path(dest: Path) -> Iterator[Path]:
+    """Entrega un path temporal junto a dest; al salir sin error lo renombra a dest.
+
+    os.replace es atómico dentro del mismo filesystem: los lectores ven el
+    archivo anterior o el nuevo completo, nunca uno a medio escribir.
+    """
+    ensure_dir(dest.parent)
+    tmp = dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        yield tmp
+        os.replace(tmp, dest)
+        _fsync_dir(dest.parent)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+class LocalStorage(StorageBackend):
+    name = "local"
+
+    def __init__(self, root: Path | str, shard_depth: int = 2):
+        self.root = Path(root)
+        self.shard_depth = shard_depth
+
+    def path(self, key: str) -> Path:
+        """Ruta (con sharding) donde se escribe key."""
+        check_key(key)
+        parent, _, name = key.rpartition("/")
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        shards = [digest[2 * i : 2 * i + 2] for i in range(self.shard_depth)]
+        return self.root.joinpath(*filter(None, [parent]), *shards, name)
+
+    def _existing(self, key: str) -> Path | None:
+        path = self.path(key)
+        if path.is_file():
+            return path
+        legacy = self.root / key
+        return legacy if legacy.is_file() else None
+
+    @contextmanager
+    def writer(self, key: str) -> Iterator[BinaryIO]:
+        with atomic_path(self.path(key)) as tmp, open(tmp, "wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+
+    def open(self, key: str) -> BinaryIO:
+        path = self._existing(key)
+        if path is None:
+            raise FileNotFoundError(key)
+        return open(path, "rb")
+
+    def exists(self, key: str) -> bool:
+        return self._existing(key) is not None
+
+    def size(self, key: str) -> int:
+        path = self._existing(key)
+        if path is None:
+            raise FileNotFoundError(key)
+        return path.stat().st_size
+
+    def delete(self, key: str) -> None:
+        for path in (self.path(key), self.root / key):
+            path.unlink(missing_ok=True)
+
+    def rename(self, src: str, dst: str) -> None:
+        path = self._existing(src)
+        if path is None:
+            raise FileNotFoundError(src)
+        dest = self.path(dst)
+        ensure_dir(dest.parent)
+        os.replace(path, dest)
+        _fsync_dir(dest.parent)
+
+    def _key_of(self, path: Path) -> str:
+        # ruta con sharding -> clave (sin los subdirectorios de hash); si no calza, es una ruta plana de antes
+        parts = path.relative_to(self.root).parts
+        dirs = parts[:-1]
+        if len(dirs) >= self.shard_depth:
+            key = "/".join((*dirs[: len(dirs) - self.shard_depth], parts[-1]))
+            if self.path(key) == path:
+                return key
+        return "/".join(parts)
+
+    def scan(self, prefix: str) -> Iterator[tuple[str, datetime]]:
+        base = self.root / check_key(prefix.rstrip("/"))
+        for dirpath, _, names in os.walk(base):
+            for name in names:
+                if name.startswith("."):  # temporales de atomic_path
+                    continue
+                path = Path(dirpath) / name
+                try:
+                    mtime = path.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                yield self._key_of(path), datetime.fromtimestamp(mtime, timezone.utc)
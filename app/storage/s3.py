@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import io
+import mimetypes
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from typing import BinaryIO, Iterator
+
+from app.storage.base import StorageBackend, check_key
+
+# Bucket S3 o compatible (MinIO, R2...; STORAGE_S3_ENDPOINT_URL). Las
+# escrituras se arman en un archivo temporal (en memoria hasta 8 MB) y se
+# suben al cerrar: S3 no muestra objetos a medias, así que la subida es
+# atómica por sí sola. En S3 no hace falta sharding de directorios.
+
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+RANGE_BUFFER_BYTES = 256 * 1024
+
+
+class _RangeReader(io.RawIOBase):
+    """Objeto S3 como archivo con seek: cada lectura es un GET con Range."""
+
+    def __init__(self, client, bucket: str, key: str, size: int):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.size = size
+        self.pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.pos, io.SEEK_END: self.size}[whence]
+        self.pos = max(0, base + offset)
+        return self.pos
+
+    def readinto(self, buf) -> int:
+        if self.pos >= self.size or len(buf) == 0:
+            return 0
+        end = min(self.pos + len(buf), self.size) - 1
+        body = self.client.get_object(Bucket=self.bucket, Key=self.key, Range=f"bytes={self.pos}-{end}")["Body"]
+        data = body.read()
+        buf[: len(data)] = data
+        self.pos += len(data)
+        return len(data)
+
+
+class S3Storage(StorageBackend):
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        *,
+        prefix: str = "",
+        endpoint_url: str | None = None,
+        region: str | None = None,
+        access_key: str | None = None,
+        secret_key: str | None = None,
+        presign_seconds: int = 300,
+        client=None,
+    ):
+        if not bucket:
+            raise ValueError("STORAGE_S3_BUCKET es obligatorio con STORAGE_BACKEND=s3")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.presign_seconds = presign_seconds
+        if client is None:
+            try:
+                import boto3
+                from botocore.config import Config
+            except ImportError:
+                raise RuntimeError("STORAGE_BACKEND=s3 requiere boto3 (pip install boto3)")
+            client = boto3.client(
+                "s3",
+                endpoint_url=endpoint_url or None,
+                region_name=region or None,
+                aws_access_key_id=access_key or None,
+                aws_secret_access_key=secret_key or None,
+                # endpoint propio (MinIO): rutas tipo http://host/bucket/clave
+                config=Config(signature_version="s3v4", s3={"addressing_style": "path" if endpoint_url else "auto"}),
+            )
+        self.client = client
+
+    def object_key(self, key: str) -> str:
+        return self.prefix + check_key(key)
+
+    def _is_missing(self, exc: Exception) -> bool:
+        code = getattr(exc, "response", {}).get("Error", {}).get("Code")
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    @contextmanager
+    def writer(self, key: str) -> Iterator[BinaryIO]:
+        obj = self.object_key(key)
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as f:
+            yield f
+            f.seek(0)
+            content_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+            self.client.upload_fileobj(f, self.bucket, obj, ExtraArgs={"ContentType": content_type})
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.object_key(key))["Body"]
+        except Exception as e:
+            if self._is_missing(e):
+                raise FileNotFoundError(key) from e
+            raise
+
+    def open_random(self, key: str) -> BinaryIO:
+        size = self.size(key)
+        return io.BufferedReader(_RangeReader(self.client, self.bucket, self.object_key(key), size), RANGE_BUFFER_BYTES)
+
+    def _head(self, key: str) -> dict | None:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+        except Exception as e:
+            if self._is_missing(e):
+                return None
+            raise
+
+    def exists(self, key: str) -> bool:
+        return self._head(key) is not None
+
+    def size(self, key: str) -> int:
+        head = self._head(key)
+        if head is None:
+            raise FileNotFoundError(key)
+        return int(head["ContentLength"])
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+    def rename(self, src: str, dst: str) -> None:
+        # S3 no tiene rename: copia del lado del servidor (dst aparece completo) y borra src
+        try:
+            self.client.copy_object(
+                Bucket=self.bucket,
+                Key=self.object_key(dst),
+                CopySource={"Bucket": self.bucket, "Key": self.object_key(src)},
+            )
+        except Exception as e:
+            if self._is_missing(e):
+                raise FileNotFoundError(src) from e
+            raise
+        self.delete(src)
+
+    def scan(self, prefix: str) -> Iterator[tuple[str, datetime]]:
+        pages = self.client.get_paginator("list_objects_v2").paginate(
+            Bucket=self.bucket, Prefix=self.object_key(prefix.rstrip("/")) + "/"
+        )
+        for page in pages:
+            for obj in page.get("Contents", []):
+                yield obj["Key"][len(self.prefix) :], obj["LastModified"]
+
+    def presigned_url(self, key: str, *, filename: str | None = None, media_type: str | None = None) -> str | None:
+        params = {"Bucket": self.bucket, "Key": self.object_key(key)}
+        if filename:
+            params["ResponseContentDisposition"] = f'attachment; filename="{filename}"'
+        if media_type:
+            params["ResponseContentType"] = media_type
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=self.presign_seconds)
@@ -0,0 +1,6 @@
+# Los workers escriben en la misma BD que el API: mismos listeners de sesión.
+from app.services import cache_bus, report_snapshots, revenue_rollup
+
+revenue_rollup.install()
+cache_bus.install()
+report_snapshots.install()
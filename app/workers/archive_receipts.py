@@ -0,0 +1,30 @@
+"""Empaqueta los comprobantes .txt de meses cerrados en un zip por mes
+y poda la caché de PDFs (PDF_CACHE_MAX_AGE_DAYS).
+
+Uso:
+    python -m app.workers.archive_receipts    # todos los meses anteriores al actual (cron diario o mensual)
+"""
+from __future__ import annotations
+
+import logging
+
+from app.core.database import SessionLocal
+from app.services import pdf_cache
+from app.services.receipt_archive import archive_closed_months
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+
+    db = SessionLocal()
+    try:
+        total = archive_closed_months(db)
+    finally:
+        db.close()
+    logger = logging.getLogger(__name__)
+    logger.info("comprobantes archivados: %s", total)
+    logger.info("PDF cacheados borrados: %s", pdf_cache.prune())
+
+
+if __name__ == "__main__":
+    main()
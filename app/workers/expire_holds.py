@@ -0,0 +1,32 @@
+"""Cancela reservas pending vencidas (expires_at).
+
+Uso:
+    python -m app.workers.expire_holds          # loop cada SWEEP_INTERVAL_SECONDS
+    python -m app.workers.expire_holds --once   # una pasada (cron)
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+
+from app.core.config import settings
+from app.services.expiry_sweeper import run_sweep
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cancela reservas pending vencidas")
+    parser.add_argument("--once", action="store_true", help="una pasada y termina")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+
+    while True:
+        run_sweep()
+        if args.once:
+            break
+        time.sleep(settings.SWEEP_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    main()
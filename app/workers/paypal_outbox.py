@@ -0,0 +1,50 @@
+"""Worker del outbox de PayPal.
+
+Uso:
+    python -m app.workers.paypal_outbox          # loop continuo
+    python -m app.workers.paypal_outbox --once   # un lote y termina
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import settings
+from app.services.checkout_outbox import drain_once
+
+logger = logging.getLogger("paypal_outbox")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Procesa payment_outbox (órdenes PayPal)")
+    parser.add_argument("--once", action="store_true", help="procesa un lote y termina")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+
+    stop = False
+
+    def _stop(*_):
+        nonlocal stop
+        stop = True
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    with ThreadPoolExecutor(max_workers=settings.OUTBOX_CONCURRENCY) as pool:
+        while not stop:
+            taken = drain_once(pool)
+            if taken:
+                logger.info("procesadas %s filas", taken)
+            if args.once:
+                break
+            # lote lleno: seguir de inmediato; si no, esperar
+            if taken < settings.OUTBOX_BATCH_SIZE:
+                time.sleep(settings.OUTBOX_POLL_INTERVAL)
+
+
+if __name__ == "__main__":
+    main()
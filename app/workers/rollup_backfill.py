@@ -0,0 +1,34 @@
+"""Recalcula daily_revenue_rollup desde reservations.
+
+Uso:
+    python -m app.workers.rollup_backfill                                # todo
+    python -m app.workers.rollup_backfill --start 2025-01-01 --end 2026-01-01
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+from datetime import date
+
+from app.core.database import SessionLocal
+from app.services.revenue_rollup import rebuild
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recalcula daily_revenue_rollup")
+    parser.add_argument("--start", type=date.fromisoformat, help="primer día (incluido)")
+    parser.add_argument("--end", type=date.fromisoformat, help="último día (excluido)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+
+    db = SessionLocal()
+    try:
+        rows = rebuild(db, args.start, args.end)
+    finally:
+        db.close()
+    logging.getLogger(__name__).info("daily_revenue_rollup: %s filas recalculadas", rows)
+
+
+if __name__ == "__main__":
+    main()
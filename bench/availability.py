@@ -0,0 +1,66 @@
+"""Disponibilidad: consultas SQL (antes) vs bitsets en memoria (availability_index).
+
+    python -m bench.availability [--rows 200000] [--rooms 500] [--repeat 200]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from bench.common import create_schema, header, report, seed_catalog, seed_reservations, seed_users, session
+
+from app.services.availability_index import AvailabilityIndex, free_room_ids_sql
+from app.services.reservations_service import has_overlap
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--horizon", type=int, default=730)
+    args = parser.parse_args()
+
+    create_schema()
+    rooms = seed_catalog(args.rooms, floors=10)
+    seed_users(1)
+    # la mitad del histórico ya pasó; el resto cae dentro del horizonte del índice
+    seed_reservations(args.rows, rooms, first_day=date.today() - timedelta(days=args.rows // args.rooms))
+
+    db = session()
+    index = AvailabilityIndex(args.horizon)
+    t0 = time.perf_counter()
+    index.rebuild(db)
+    build = time.perf_counter() - t0
+
+    rnd = random.Random(7)
+    queries = []
+    for _ in range(args.repeat):
+        s = date.today() + timedelta(days=rnd.randint(0, args.horizon - 30))
+        queries.append((rnd.choice(rooms), s, s + timedelta(days=rnd.randint(1, 14))))
+
+    def per_query(fn) -> list[float]:
+        samples = []
+        for q in queries:
+            t = time.perf_counter()
+            fn(*q)
+            samples.append(time.perf_counter() - t)
+        return samples
+
+    for room, s, e in queries[:50]:
+        assert index.is_free(room, s, e) == (not has_overlap(db, room, s, e))
+        assert index.free_rooms(s, e) == free_room_ids_sql(db, s, e)
+
+    header(f"disponibilidad: {args.rows} reservas, {args.rooms} habitaciones, horizonte {args.horizon} días")
+    print(f"construcción del índice: {build * 1000:.1f} ms")
+    report("¿libre? SQL (has_overlap)", per_query(lambda r, s, e: has_overlap(db, r, s, e)))
+    report("¿libre? índice (is_free)", per_query(index.is_free))
+    report("habitaciones libres SQL", per_query(lambda r, s, e: free_room_ids_sql(db, s, e)))
+    report("habitaciones libres índice", per_query(lambda r, s, e: index.free_rooms(s, e)))
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
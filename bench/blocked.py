@@ -0,0 +1,77 @@
+"""GET /reservations/blocked: filtro en Python (antes) vs rango en SQL con índice (ahora).
+
+    python -m bench.blocked [--rows 500000] [--rooms 500] [--repeat 50]
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import date, timedelta
+
+from bench.common import (
+    create_schema,
+    engine,
+    header,
+    is_postgres,
+    report,
+    seed_catalog,
+    seed_reservations,
+    seed_users,
+    session,
+    timed,
+)
+
+from sqlalchemy import select, text
+
+from app.models.reservation import Reservation
+from app.services.reservations_service import blocked_stmt
+
+
+def before(db, start: date, end: date) -> list:
+    # implementación original: todas las pending/paid a memoria y overlaps() en un loop
+    stmt = select(Reservation.room_id, Reservation.fecha_inicio, Reservation.fecha_fin, Reservation.status).where(
+        Reservation.status.in_(["pending", "paid"])
+    )
+    return [r for r in db.execute(stmt).all() if r.fecha_inicio < end and r.fecha_fin > start]
+
+
+def after(db, start: date, end: date) -> list:
+    return db.execute(blocked_stmt(db.get_bind().dialect.name, start, end)).all()
+
+
+def query_plan(start: date, end: date) -> str:
+    stmt = blocked_stmt(engine.dialect.name, start, end)
+    sql = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN " if is_postgres() else "EXPLAIN QUERY PLAN "
+    with engine.connect() as conn:
+        return "\n".join("  " + " ".join(str(c) for c in row) for row in conn.execute(text(prefix + sql)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--window-days", type=int, default=30)
+    args = parser.parse_args()
+
+    create_schema()
+    rooms = seed_catalog(args.rooms, floors=10)
+    seed_users(1)
+    last = seed_reservations(args.rows, rooms)
+    # ventana al final del histórico (lo que pide el mapa del frontend)
+    start = last - timedelta(days=args.window_days * 2)
+    end = start + timedelta(days=args.window_days)
+
+    header(f"/blocked: {args.rows} reservas, ventana de {args.window_days} días")
+    db = session()
+    try:
+        assert sorted(before(db, start, end)) == sorted(after(db, start, end))
+        report("antes (todo a Python + overlaps)", timed(lambda: before(db, start, end), max(3, args.repeat // 10)))
+        report("ahora (rango en SQL + índice)", timed(lambda: after(db, start, end), args.repeat))
+    finally:
+        db.close()
+    print("plan:\n" + query_plan(start, end))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Catálogo: GET /rooms y /room-types y calculate_total, desde la BD (antes) vs en memoria (ahora).
+
+"Antes" es la misma app con CATALOG_CACHE_TTL_SECONDS=0: cada pedido
+recarga la foto desde la BD. Se mide también el 304 (If-None-Match) y
+calculate_total con los dos db.get originales vs el precio en memoria.
+
+    python -m bench.catalog [--rooms 500] [--repeat 500]
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+from datetime import date, timedelta
+
+from bench.common import create_schema, header, report, seed_catalog, session, timed
+
+from fastapi.testclient import TestClient
+
+from app.models.room import Room
+from app.models.room_type import RoomType
+from app.services.catalog_cache import catalog_cache
+from app.services.reservations_service import _total_for, calculate_total
+
+
+def before_total(db, room_id: int, start: date, end: date) -> float:
+    # implementación original: Room y RoomType por request (sesión nueva: identity map vacío)
+    db.expunge_all()
+    room = db.get(Room, room_id)
+    return _total_for(db.get(RoomType, room.room_type_id), start, end)
+
+
+def throughput(label: str, samples: list[float]) -> None:
+    report(label, samples)
+    print(f"{'':<44} {1 / statistics.mean(samples):10.0f} req/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    create_schema()
+    rooms = seed_catalog(args.rooms, floors=10)
+    ttl = catalog_cache.ttl
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        for path in (f"/api/v1/rooms?limit={args.rooms}", "/api/v1/room-types"):
+            header(f"GET {path} ({args.rooms} habitaciones)")
+            catalog_cache.ttl = 0
+            throughput("antes: BD en cada pedido (TTL=0)", timed(lambda: client.get(path), args.repeat))
+            catalog_cache.ttl = ttl
+            first = client.get(path)
+            assert first.status_code == 200
+            throughput("ahora: bytes en memoria", timed(lambda: client.get(path), args.repeat))
+            inm = {"If-None-Match": first.headers["ETag"]}
+            assert client.get(path, headers=inm).status_code == 304
+            throughput("ahora: 304 con If-None-Match", timed(lambda: client.get(path, headers=inm), args.repeat))
+
+    db = session()
+    start = date.today() + timedelta(days=30)
+    end = start + timedelta(days=3)
+    ids = iter(rooms * (args.repeat * 20 // len(rooms) + 4))
+    assert before_total(db, rooms[0], start, end) == calculate_total(db, rooms[0], start, end)
+    header("calculate_total")
+    report("antes: db.get(Room) + db.get(RoomType)", timed(lambda: before_total(db, next(ids), start, end), args.repeat * 10))
+    report("ahora: precio del catálogo en memoria", timed(lambda: calculate_total(db, next(ids), start, end), args.repeat * 10))
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Utilidades compartidas por los benchmarks (python -m bench.<nombre>).
+
+Por defecto corren contra una base SQLite temporal. Con
+BENCH_DATABASE_URL=postgresql://... usan Postgres; el esquema se crea con
+las migraciones de alembic y las tablas se vacían al empezar.
+Este módulo fija el entorno antes de importar app: importarlo primero.
+"""
+from __future__ import annotations
+
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+_TMP = Path(tempfile.mkdtemp(prefix="hotel-bench-"))
+
+os.environ["DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL") or f"sqlite:///{_TMP / 'bench.db'}"
+os.environ["STORAGE_DIR"] = str(_TMP / "storage")
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ.setdefault("SECRET_KEY", "bench-secret-key-" + "x" * 32)
+os.environ.setdefault("DB_ASYNC", "false")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+os.environ.setdefault("PDF_RENDER_WORKERS", "0")
+os.environ.setdefault("CACHE_BUS_BACKEND", "off")
+
+from sqlalchemy import insert, text  # noqa: E402
+
+from app.core.database import SessionLocal, engine  # noqa: E402
+from app.models.base import Base  # noqa: E402
+import app.models  # noqa: E402,F401
+from app.models.reservation import Reservation  # noqa: E402
+from app.models.room import Room  # noqa: E402
+from app.models.room_type import RoomType  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+TIPOS = [("simple", 1, 40), ("doble", 2, 65), ("triple", 3, 90)]
+
+
+def is_postgres() -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+def create_schema() -> None:
+    if is_postgres():
+        from alembic import command
+        from alembic.config import Config
+
+        cfg = Config(str(ROOT / "alembic.ini"))
+        cfg.set_main_option("script_location", str(ROOT / "alembic"))
+        command.upgrade(cfg, "head")
+        names = ", ".join(t.name for t in Base.metadata.sorted_tables)
+        with engine.begin() as conn:
+            conn.execute(text(f"TRUNCATE {names} RESTART IDENTITY CASCADE"))
+    else:
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+
+
+def seed_catalog(rooms: int = 60, floors: int = 6) -> list[int]:
+    """Tipos simple/doble/triple + `rooms` habitaciones repartidas en `floors` pisos."""
+    with engine.begin() as conn:
+        conn.execute(
+            insert(RoomType),
+            [{"id": i, "tipo": t, "capacidad_personas": c, "precio_noche": p} for i, (t, c, p) in enumerate(TIPOS, 1)],
+        )
+        conn.execute(
+            insert(Room),
+            [
+                {"id": i, "numero": str(1000 + i), "piso": 1 + (i - 1) % floors, "room_type_id": 1 + i % len(TIPOS)}
+                for i in range(1, rooms + 1)
+            ],
+        )
+    return list(range(1, rooms + 1))
+
+
+def seed_users(n: int, password_hash: str = "x", admin: bool = True) -> None:
+    rows = [
+        {
+            "id": i,
+            "nombre": f"Nombre{i}",
+            "apellido": f"Apellido{i}",
+            "email": f"user{i}@bench.local",
+            "cedula": f"{i:010d}",
+            "telefono": "0999999999",
+            "password_hash": password_hash,
+            "role": "admin" if admin and i == 1 else "cliente",
+        }
+        for i in range(1, n + 1)
+    ]
+    with engine.begin() as conn:
+        for chunk in _chunks(rows, 10_000):
+            conn.execute(insert(User), chunk)
+
+
+def seed_reservations(
+    n: int,
+    rooms: list[int],
+    *,
+    users: int = 1,
+    first_day: date | None = None,
+    statuses: tuple[str, ...] = ("paid", "paid", "pending", "cancelled"),
+    seed: int = 42,
+) -> date:
+    """n reservas sin solapes por habitación (estadías consecutivas de 1-4 noches).
+
+    created_at cae unos días antes de fecha_inicio. Devuelve el último día ocupado.
+    """
+    rnd = random.Random(seed)
+    first_day = first_day or date.today() - timedelta(days=365 * 3)
+    cursor = {room: first_day for room in rooms}
+    rows = []
+    last = first_day
+    for i in range(n):
+        room = rooms[i % len(rooms)]
+        start = cursor[room] + timedelta(days=rnd.randint(0, 2))
+        end = start + timedelta(days=rnd.randint(1, 4))
+        cursor[room] = end
+        last = max(last, end)
+        rows.append(
+            {
+                "user_id": 1 + i % users,
+                "room_id": room,
+                "fecha_inicio": start,
+                "fecha_fin": end,
+                "costo_total": 50 * (end - start).days,
+                "status": statuses[rnd.randrange(len(statuses))],
+                "created_at": datetime.combine(start - timedelta(days=rnd.randint(1, 30)), datetime.min.time())
+                + timedelta(minutes=rnd.randint(0, 1439)),
+            }
+        )
+    with engine.begin() as conn:
+        for chunk in _chunks(rows, 20_000):
+            conn.execute(insert(Reservation), chunk)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE reservations"))
+    return last
+
+
+def _chunks(rows: list, size: int):
+    for i in range(0, len(rows), size):
+        yield rows[i : i + size]
+
+
+def timed(fn: Callable[[], object], repeat: int, warmup: int = 1) -> list[float]:
+    """Segundos de cada llamada (tras `warmup` llamadas sin medir)."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def percentile(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def report(label: str, samples: list[float]) -> None:
+    print(
+        f"{label:<44} p50={percentile(samples, 50) * 1000:10.3f} ms  "
+        f"p99={percentile(samples, 99) * 1000:10.3f} ms  media={statistics.mean(samples) * 1000:10.3f} ms  n={len(samples)}"
+    )
+
+
+def header(title: str) -> None:
+    print(f"\n== {title} ({engine.dialect.name}) ==")
+
+
+def session():
+    return SessionLocal()
@@ -0,0 +1,98 @@
+"""Reporte CSV: todas las filas a memoria + StringIO (antes) vs streaming por chunks (ahora).
+
+Mide el pico de memoria de Python (tracemalloc) y el tiempo de generar el
+reporte de todo el histórico. El streaming se consume chunk a chunk y se
+descarta, como hace el StreamingResponse.
+
+    python -m bench.csv_stream [--rows 1000000]
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from bench.common import create_schema, header, seed_catalog, seed_reservations, seed_users, session
+
+from app.core.config import settings
+from app.services import revenue_rollup
+from app.services.reports_service import _paid_rows_stmt, build_csv, iter_csv
+
+
+def before(db, start: date, end: date) -> bytes:
+    # implementación original: .all() + tres pasadas + StringIO + encode
+    rows = db.execute(_paid_rows_stmt(start, end)).all()
+    total_ingresos = sum(float(r.costo_total) for r in rows) if rows else 0.0
+    by_tipo: dict[str, int] = {}
+    for r in rows:
+        by_tipo[r.tipo] = by_tipo.get(r.tipo, 0) + 1
+    out = io.StringIO()
+    w = csv.writer(out)
+    w.writerow(["reporte_desde", start.isoformat(), "reporte_hasta", end.isoformat()])
+    w.writerow(["total_reservas", len(rows)])
+    w.writerow(["total_ingresos", f"{total_ingresos:.2f}"])
+    w.writerow([])
+    w.writerow(["reservas_por_tipo"])
+    w.writerow(["tipo", "cantidad"])
+    for k, v in sorted(by_tipo.items()):
+        w.writerow([k, v])
+    w.writerow([])
+    w.writerow(["detalle_reservas"])
+    w.writerow(["reservation_id", "user_id", "room_numero", "tipo", "fecha_inicio", "fecha_fin", "costo_total"])
+    for r in rows:
+        w.writerow([r.id, r.user_id, r.numero, r.tipo, r.fecha_inicio.isoformat(), r.fecha_fin.isoformat(), f"{float(r.costo_total):.2f}"])
+    return out.getvalue().encode("utf-8")
+
+
+def streamed(db, start: date, end: date) -> int:
+    size = 0
+    for chunk in iter_csv(db, start, end):
+        size += len(chunk)  # el chunk se envía y se descarta
+    return size
+
+
+def measure(label: str, fn) -> None:
+    db = session()
+    try:
+        t0 = time.perf_counter()
+        result = fn(db)
+        elapsed = time.perf_counter() - t0
+        del result
+        db.rollback()
+        tracemalloc.start()
+        fn(db)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        db.close()
+    print(f"{label:<40} tiempo={elapsed:8.2f} s  pico de memoria={peak / 2**20:9.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    create_schema()
+    rooms = seed_catalog(500, floors=10)
+    seed_users(100)
+    first = date.today() - timedelta(days=365 * 8)
+    last = seed_reservations(args.rows, rooms, users=100, first_day=first, statuses=("paid",))
+    db = session()
+    revenue_rollup.rebuild(db)
+    db.commit()
+    start, end = first - timedelta(days=60), last + timedelta(days=1)
+    assert before(db, start, end).split(b"detalle_reservas")[1] == build_csv(db, start, end).split(b"detalle_reservas")[1]
+    db.close()
+
+    header(f"reporte CSV de {args.rows} reservas paid (REPORT_YIELD_PER={settings.REPORT_YIELD_PER})")
+    measure("antes (.all() + StringIO)", lambda db: before(db, start, end))
+    measure("build_csv (chunks unidos en memoria)", lambda db: build_csv(db, start, end))
+    measure("streaming (chunk a chunk)", lambda db: streamed(db, start, end))
+
+
+if __name__ == "__main__":
+    main()
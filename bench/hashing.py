@@ -0,0 +1,87 @@
+"""verify_password con clientes concurrentes: en el event loop (antes) vs threadpool vs pool de procesos.
+
+Mide verificaciones por segundo y el retraso máximo del event loop (lo que
+esperan los demás requests de ese worker mientras se verifican contraseñas).
+
+    python -m bench.hashing [--concurrency 32] [--ops 256] [--workers 2,4] [--rounds 29000]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+
+from bench.common import header
+
+from app.core import hashing
+from app.core.config import settings
+from app.core.password_workers import build_context
+
+
+async def _loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - t0 - interval)
+    return worst
+
+
+async def _drive(verify, concurrency: int, ops: int) -> tuple[float, float]:
+    stop = asyncio.Event()
+    lag = asyncio.create_task(_loop_lag(stop))
+    queue = list(range(ops))
+
+    async def client() -> None:
+        while queue:
+            queue.pop()
+            assert await verify()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    return ops / elapsed, await lag
+
+
+def run(label: str, verify, args) -> None:
+    rate, lag = asyncio.run(_drive(verify, args.concurrency, args.ops))
+    print(f"{label:<36} {rate:10.1f} verif/s  retraso máx. del loop={lag * 1000:8.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--ops", type=int, default=256)
+    parser.add_argument("--workers", default=f"2,{os.cpu_count() or 2}")
+    parser.add_argument("--rounds", type=int, default=settings.PASSWORD_HASH_MIN_ROUNDS)
+    args = parser.parse_args()
+
+    password = "password-de-prueba"
+    stored = build_context(args.rounds).hash(password)
+    header(f"verify_password: {args.ops} verificaciones, {args.concurrency} concurrentes, {args.rounds} rondas")
+
+    async def inline():
+        # implementación original: passlib directo dentro del handler async
+        return build_context().verify(password, stored)
+
+    run("antes (en el event loop)", inline, args)
+
+    async def pooled():
+        return await hashing.verify_password_async(password, stored)
+
+    settings.PASSWORD_HASH_WORKERS = 0
+    run("threadpool (PASSWORD_HASH_WORKERS=0)", pooled, args)
+    for workers in sorted({int(w) for w in args.workers.split(",") if w}):
+        settings.PASSWORD_HASH_WORKERS = workers
+        hashing.start_password_hashing()
+        try:
+            asyncio.run(_drive(pooled, workers, workers))  # arranque de los procesos fuera de la medición
+            run(f"procesos (PASSWORD_HASH_WORKERS={workers})", pooled, args)
+        finally:
+            hashing.shutdown_password_hashing()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Mapa de ocupación: pintado con NumPy vs bucle por reserva, y tamaño de la respuesta.
+
+500 habitaciones x 2 años por defecto. Mide cargar el frame (BD), pintar
+la matriz, armar el payload y serializarlo; compara la matriz como una
+cadena por habitación (lo que devuelve el endpoint) contra listas JSON de
+enteros, en bytes y en gzip.
+
+    python -m bench.heatmap [--rooms 500] [--days 730]
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+from datetime import date, timedelta
+
+import numpy as np
+
+from bench.common import create_schema, header, report, seed_catalog, seed_reservations, seed_users, session, timed
+
+from app.core.responses import dumps
+from app.services.analytics_service import load_frame
+from app.services.occupancy_heatmap import PAID, PENDING, heatmap_payload, occupancy_matrix
+
+
+def python_matrix(f) -> list[list[int]]:
+    # sin NumPy: una celda por noche de cada reserva (lo que hoy haría el cliente con /blocked)
+    matrix = [[0] * f.days for _ in range(len(f.room_ids))]
+    for room, s, e, paid in zip(f.res_room.tolist(), f.res_start.tolist(), f.res_end.tolist(), f.res_paid.tolist()):
+        row = matrix[room]
+        for d in range(max(s, 0), min(e, f.days)):
+            if paid or row[d] != PAID:
+                row[d] = PAID if paid else PENDING
+    return matrix
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    create_schema()
+    rooms = seed_catalog(args.rooms, floors=10)
+    seed_users(10)
+    start = date.today() - timedelta(days=args.days // 2)
+    end = start + timedelta(days=args.days)
+    # cada habitación avanza ~3.5 días por reserva: cubre el rango entero
+    seed_reservations(int(args.rooms * args.days / 3.5), rooms, users=10, first_day=start - timedelta(days=5))
+
+    db = session()
+    frame = load_frame(db, start, end)
+    assert np.array_equal(occupancy_matrix(frame), np.array(python_matrix(frame), dtype=np.int8))
+
+    header(f"mapa de ocupación {args.rooms} habitaciones x {args.days} días ({len(frame.res_room)} reservas)")
+    report("load_frame (BD -> arrays)", timed(lambda: load_frame(db, start, end), args.repeat))
+    report("matriz: bucle Python por reserva", timed(lambda: python_matrix(frame), max(1, args.repeat // 5)))
+    report("matriz: NumPy (difference arrays)", timed(lambda: occupancy_matrix(frame), args.repeat))
+    report("heatmap_payload (matriz + filas + %)", timed(lambda: heatmap_payload(frame), args.repeat))
+
+    payload = heatmap_payload(frame)
+    as_lists = {**payload, "matrix": occupancy_matrix(frame).tolist()}
+    header("serialización de la respuesta (orjson)")
+    for label, content in (("matriz como cadenas (actual)", payload), ("matriz como listas de enteros", as_lists)):
+        body = dumps(content)
+        report(f"{label}: dumps", timed(lambda: dumps(content), args.repeat))
+        print(f"{'':<44} {len(body) / 2**20:8.2f} MiB  gzip={len(gzip.compress(body, 6)) / 2**20:8.2f} MiB")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
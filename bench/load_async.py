@@ -0,0 +1,150 @@
+"""Carga HTTP con clientes concurrentes: routers sync (threadpool) vs async (DB_ASYNC).
+
+Levanta uvicorn una vez por modo sobre la misma base y lanza `--clients`
+clientes httpx que piden /reservations/blocked, /reservations/me y /rooms en bucle.
+Cliente y servidor comparten CPU: para números reales, levantar la app en otra
+máquina sobre una base sembrada por este script y pasar --url (no lanza uvicorn).
+
+    python -m bench.load_async [--clients 200] [--seconds 15] [--rows 50000] [--url http://host:8000]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import timedelta
+
+from bench.common import (
+    ROOT,
+    create_schema,
+    header,
+    percentile,
+    seed_catalog,
+    seed_reservations,
+    seed_users,
+)
+
+import httpx
+
+from app.core.security import create_access_token
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(db_async: bool, port: int, workers: int) -> subprocess.Popen:
+    env = {**os.environ, "DB_ASYNC": "true" if db_async else "false", "SWEEPER_IN_APP": "false"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+
+
+async def _wait_ready(base: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(f"{base}/docs")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError("uvicorn no arrancó")
+
+
+async def _run_clients(base: str, paths: list[str], token: str, clients: int, seconds: float) -> tuple[list[float], int]:
+    latencies: list[float] = []
+    errors = 0
+    stop = time.monotonic() + seconds
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async def worker(client: httpx.AsyncClient, n: int) -> None:
+        nonlocal errors
+        i = n
+        while time.monotonic() < stop:
+            t0 = time.perf_counter()
+            try:
+                r = await client.get(base + paths[i % len(paths)], headers=headers)
+                ok = r.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - t0)
+            errors += not ok
+            i += 1
+
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        await asyncio.gather(*(worker(client, n) for n in range(clients)))
+    return latencies, errors
+
+
+def run_external(args, paths: list[str], token: str) -> None:
+    base = args.url.rstrip("/") + "/api/v1"
+    asyncio.run(_run_clients(base, paths, token, args.clients, 2))
+    latencies, errors = asyncio.run(_run_clients(base, paths, token, args.clients, args.seconds))
+    _print("servidor externo", latencies, errors, args.seconds)
+
+
+def _print(label: str, latencies: list[float], errors: int, seconds: float) -> None:
+    print(
+        f"{label:<24} {len(latencies) / seconds:8.0f} req/s  p50={percentile(latencies, 50) * 1000:8.1f} ms  "
+        f"p99={percentile(latencies, 99) * 1000:8.1f} ms  errores={errors}"
+    )
+
+
+def run_mode(db_async: bool, args, paths: list[str], token: str) -> None:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}/api/v1"
+    proc = _start_server(db_async, port, args.workers)
+    try:
+        asyncio.run(_wait_ready(f"http://127.0.0.1:{port}"))
+        asyncio.run(_run_clients(base, paths, token, args.clients, 2))  # calentamiento
+        latencies, errors = asyncio.run(_run_clients(base, paths, token, args.clients, args.seconds))
+    finally:
+        proc.terminate()
+        proc.wait(timeout=15)
+    _print("async (DB_ASYNC=true)" if db_async else "sync (threadpool)", latencies, errors, args.seconds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--mode", choices=("both", "sync", "async"), default="both")
+    parser.add_argument("--url", help="servidor ya levantado (sobre esta misma base)")
+    args = parser.parse_args()
+
+    create_schema()
+    rooms = seed_catalog(200, floors=10)
+    seed_users(50)
+    last = seed_reservations(args.rows, rooms, users=50)
+    start = last - timedelta(days=60)
+    paths = [
+        f"/reservations/blocked?start={start}&end={start + timedelta(days=30)}",
+        "/reservations/me?limit=50",
+        "/rooms",
+    ]
+    token = create_access_token(sub="user2@bench.local", role="cliente", expires_minutes=60, uid=2)
+
+    header(f"carga HTTP: {args.clients} clientes, {args.seconds:.0f} s, {args.workers} worker(s)")
+    if args.url:
+        run_external(args, paths, token)
+        return
+    for db_async in (False, True):
+        if args.mode != "both" and db_async != (args.mode == "async"):
+            continue
+        run_mode(db_async, args, paths, token)
+
+
+if __name__ == "__main__":
+    main()
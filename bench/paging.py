@@ -0,0 +1,73 @@
+"""Listado de reservas: todo (antes), OFFSET y keyset (ahora) a medida que crece la tabla.
+
+Mide la primera, la del medio y la última página con ?limit=100 en cada
+tamaño; con keyset el costo no depende de la página. También la lista
+completa sin límite (antes) y ?fields=id,status.
+
+    python -m bench.paging [--sizes 10000,100000,1000000]
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import timedelta
+
+from bench.common import create_schema, header, report, seed_catalog, seed_reservations, seed_users, session, timed
+
+from sqlalchemy import func, select
+
+from app.core.pagination import PageParams, keyset, select_columns
+from app.models.reservation import Reservation
+from app.schemas.reservation import ReservationOut
+
+LIMIT = 100
+
+
+def everything(db) -> int:
+    # implementación original: entidades ORM de toda la tabla
+    return len(db.execute(select(Reservation).order_by(Reservation.id.desc())).scalars().all())
+
+
+def offset_page(db, skip: int, fields: list[str] | None = None) -> int:
+    stmt = select(*select_columns(Reservation, ReservationOut, fields)).order_by(Reservation.id.desc())
+    return len(db.execute(stmt.offset(skip).limit(LIMIT + 1)).all())
+
+
+def keyset_page(db, cursor: int | None, fields: list[str] | None = None) -> int:
+    stmt = select(*select_columns(Reservation, ReservationOut, fields))
+    return len(db.execute(keyset(stmt, Reservation.id, PageParams(LIMIT, cursor, fields), descending=True)).all())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--full-max", type=int, default=100_000, help="lista completa solo hasta este tamaño")
+    args = parser.parse_args()
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+
+    create_schema()
+    rooms = seed_catalog(500, floors=10)
+    seed_users(100)
+    last, seeded = None, 0
+    for size in sizes:
+        # cada tanda empieza después de la anterior: sin solapes por habitación
+        last = seed_reservations(size - seeded, rooms, users=100, first_day=last and last + timedelta(days=1), seed=size)
+        seeded = size
+        db = session()
+        n = db.execute(select(func.count(Reservation.id))).scalar_one()
+        max_id = db.execute(select(func.max(Reservation.id))).scalar_one()
+        # cursor = id de la última fila de la página anterior (ids densos desde 1)
+        depths = {"primera": 0, "del medio": n // 2, "última": n - LIMIT}
+        header(f"GET /reservations?limit={LIMIT}, {n} reservas")
+        if n <= args.full_max:
+            report("antes: todas las filas (ORM)", timed(lambda: everything(db), max(1, args.repeat // 25)))
+        for label, skip in depths.items():
+            cursor = None if skip == 0 else max_id - skip + 1
+            report(f"página {label}: OFFSET {skip}", timed(lambda: offset_page(db, skip), args.repeat))
+            report(f"página {label}: keyset", timed(lambda: keyset_page(db, cursor), args.repeat))
+        report("página del medio: keyset fields=id,status", timed(lambda: keyset_page(db, max_id - n // 2 + 1, ["status"]), args.repeat))
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""GET /reservations/{id}/report: render en cada descarga (antes) vs caché por contenido + ETag (ahora).
+
+Simula clientes que vuelven a pedir comprobantes con If-None-Match mientras
+una parte de las reservas cambia entre rondas (nuevo contenido => nueva clave).
+Reporta la tasa de 304, aciertos de caché y renders, con su latencia.
+
+    python -m bench.pdf_cache [--reservations 200] [--requests 2000] [--change-rate 0.05]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from collections import defaultdict
+
+from bench.common import (
+    create_schema,
+    header,
+    report,
+    seed_catalog,
+    seed_reservations,
+    seed_users,
+    session,
+    timed,
+)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select, update
+
+from app.core.security import create_access_token
+from app.main import app
+from app.models.reservation import Reservation
+from app.services.pdf_cache import cached_rel_path, load_reservation_fields
+from app.services.pdf_generator import reservation_pdf_bytes
+from app.services.pdf_render import pdf_renderer
+from app.storage import storage
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reservations", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--revalidate", type=float, default=0.8, help="fracción de pedidos con If-None-Match")
+    parser.add_argument("--change-rate", type=float, default=0.05, help="fracción de reservas que cambia por ronda")
+    args = parser.parse_args()
+
+    create_schema()
+    rooms = seed_catalog(50, floors=5)
+    seed_users(1)
+    seed_reservations(args.reservations, rooms)
+    db = session()
+    ids = list(db.execute(select(Reservation.id)).scalars())
+    rnd = random.Random(7)
+
+    header(f"comprobante PDF: {len(ids)} reservas, {args.requests} descargas, {args.change_rate:.0%} cambian por ronda")
+    sample = load_reservation_fields(db, db.get(Reservation, ids[0]))
+    report("render de un PDF (reportlab)", timed(lambda: reservation_pdf_bytes(**sample), 50, warmup=3))
+
+    token = create_access_token(sub="user1@bench.local", role="admin", expires_minutes=60, uid=1)
+    auth = {"Authorization": f"Bearer {token}"}
+    etags: dict[int, str] = {}
+    samples: dict[str, list[float]] = defaultdict(list)
+    with TestClient(app) as client:
+        # antes: cada descarga renderizaba (se borra el PDF cacheado antes de pedirlo)
+        before = []
+        for rid in ids[:50]:
+            url = f"/api/v1/reservations/{rid}/report"
+            storage.delete(cached_rel_path(client.get(url, headers=auth).headers["ETag"].strip('"')))
+            t0 = time.perf_counter()
+            assert client.get(url, headers=auth).status_code == 200
+            before.append(time.perf_counter() - t0)
+        report("antes: 200 con render en cada descarga", before)
+
+        per_round = len(ids)
+        for i in range(args.requests):
+            if i and i % per_round == 0:
+                # entre rondas cambia una parte de las reservas (estado, total...)
+                changed = rnd.sample(ids, int(len(ids) * args.change_rate))
+                db.execute(
+                    update(Reservation)
+                    .where(Reservation.id.in_(changed))
+                    .values(costo_total=Reservation.costo_total + 1)
+                )
+                db.commit()
+            rid = rnd.choice(ids)
+            headers = dict(auth)
+            if rid in etags and rnd.random() < args.revalidate:
+                headers["If-None-Match"] = etags[rid]
+            renders = pdf_renderer.metrics.submitted
+            t0 = time.perf_counter()
+            r = client.get(f"/api/v1/reservations/{rid}/report", headers=headers)
+            elapsed = time.perf_counter() - t0
+            assert r.status_code in (200, 304), r.text
+            if r.status_code == 304:
+                kind = "304 (sin cuerpo)"
+            elif pdf_renderer.metrics.submitted == renders:
+                kind = "200 desde caché"
+            else:
+                kind = "200 con render"
+            samples[kind].append(elapsed)
+            etags[rid] = r.headers["ETag"]
+    db.close()
+
+    total = sum(len(v) for v in samples.values())
+    for kind in ("304 (sin cuerpo)", "200 desde caché", "200 con render"):
+        if samples[kind]:
+            report(f"ahora: {kind} {len(samples[kind]) / total:6.1%}", samples[kind])
+
+
+if __name__ == "__main__":
+    main()
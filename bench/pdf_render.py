@@ -0,0 +1,130 @@
+"""Costo de render por comprobante: estilos creados en cada llamada (antes) vs estilos de módulo (ahora),
+y comprobantes/s del lote generate_reservation_pdfs (separados y en un solo PDF).
+
+No usa la base de datos.
+
+    python -m bench.pdf_render [--repeat 300] [--batch 200]
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+from datetime import datetime
+from io import BytesIO
+
+from bench.common import report, timed
+
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import ListFlowable, ListItem, Paragraph, Spacer, Table, TableStyle
+
+from app.services.pdf_generator import (
+    RESERVATION_TEMPLATE_VERSION,
+    _build_doc,
+    generate_reservation_pdfs,
+    reservation_pdf_bytes,
+)
+
+FIELDS = {
+    "hotel_name": "Hotel Ventura",
+    "reservation_id": 1234,
+    "guest_fullname": "Ana Pérez",
+    "guest_email": "ana@example.com",
+    "room_numero": "204",
+    "room_tipo": "doble",
+    "fecha_inicio": "2025-03-01",
+    "fecha_fin": "2025-03-04",
+    "costo_total": "195.00",
+    "status": "paid",
+}
+
+
+def _styles():
+    styles = getSampleStyleSheet()
+    return (
+        ParagraphStyle("h1", parent=styles["Heading1"], spaceAfter=12),
+        ParagraphStyle("h2", parent=styles["Heading2"], spaceBefore=10, spaceAfter=8),
+        styles["BodyText"],
+    )
+
+
+def before(**f) -> bytes:
+    # implementación original de generate_reservation_pdf: hoja de estilos y TableStyle en cada llamada
+    h1, h2, body = _styles()
+    buf = BytesIO()
+    doc = _build_doc(buf)
+    tbl = Table(
+        [
+            ["Reserva #", str(f["reservation_id"])],
+            ["Huésped", f["guest_fullname"]],
+            ["Email", f["guest_email"]],
+            ["Habitación", f"{f['room_numero']} ({f['room_tipo']})"],
+            ["Fechas", f"{f['fecha_inicio']} → {f['fecha_fin']}"],
+            ["Total", f"${f['costo_total']}"],
+            ["Estado", f["status"]],
+        ],
+        colWidths=[110, 360],
+    )
+    tbl.setStyle(
+        TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (0, -1), colors.whitesmoke),
+                ("BOX", (0, 0), (-1, -1), 0.6, colors.grey),
+                ("INNERGRID", (0, 0), (-1, -1), 0.3, colors.lightgrey),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
+                ("FONTSIZE", (0, 0), (-1, -1), 10),
+                ("PADDING", (0, 0), (-1, -1), 6),
+            ]
+        )
+    )
+    rules = (
+        "Check-in/Check-out según política del hotel.",
+        "Presentar identificación al ingreso.",
+        "Política de mascotas: define si aplica (en el ejemplo se especifica que no se permiten).",
+    )
+    doc.build(
+        [
+            Paragraph(f"{f['hotel_name']} — Confirmación de Reserva", h1),
+            Paragraph("¡Gracias por su reserva! Este documento sirve como comprobante informativo.", body),
+            Spacer(1, 10),
+            tbl,
+            Spacer(1, 14),
+            Paragraph("Reglas rápidas", h2),
+            ListFlowable([ListItem(Paragraph(t, body), leftIndent=14) for t in rules], bulletType="bullet", leftIndent=18),
+            Spacer(1, 12),
+            Paragraph(
+                f"Documento generado: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC",
+                ParagraphStyle("small", parent=body, fontSize=9, textColor=colors.grey),
+            ),
+        ]
+    )
+    return buf.getvalue()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=300)
+    parser.add_argument("--batch", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"\n== render de comprobante PDF (plantilla v{RESERVATION_TEMPLATE_VERSION}) ==")
+    report("solo getSampleStyleSheet + estilos", timed(_styles, args.repeat, warmup=5))
+    report("antes (estilos en cada llamada)", timed(lambda: before(**FIELDS), args.repeat, warmup=5))
+    report("ahora (estilos de módulo)", timed(lambda: reservation_pdf_bytes(**FIELDS), args.repeat, warmup=5))
+
+    batch = [{**FIELDS, "reservation_id": 1000 + i} for i in range(args.batch)]
+    rounds = max(args.repeat // 30, 5)
+    print(f"\n== lote de {args.batch} comprobantes ==")
+    for label, fn in (
+        ("antes (before() uno por uno)", lambda: [before(**f) for f in batch]),
+        ("generate_reservation_pdfs", lambda: generate_reservation_pdfs(batch)),
+        ("generate_reservation_pdfs(merged=True)", lambda: generate_reservation_pdfs(batch, merged=True)),
+    ):
+        samples = timed(fn, rounds)
+        report(label, samples)
+        print(f"{'':<44} {args.batch / statistics.median(samples):,.0f} comprobantes/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""get_current_user: usuario completo desde la BD (antes) vs principal en caché (ahora).
+
+    python -m bench.principal [--users 100000] [--repeat 2000] [--threads 8]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.common import create_schema, header, report, seed_users, session, timed
+
+from app.core.config import settings
+from app.core.principal_cache import principal_cache
+from app.core.security import create_access_token, get_current_user
+from app.core.security import decode_token
+from app.models.user import User
+
+
+def before(db, token: str) -> User:
+    # implementación original: decode + User completo por email en cada request
+    sub = decode_token(token)["sub"]
+    return db.query(User).filter(User.email == sub).first()
+
+
+def throughput(fn, threads: int, per_thread: int) -> float:
+    def loop(_):
+        for _ in range(per_thread):
+            fn()
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(loop, range(threads)))
+    return threads * per_thread / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    create_schema()
+    seed_users(args.users)
+    sub = f"user{args.users // 2}@bench.local"
+    token = create_access_token(sub=sub, role="cliente", expires_minutes=60, uid=args.users // 2)
+
+    header(f"get_current_user: {args.users} usuarios")
+    db = session()
+    try:
+        def miss():
+            principal_cache.clear()
+            return get_current_user(db, token)
+
+        def hit():
+            return get_current_user(db, token)
+
+        report("antes (User completo por request)", timed(lambda: before(db, token), args.repeat))
+        report("fallo de caché (3 columnas)", timed(miss, args.repeat))
+        principal_cache.clear()
+        report("acierto de caché", timed(hit, args.repeat))
+        settings.AUTH_TRUST_TOKEN_CLAIMS = True
+        try:
+            report("AUTH_TRUST_TOKEN_CLAIMS=true", timed(hit, args.repeat))
+        finally:
+            settings.AUTH_TRUST_TOKEN_CLAIMS = False
+        print(f"caché: {principal_cache.stats()}")
+
+        # el lock de la caché con varios hilos (como el threadpool de los routers sync)
+        per_thread = max(1, args.repeat // args.threads)
+
+        def before_thread():
+            s = session()
+            try:
+                before(s, token)
+            finally:
+                s.close()
+
+        print(f"{'antes, ' + str(args.threads) + ' hilos':<44} {throughput(before_thread, args.threads, per_thread):10.0f} req/s")
+        print(f"{'acierto, ' + str(args.threads) + ' hilos':<44} {throughput(hit, args.threads, per_thread):10.0f} req/s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Totales del reporte: SUM sobre reservations (antes) vs daily_revenue_rollup (ahora).
+
+Siembra varios años de reservas, reconstruye el rollup y mide los totales +
+conteo por tipo de un mes, un año y todo el histórico. También mide cuánto
+suma el rollup al flush de una captura (pending -> paid).
+
+    python -m bench.rollup [--rows 1000000] [--years 8]
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+from datetime import date, timedelta
+
+from bench.common import create_schema, header, report, seed_catalog, seed_reservations, seed_users, session, timed
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app.models.reservation import Reservation
+from app.models.room import Room
+from app.models.room_type import RoomType
+from app.services import revenue_rollup
+from app.services.reports_service import _by_tipo_stmt, _paid_in_range, _totals_stmt
+
+
+def scan(db, start: date, end: date):
+    # implementación original: agregados sobre las reservas del rango
+    totals = db.execute(
+        select(func.count(Reservation.id), func.coalesce(func.sum(Reservation.costo_total), 0)).where(
+            *_paid_in_range(start, end)
+        )
+    ).one()
+    by_tipo = db.execute(
+        select(RoomType.tipo, func.count(Reservation.id))
+        .join(Room, Room.id == Reservation.room_id)
+        .join(RoomType, RoomType.id == Room.room_type_id)
+        .where(*_paid_in_range(start, end))
+        .group_by(RoomType.tipo)
+        .order_by(RoomType.tipo.asc())
+    ).all()
+    return tuple(totals), [tuple(r) for r in by_tipo]
+
+
+def rollup(db, start: date, end: date):
+    totals = db.execute(_totals_stmt(start, end)).one()
+    by_tipo = db.execute(_by_tipo_stmt(start, end)).all()
+    return tuple(totals), [tuple(r) for r in by_tipo]
+
+
+def capture(db, ids) -> None:
+    # pending -> paid y vuelta, una reserva por flush
+    res = db.get(Reservation, next(ids))
+    res.status = "pending" if res.status == "paid" else "paid"
+    db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--years", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    revenue_rollup.install()
+    create_schema()
+    # cada habitación avanza ~3.5 días por reserva: las filas cubren `years` años
+    rooms = seed_catalog(max(10, int(args.rows * 3.5 / (365 * args.years))), floors=10)
+    seed_users(100)
+    first = date.today() - timedelta(days=365 * args.years)
+    last = seed_reservations(args.rows, rooms, users=100, first_day=first)
+    db = session()
+    days = revenue_rollup.rebuild(db)
+    print(f"rollup: {days} filas (día x tipo) para {args.rows} reservas")
+
+    mid = first + (last - first) / 2
+    ranges = {
+        "un mes": (mid.replace(day=1), (mid.replace(day=1) + timedelta(days=32)).replace(day=1)),
+        "un año": (date(mid.year, 1, 1), date(mid.year + 1, 1, 1)),
+        f"todo ({args.years} años)": (first - timedelta(days=60), last + timedelta(days=1)),
+    }
+    header(f"totales + conteo por tipo, {args.rows} reservas")
+    for label, (start, end) in ranges.items():
+        before, after = scan(db, start, end), rollup(db, start, end)
+        assert (before[0][0], float(before[0][1]), before[1]) == (after[0][0], float(after[0][1]), after[1]), label
+        report(f"{label}: scan de reservations", timed(lambda: scan(db, start, end), args.repeat))
+        report(f"{label}: daily_revenue_rollup", timed(lambda: rollup(db, start, end), args.repeat))
+    db.rollback()
+
+    ids = itertools.cycle(db.execute(select(Reservation.id).where(Reservation.status == "pending").limit(1000)).scalars().all())
+    db.commit()
+    header("captura (un flush por reserva)")
+    report("con listeners del rollup", timed(lambda: capture(db, ids), args.repeat * 10))
+    event.remove(Session, "before_flush", revenue_rollup._before_flush)
+    event.remove(Session, "after_flush", revenue_rollup._after_flush)
+    report("sin listeners", timed(lambda: capture(db, ids), args.repeat * 10))
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""GET /reservations: entidades ORM + response_model + json (antes) vs columnas + orjson (ahora).
+
+Serializa 100k reservas por los dos caminos, por etapas, y con --profile
+imprime las funciones más caras de cada uno (cProfile). Al final mide el
+endpoint real con ?limit=1000 y RESPONSE_VALIDATION=true/false.
+
+    python -m bench.serialize [--rows 100000] [--profile]
+"""
+from __future__ import annotations
+
+import argparse
+import cProfile
+import pstats
+
+from bench.common import create_schema, header, report, seed_catalog, seed_reservations, seed_users, session, timed
+
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.pagination import select_columns
+from app.core.responses import dumps, row_dicts
+from app.core.security import create_access_token
+from app.models.reservation import Reservation
+from app.schemas.reservation import ReservationOut
+
+adapter = TypeAdapter(list[ReservationOut])
+
+
+def orm_rows(db):
+    return db.execute(select(Reservation).order_by(Reservation.id.desc())).scalars().all()
+
+
+def column_rows(db):
+    stmt = select(*select_columns(Reservation, ReservationOut, None)).order_by(Reservation.id.desc())
+    return db.execute(stmt).all()
+
+
+def before(db) -> bytes:
+    # lo que hacía FastAPI: validar cada entidad (from_attributes), serializar en modo json y json.dumps
+    objs = orm_rows(db)
+    content = adapter.dump_python(adapter.validate_python(objs, from_attributes=True), mode="json")
+    db.expunge_all()
+    return JSONResponse(content).body
+
+
+def now(db) -> bytes:
+    return dumps(row_dicts(column_rows(db)))
+
+
+def profile(label: str, fn, db) -> None:
+    prof = cProfile.Profile()
+    prof.enable()
+    fn(db)
+    prof.disable()
+    print(f"\n-- perfil: {label} --")
+    pstats.Stats(prof).sort_stats("tottime").print_stats(8)
+
+
+def endpoint(rows: int, repeat: int) -> None:
+    from app.main import app
+
+    token = create_access_token(sub="user1@bench.local", role="admin", expires_minutes=60, uid=1)
+    headers = {"Authorization": f"Bearer {token}"}
+    url = f"/api/v1/reservations?limit={settings.PAGE_MAX_LIMIT}"
+    header(f"GET {url} ({rows} reservas)")
+    with TestClient(app) as client:
+        for validate in (True, False):
+            settings.RESPONSE_VALIDATION = validate
+            assert client.get(url, headers=headers).status_code == 200
+            label = "response_model (RESPONSE_VALIDATION=true)" if validate else "orjson directo (por defecto)"
+            report(label, timed(lambda: client.get(url, headers=headers), repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--profile", action="store_true")
+    args = parser.parse_args()
+
+    create_schema()
+    rooms = seed_catalog(500, floors=10)
+    seed_users(100)
+    seed_reservations(args.rows, rooms, users=100)
+
+    db = session()
+    assert adapter.validate_json(before(db)) == adapter.validate_json(now(db))
+    header(f"serializar {args.rows} reservas")
+    report("antes: SELECT entidades ORM", timed(lambda: (orm_rows(db), db.expunge_all()), args.repeat))
+    report("ahora: SELECT por columnas", timed(lambda: column_rows(db), args.repeat))
+    report("antes: total (ORM + validación + json)", timed(lambda: before(db), args.repeat))
+    report("ahora: total (columnas + orjson)", timed(lambda: now(db), args.repeat))
+    if args.profile:
+        profile("antes", before, db)
+        profile("ahora", now, db)
+    db.close()
+
+    endpoint(args.rows, args.repeat * 10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Barrido de holds vencidos: cuánto tarda sweep_expired_holds con N pending vencidas.
+
+Siembra N reservas pending con expires_at en el pasado (más algunas pagadas
+que no se tocan) y mide el barrido completo para varios tamaños de lote.
+
+    python -m bench.sweep [--rows 100000] [--batch 1000 5000 20000]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import date, datetime, timedelta
+
+from bench.common import create_schema, header, seed_catalog, seed_reservations, seed_users, session
+
+from sqlalchemy import func, select, update
+
+from app.models.reservation import Reservation
+from app.services.expiry_sweeper import sweep_expired_holds
+
+
+def seed(rows: int, rooms: list[int]) -> int:
+    create_schema()
+    seed_catalog(len(rooms))
+    seed_users(10)
+    seed_reservations(rows, rooms, users=10, first_day=date.today(), statuses=("pending",) * 19 + ("paid",))
+    db = session()
+    stale = datetime.utcnow() - timedelta(hours=1)
+    db.execute(update(Reservation).where(Reservation.status == "pending").values(expires_at=stale))
+    db.commit()
+    pending = db.execute(select(func.count()).where(Reservation.status == "pending")).scalar_one()
+    db.close()
+    return pending
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--batch", type=int, nargs="+", default=[1000, 5000, 20_000])
+    args = parser.parse_args()
+
+    rooms = list(range(1, args.rooms + 1))
+    header(f"barrido de holds vencidos, {args.rows} reservas")
+    for batch in args.batch:
+        pending = seed(args.rows, rooms)
+        db = session()
+        t0 = time.perf_counter()
+        cancelled = sweep_expired_holds(db, batch_size=batch)
+        elapsed = time.perf_counter() - t0
+        db.close()
+        assert cancelled == pending, (cancelled, pending)
+        print(f"lote {batch:>6}: {cancelled} canceladas en {elapsed:.2f} s ({cancelled / elapsed:,.0f} filas/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Fixtures de la suite.
+
+Por defecto corre contra una base SQLite temporal con los routers sync.
+  TEST_DATABASE_URL=postgresql://...  Postgres (base de pruebas vacía: el
+                                      esquema sale de alembic y se trunca en cada test)
+  TEST_DB_ASYNC=true                  routers y servicios async
+Los tests marcados `postgres` se saltan con SQLite y los `db_async` sin TEST_DB_ASYNC.
+El entorno se fija aquí, antes de importar app.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+_TMP = Path(tempfile.mkdtemp(prefix="hotel-tests-"))
+
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL") or f"sqlite:///{_TMP / 'test.db'}"
+os.environ["DB_ASYNC"] = os.environ.get("TEST_DB_ASYNC", "false")
+os.environ["STORAGE_DIR"] = str(_TMP / "storage")
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["SECRET_KEY"] = "test-secret-key-" + "x" * 32
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["PASSWORD_HASH_TARGET_MS"] = "0"
+os.environ["PDF_RENDER_WORKERS"] = "0"
+os.environ["SWEEPER_IN_APP"] = "false"
+os.environ["PAYPAL_CHECKOUT_ASYNC"] = "false"
+# el test de concurrencia abre muchas conexiones a la vez
+os.environ.setdefault("DB_POOL_SIZE", "20")
+os.environ.setdefault("DB_MAX_OVERFLOW", "40")
+
+from datetime import date, timedelta  # noqa: E402
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import delete, insert, text  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.database import SessionLocal, engine  # noqa: E402
+from app.core.principal_cache import principal_cache  # noqa: E402
+from app.core.security import create_access_token, hash_password  # noqa: E402
+import app.main  # noqa: E402,F401  (instala los listeners de Session)
+from app.models.base import Base  # noqa: E402
+import app.models  # noqa: E402,F401
+from app.models.room import Room  # noqa: E402
+from app.models.room_type import RoomType  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.availability_index import availability_index  # noqa: E402
+from app.services.catalog_cache import catalog_cache  # noqa: E402
+
+IS_POSTGRES = engine.dialect.name == "postgresql"
+PASSWORD = "password1"
+
+
+def pytest_collection_modifyitems(config, items):
+    skip_pg = pytest.mark.skip(reason="necesita Postgres (TEST_DATABASE_URL)")
+    skip_async = pytest.mark.skip(reason="necesita TEST_DB_ASYNC=true")
+    skip_sync = pytest.mark.skip(reason="solo con routers sync")
+    for item in items:
+        if "postgres" in item.keywords and not IS_POSTGRES:
+            item.add_marker(skip_pg)
+        if "db_async" in item.keywords and not settings.DB_ASYNC:
+            item.add_marker(skip_async)
+        if "db_sync" in item.keywords and settings.DB_ASYNC:
+            item.add_marker(skip_sync)
+
+
+def patch_paypal(monkeypatch, name: str, fn) -> None:
+    """Reemplaza paypal_service.<name> y <name>_async (la que usan los routers async).
+
+    La variante async corre fn en un hilo: fn puede llamar al TestClient o abrir sesiones sync.
+    """
+    from app.services import paypal_service
+
+    async def in_thread(*args, **kwargs):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    monkeypatch.setattr(paypal_service, name, fn)
+    monkeypatch.setattr(paypal_service, f"{name}_async", in_thread)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _schema():
+    if IS_POSTGRES:
+        from alembic import command
+        from alembic.config import Config
+
+        cfg = Config(str(ROOT / "alembic.ini"))
+        cfg.set_main_option("script_location", str(ROOT / "alembic"))
+        command.upgrade(cfg, "head")
+    else:
+        Base.metadata.create_all(engine)
+    yield
+    engine.dispose()
+    shutil.rmtree(_TMP, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def _clean():
+    """Cada test arranca con tablas, storage y cachés en memoria vacíos."""
+    with engine.begin() as conn:
+        if IS_POSTGRES:
+            names = ", ".join(t.name for t in Base.metadata.sorted_tables)
+            conn.execute(text(f"TRUNCATE {names} RESTART IDENTITY CASCADE"))
+        else:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(delete(table))
+    shutil.rmtree(settings.STORAGE_DIR, ignore_errors=True)
+    availability_index.invalidate()
+    catalog_cache.bump()
+    principal_cache.clear()
+    yield
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def async_session_factory():
+    """AsyncSession contra la misma base, aunque la app corra en modo sync."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(settings.ASYNC_DATABASE_URL)
+    yield async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    async_engine.sync_engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def catalog() -> dict:
+    """3 tipos (40/65/90 por noche) y 3 habitaciones, una de cada tipo."""
+    with engine.begin() as conn:
+        conn.execute(
+            insert(RoomType),
+            [
+                {"id": 1, "tipo": "simple", "capacidad_personas": 1, "precio_noche": 40},
+                {"id": 2, "tipo": "doble", "capacidad_personas": 2, "precio_noche": 65},
+                {"id": 3, "tipo": "triple", "capacidad_personas": 3, "precio_noche": 90},
+            ],
+        )
+        conn.execute(
+            insert(Room),
+            [{"id": i, "numero": str(100 + i), "piso": 1, "room_type_id": i} for i in (1, 2, 3)],
+        )
+        if IS_POSTGRES:
+            # ids explícitos: las secuencias siguen desde ahí
+            conn.execute(text("SELECT setval('room_types_id_seq', 3), setval('rooms_id_seq', 3)"))
+    return {"rooms": [1, 2, 3], "price": {1: 40, 2: 65, 3: 90}}
+
+
+def _user(id_: int, role: str) -> dict:
+    return {
+        "id": id_,
+        "nombre": role.title(),
+        "apellido": "Pruebas",
+        "email": f"{role}{id_}@test.local",
+        "cedula": f"{id_:010d}",
+        "telefono": "0999999999",
+        "password_hash": hash_password(PASSWORD),
+        "role": role,
+    }
+
+
+@pytest.fixture
+def users() -> dict:
+    """Un admin (id 1) y un cliente (id 2), con sus headers de autorización."""
+    rows = [_user(1, "admin"), _user(2, "cliente")]
+    with engine.begin() as conn:
+        conn.execute(insert(User), rows)
+        if IS_POSTGRES:
+            conn.execute(text("SELECT setval('users_id_seq', 2)"))
+    out = {}
+    for row in rows:
+        token = create_access_token(sub=row["email"], role=row["role"], expires_minutes=60, uid=row["id"])
+        out[row["role"]] = {"id": row["id"], "email": row["email"], "headers": {"Authorization": f"Bearer {token}"}}
+    return out
+
+
+@pytest.fixture
+def stay() -> tuple[date, date]:
+    start = date.today() + timedelta(days=10)
+    return start, start + timedelta(days=3)
@@ -0,0 +1,96 @@
+"""Servidor PayPal falso (http.server en un hilo) para probar PayPalClient.
+
+Cada ruta tiene una cola de respuestas (status, body, demora); cuando se
+vacía, repite la última. Guarda cada request recibido en `calls`.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TOKEN_PATH = "/v1/oauth2/token"
+ORDERS_PATH = "/v2/checkout/orders"
+
+
+@dataclass
+class Call:
+    path: str
+    headers: dict
+    body: bytes
+    at: float = field(default_factory=time.monotonic)
+
+
+class FakePayPal:
+    def __init__(self):
+        self.calls: list[Call] = []
+        self._script: dict[str, list[tuple[int, dict, float]]] = {}
+        self._lock = threading.Lock()
+        self._tokens = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.respond(TOKEN_PATH, (200, None))
+        self.respond(ORDERS_PATH, (201, {"id": "ORDER-1", "status": "CREATED"}))
+
+    def respond(self, path: str, *responses, delay: float = 0.0) -> None:
+        """Cada respuesta: un status, (status, body) o (status, body, demora).
+
+        En TOKEN_PATH, body None = token nuevo (token-1, token-2...) con expires_in 3600.
+        """
+        script = []
+        for r in responses:
+            status, body, *rest = r if isinstance(r, tuple) else (r, {"name": "ERROR"})
+            script.append((status, body, rest[0] if rest else delay))
+        with self._lock:
+            self._script[path] = script
+
+    def calls_to(self, path: str) -> list[Call]:
+        with self._lock:
+            return [c for c in self.calls if c.path == path]
+
+    def _next(self, path: str) -> tuple[int, dict, float]:
+        with self._lock:
+            script = self._script.get(path) or [(404, {"name": "NOT_FOUND"}, 0.0)]
+            status, body, delay = script.pop(0) if len(script) > 1 else script[0]
+            if path == TOKEN_PATH and status == 200 and body is None:
+                self._tokens += 1
+                body = {"access_token": f"token-{self._tokens}", "expires_in": 3600}
+            return status, body, delay
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):  # noqa: N802
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                path = ORDERS_PATH if self.path.startswith(ORDERS_PATH) else self.path
+                with fake._lock:
+                    fake.calls.append(Call(path, dict(self.headers), body))
+                status, payload, delay = fake._next(path)
+                if delay:
+                    time.sleep(delay)
+                data = json.dumps(payload).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # el cliente cortó por timeout
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakePayPal":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
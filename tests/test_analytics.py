@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from app.services.reservations_service import create_pending_reservation
+
+
+def test_analytics_json_totals(client, db, catalog, users, stay):
+    start, end = stay
+    paid = create_pending_reservation(db, user_id=users["cliente"]["id"], room_id=1, start=start, end=end)
+    create_pending_reservation(db, user_id=users["cliente"]["id"], room_id=2, start=start, end=end)
+    paid.status = "paid"
+    db.commit()
+
+    r = client.get(
+        "/api/v1/reports/analytics",
+        params={"start": start.isoformat(), "end": end.isoformat(), "group_by": "room_type"},
+        headers=users["admin"]["headers"],
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/json"
+    body = r.json()
+    assert (body["start"], body["end"], body["group_by"]) == (start.isoformat(), end.isoformat(), "room_type")
+    rows = {row["group"]: row for row in body["rows"]}
+    assert (rows["simple"]["booked_nights"], rows["simple"]["paid_nights"], rows["simple"]["revenue"]) == (3, 3, 120.0)
+    assert (rows["doble"]["booked_nights"], rows["doble"]["paid_nights"], rows["doble"]["revenue"]) == (3, 0, 0.0)
+    assert rows["simple"]["available_room_nights"] == 3
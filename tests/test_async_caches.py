@@ -0,0 +1,50 @@
+"""Cachés en memoria usadas desde corrutinas (db.run_sync corre en el hilo del event loop)."""
+from __future__ import annotations
+
+import asyncio
+import threading
+
+from app.services.availability_index import availability_index
+from app.services.catalog_cache import catalog_cache, get_catalog_async
+
+
+def _run_with_deadline(coro, seconds: float = 10):
+    # si el event loop se bloquea, wait_for tampoco despierta: se vigila desde otro hilo
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(value=asyncio.run(coro)), daemon=True)
+    thread.start()
+    thread.join(seconds)
+    assert not thread.is_alive(), "el event loop quedó bloqueado"
+    return result["value"]
+
+
+def test_concurrent_catalog_reloads_do_not_block_the_loop(catalog, async_session_factory):
+    async def main():
+        async def one():
+            async with async_session_factory() as db:
+                return await get_catalog_async(db)
+
+        catalog_cache.bump()
+        return await asyncio.gather(*(one() for _ in range(30)))
+
+    snaps = _run_with_deadline(main())
+    assert {len(s.rooms.items) for s in snaps} == {3}
+    assert catalog_cache.current() is not None
+
+
+def test_concurrent_index_loads_do_not_block_the_loop(catalog, async_session_factory, stay):
+    async def main():
+        async def rebuild():
+            async with async_session_factory() as db:
+                await db.run_sync(availability_index.rebuild)
+
+        async def refresh(room_id: int):
+            async with async_session_factory() as db:
+                await db.run_sync(availability_index.refresh_room, room_id)
+
+        await rebuild()
+        await asyncio.gather(*(rebuild() for _ in range(10)), *(refresh(1 + i % 3) for i in range(20)))
+
+    _run_with_deadline(main())
+    assert availability_index.free_rooms(*stay) == [1, 2, 3]
+
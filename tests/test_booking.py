@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.database import SessionLocal, engine
+from app.models.reservation import Reservation
+from app.services.availability_index import availability_index
+from app.services.reservations_service import (
+    create_pending_reservation,
+    has_overlap_excluding,
+    is_overlap_violation,
+    update_reservation_admin,
+)
+
+
+def test_booking_prices_in_the_same_statement(db, catalog, users, stay):
+    start, end = stay
+    res = create_pending_reservation(db, user_id=users["cliente"]["id"], room_id=2, start=start, end=end)
+    assert res.status == "pending"
+    assert float(res.costo_total) == 3 * catalog["price"][2]
+    assert res.expires_at is not None
+
+
+def test_booking_rejects_overlap_and_unknown_room(db, catalog, users, stay):
+    start, end = stay
+    uid = users["cliente"]["id"]
+    create_pending_reservation(db, user_id=uid, room_id=1, start=start, end=end)
+    with pytest.raises(ValueError, match="reservada"):
+        create_pending_reservation(db, user_id=uid, room_id=1, start=start + timedelta(days=1), end=end + timedelta(days=1))
+    with pytest.raises(ValueError, match="no existe"):
+        create_pending_reservation(db, user_id=uid, room_id=99, start=start, end=end)
+    # back-to-back sí se permite
+    create_pending_reservation(db, user_id=uid, room_id=1, start=end, end=end + timedelta(days=2))
+
+
+@pytest.mark.postgres
+def test_parallel_bookings_for_the_same_room_have_one_winner(catalog, users, stay):
+    start, end = stay
+    attempts = 300
+
+    def book(i: int):
+        db = SessionLocal()
+        try:
+            # rangos distintos pero todos solapan la noche start+1
+            create_pending_reservation(
+                db,
+                user_id=users["cliente"]["id"],
+                room_id=1,
+                start=start + timedelta(days=i % 2),
+                end=end + timedelta(days=i % 3),
+            )
+            return None
+        except ValueError as e:
+            return e
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=48) as pool:
+        outcomes = list(pool.map(book, range(attempts)))
+
+    errors = [o for o in outcomes if o is not None]
+    assert len(errors) == attempts - 1
+    assert all("reservada" in str(e) for e in errors)
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(Reservation)).scalar_one() == 1
+
+
+@pytest.mark.postgres
+def test_exclusion_constraint_rejects_overlap_without_the_not_exists_check(catalog, users, stay):
+    # el NOT EXISTS no ve inserts sin commit de otras transacciones: el EXCLUDE es la garantía
+    start, end = stay
+    row = {
+        "user_id": users["cliente"]["id"],
+        "room_id": 1,
+        "fecha_inicio": start,
+        "fecha_fin": end,
+        "costo_total": 120,
+        "status": "pending",
+    }
+    with engine.begin() as conn:
+        conn.execute(insert(Reservation), row)
+    with pytest.raises(IntegrityError) as exc:
+        with engine.begin() as conn:
+            conn.execute(insert(Reservation), {**row, "fecha_inicio": start + timedelta(days=1)})
+    assert is_overlap_violation(exc.value)
+    # cancelada no bloquea
+    with engine.begin() as conn:
+        conn.execute(insert(Reservation), {**row, "status": "cancelled"})
+
+
+def test_index_answers_is_free_after_booking(db, catalog, users, stay):
+    start, end = stay
+    create_pending_reservation(db, user_id=users["cliente"]["id"], room_id=1, start=start, end=end)
+    availability_index.ensure_current(db)
+    assert availability_index.is_free(1, start + timedelta(days=1), end) is False
+    assert availability_index.is_free(1, end, end + timedelta(days=2)) is True
+    assert availability_index.is_free(2, start, end) is True
+
+
+def test_admin_update_into_a_taken_range_is_rejected(db, catalog, users, stay):
+    start, end = stay
+    uid = users["cliente"]["id"]
+    create_pending_reservation(db, user_id=uid, room_id=1, start=start, end=end)
+    other = create_pending_reservation(db, user_id=uid, room_id=2, start=start, end=end)
+    assert not has_overlap_excluding(db, reservation_id=other.id, room_id=2, start=start, end=end)
+    with pytest.raises(ValueError, match="reservada"):
+        update_reservation_admin(db, other, room_id=1)
+    moved = update_reservation_admin(db, other, room_id=3)
+    assert moved.room_id == 3
+    availability_index.ensure_current(db)
+    assert availability_index.is_free(2, start, end) is True
+    assert availability_index.is_free(3, start, end) is False
+
+
+@pytest.mark.postgres
+def test_stale_index_is_caught_by_the_exclusion_constraint(db, catalog, users, stay):
+    # el índice dice "libre" (no se enteró del INSERT directo): decide el EXCLUDE al commit
+    start, end = stay
+    uid = users["cliente"]["id"]
+    availability_index.ensure_current(db)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Reservation),
+            {"user_id": uid, "room_id": 1, "fecha_inicio": start, "fecha_fin": end, "costo_total": 120, "status": "paid"},
+        )
+    other = create_pending_reservation(db, user_id=uid, room_id=2, start=start, end=end)
+    availability_index.invalidate()
+    availability_index.ensure_current(db)
+    availability_index._bits[1] = 0  # foto vieja
+    assert has_overlap_excluding(db, reservation_id=other.id, room_id=1, start=start, end=end) is False
+    with pytest.raises(ValueError, match="reservada"):
+        update_reservation_admin(db, other, room_id=1)
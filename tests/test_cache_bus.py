@@ -0,0 +1,79 @@
+"""Avisos del cache_bus por las reservas creadas con INSERT ... SELECT (el flush no las ve)."""
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services import cache_bus
+from app.services.reservations_service import create_pending_reservation, create_pending_reservation_async
+
+
+def _events(payloads) -> set:
+    return {e for p in payloads for e in cache_bus.decode(p)}
+
+
+@pytest.fixture
+def published(monkeypatch):
+    if cache_bus.backend_name() != "local":
+        pytest.skip("backend local (sqlite)")
+    out: list[str] = []
+    monkeypatch.setattr(cache_bus.local_bus, "publish", out.append)
+    return out
+
+
+def test_booking_notifies_its_room_on_commit(db, catalog, users, stay, published):
+    create_pending_reservation(db, user_id=users["cliente"]["id"], room_id=2, start=stay[0], end=stay[1])
+    assert _events(published) == {("availability", 2)}
+
+
+def test_uncommitted_booking_notifies_when_the_caller_commits(db, catalog, users, stay, published):
+    uid = users["cliente"]["id"]
+    create_pending_reservation(db, user_id=uid, room_id=1, start=stay[0], end=stay[1], commit=False)
+    assert published == []
+    db.rollback()
+    create_pending_reservation(db, user_id=uid, room_id=3, start=stay[0], end=stay[1], commit=False)
+    db.commit()
+    assert _events(published) == {("availability", 3)}
+
+
+def test_async_booking_notifies_its_room(catalog, users, stay, published, async_session_factory):
+    async def main():
+        async with async_session_factory() as db:
+            await create_pending_reservation_async(db, user_id=users["cliente"]["id"], room_id=1, start=stay[0], end=stay[1])
+
+    asyncio.run(main())
+    assert _events(published) == {("availability", 1)}
+
+
+def test_listener_applies_the_booking_notice(client, db, catalog, users, stay, monkeypatch):
+    # el lifespan del client escucha el bus (local o LISTEN de Postgres)
+    applied: list = []
+    apply = cache_bus.apply
+
+    async def spy(events):
+        applied.extend(events or ())
+        await apply(events)
+
+    monkeypatch.setattr(cache_bus, "apply", spy)
+    create_pending_reservation(db, user_id=users["cliente"]["id"], room_id=3, start=stay[0], end=stay[1])
+    deadline = time.monotonic() + 5
+    while ("availability", 3) not in applied and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert ("availability", 3) in applied
+
+
+@pytest.mark.postgres
+def test_postgres_notice_is_sent_only_on_commit(db, catalog, users, stay):
+    import psycopg
+
+    uid = users["cliente"]["id"]
+    with psycopg.connect(cache_bus._listen_dsn(), autocommit=True) as conn:
+        conn.execute(f'LISTEN "{settings.CACHE_BUS_CHANNEL}"')
+        create_pending_reservation(db, user_id=uid, room_id=1, start=stay[0], end=stay[1], commit=False)
+        db.rollback()
+        create_pending_reservation(db, user_id=uid, room_id=2, start=stay[0], end=stay[1])
+        payloads = [n.payload for n in conn.notifies(timeout=5, stop_after=1)]
+    assert _events(payloads) == {("availability", 2)}
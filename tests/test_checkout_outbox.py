@@ -0,0 +1,117 @@
+"""Checkout async: outbox de órdenes PayPal, lease, reintentos y GET /orders/{id}."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.models.payment_outbox import PaymentOutbox
+from app.models.reservation import Reservation
+from app.services import checkout_outbox
+from app.services.reservations_service import create_pending_reservation
+from tests.conftest import patch_paypal
+
+ORDER = {"id": "ORDER-1", "status": "CREATED", "links": [{"rel": "approve", "href": "https://paypal.test/approve"}]}
+
+
+@pytest.fixture
+def async_checkout(monkeypatch):
+    monkeypatch.setattr(settings, "PAYPAL_CHECKOUT_ASYNC", True)
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "OUTBOX_RETRY_BACKOFF", 10.0)
+
+
+@pytest.fixture
+def queued(client, catalog, users, stay, async_checkout) -> int:
+    r = client.post(
+        "/api/v1/payments/paypal/create-order",
+        json={"room_id": 1, "fecha_inicio": stay[0].isoformat(), "fecha_fin": stay[1].isoformat()},
+        headers=users["cliente"]["headers"],
+    )
+    assert r.status_code == 202
+    assert r.json()["status"] == "queued"
+    return r.json()["reservation_id"]
+
+
+def _entry(db, reservation_id: int) -> PaymentOutbox:
+    db.expire_all()
+    return db.execute(select(PaymentOutbox).where(PaymentOutbox.reservation_id == reservation_id)).scalar_one()
+
+
+def _order_status(client, users, reservation_id: int) -> dict:
+    r = client.get(f"/api/v1/payments/paypal/orders/{reservation_id}", headers=users["cliente"]["headers"])
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_create_order_enqueues_without_calling_paypal(client, db, users, queued, monkeypatch):
+    patch_paypal(monkeypatch, "create_order", lambda **kw: pytest.fail("PayPal en el request"))
+    entry = _entry(db, queued)
+    assert (entry.status, entry.attempts) == ("pending", 0)
+    assert db.get(Reservation, queued).status == "pending"
+    assert _order_status(client, users, queued)["status"] == "queued"
+
+
+def test_claimed_rows_are_leased(db, queued):
+    assert checkout_outbox.claim_batch(db, 10, lease_seconds=60) == [_entry(db, queued).id]
+    assert checkout_outbox.claim_batch(db, 10, lease_seconds=60) == []
+    # el worker murió: al vencer el lease la fila vuelve a estar disponible
+    db.execute(update(PaymentOutbox).values(available_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.commit()
+    assert checkout_outbox.claim_batch(db, 10, lease_seconds=60) == [_entry(db, queued).id]
+
+
+def test_worker_creates_the_order(client, db, users, queued, monkeypatch):
+    calls = []
+    patch_paypal(monkeypatch, "create_order", lambda **kw: calls.append(kw) or ORDER)
+    assert checkout_outbox.drain_once() == 1
+    assert calls[0]["request_id"] == f"reserva-{queued}"
+    assert _entry(db, queued).status == "done"
+    body = _order_status(client, users, queued)
+    assert body["status"] == "ready"
+    assert body["paypal_order_id"] == "ORDER-1"
+    assert body["approve_url"] == "https://paypal.test/approve"
+
+
+def test_paypal_errors_are_retried_with_backoff(client, db, users, queued, monkeypatch):
+    def boom(**kw):
+        raise RuntimeError("503")
+
+    patch_paypal(monkeypatch, "create_order", boom)
+    before = datetime.utcnow()
+    assert checkout_outbox.drain_once() == 1
+    entry = _entry(db, queued)
+    assert (entry.status, entry.attempts) == ("pending", 1)
+    assert "503" in entry.last_error
+    # backoff exponencial: OUTBOX_RETRY_BACKOFF * 2**attempts
+    assert entry.available_at.replace(tzinfo=None) >= before + timedelta(seconds=19)
+    assert checkout_outbox.drain_once() == 0
+    assert _order_status(client, users, queued)["status"] == "queued"
+
+
+def test_terminal_failure_cancels_the_hold(client, db, users, queued, monkeypatch):
+    def boom(**kw):
+        raise RuntimeError("PayPal caído")
+
+    patch_paypal(monkeypatch, "create_order", boom)
+    for attempt in range(settings.OUTBOX_MAX_ATTEMPTS):
+        db.execute(update(PaymentOutbox).values(available_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.commit()
+        assert checkout_outbox.drain_once() == 1
+    entry = _entry(db, queued)
+    assert (entry.status, entry.attempts) == ("failed", settings.OUTBOX_MAX_ATTEMPTS)
+    assert db.get(Reservation, queued).status == "cancelled"
+    body = _order_status(client, users, queued)
+    assert (body["status"], body["reservation_status"]) == ("failed", "cancelled")
+
+
+def test_order_status_without_an_outbox_row(client, db, catalog, users, stay):
+    res = create_pending_reservation(db, user_id=users["cliente"]["id"], room_id=2, start=stay[0], end=stay[1])
+    assert _order_status(client, users, res.id)["status"] == "not_found"
+    res.paypal_order_id = "ORDER-SYNC"
+    db.commit()
+    assert _order_status(client, users, res.id)["status"] == "ready"
+    r = client.get(f"/api/v1/payments/paypal/orders/{res.id + 100}", headers=users["cliente"]["headers"])
+    assert r.status_code == 404
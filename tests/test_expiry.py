@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import func, insert, select, update
+
+from app.core.database import SessionLocal, engine
+from app.models.reservation import Reservation
+from app.models.room import Room
+from app.services.expiry_sweeper import release_stale_captures, sweep_expired_holds
+from app.services.reservations_service import create_pending_reservation
+from tests.conftest import patch_paypal
+
+SWEEP_ROWS = 100_000
+# cota amplia (SQLite en CI ronda 1-2s): atrapa un barrido fila a fila o sin índice;
+# la medición por tamaño de lote está en bench/sweep.py
+SWEEP_BUDGET_S = 20.0
+
+
+def _expire(db, reservation_id: int) -> None:
+    db.execute(
+        update(Reservation)
+        .where(Reservation.id == reservation_id)
+        .values(expires_at=datetime.utcnow() - timedelta(minutes=1))
+    )
+    db.commit()
+
+
+def _status(reservation_id: int) -> str:
+    with engine.connect() as conn:
+        return conn.execute(select(Reservation.status).where(Reservation.id == reservation_id)).scalar_one()
+
+
+def test_client_and_checkout_holds_expire_admin_ones_do_not(db, catalog, users, stay):
+    start, end = stay
+    uid = users["cliente"]["id"]
+    client_hold = create_pending_reservation(db, user_id=uid, room_id=1, start=start, end=end)
+    admin_hold = create_pending_reservation(db, user_id=uid, room_id=2, start=start, end=end, expires=False)
+    assert client_hold.expires_at is not None
+    assert admin_hold.expires_at is None
+
+    _expire(db, client_hold.id)
+    assert sweep_expired_holds(db) == 1
+    assert _status(client_hold.id) == "cancelled"
+    assert _status(admin_hold.id) == "pending"
+    # la habitación vuelve a estar libre
+    create_pending_reservation(db, user_id=uid, room_id=1, start=start, end=end)
+
+
+def test_sweep_100k_stale_holds(db, catalog, users):
+    rooms = 200
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Room),
+            [{"id": i, "numero": str(1000 + i), "piso": 1, "room_type_id": 1} for i in range(4, rooms + 4)],
+        )
+    first = date.today() + timedelta(days=1)
+    stale = datetime.utcnow() - timedelta(hours=1)
+    fresh = datetime.utcnow() + timedelta(hours=1)
+    per_room = SWEEP_ROWS // rooms
+    rows = [
+        {
+            "user_id": users["cliente"]["id"],
+            "room_id": room,
+            "fecha_inicio": first + timedelta(days=n),
+            "fecha_fin": first + timedelta(days=n + 1),
+            "costo_total": 40,
+            "status": "pending",
+            "expires_at": stale,
+        }
+        for room in range(4, rooms + 4)
+        for n in range(per_room)
+    ]
+    # holds vigentes y reservas pagadas que el barrido no debe tocar
+    rows += [
+        {**rows[0], "room_id": r, "expires_at": fresh if r == 1 else stale, "status": "pending" if r == 1 else "paid"}
+        for r in (1, 2)
+    ]
+    with engine.begin() as conn:
+        for i in range(0, len(rows), 20_000):
+            conn.execute(insert(Reservation), rows[i : i + 20_000])
+
+    started = time.perf_counter()
+    assert sweep_expired_holds(db, batch_size=5_000) == SWEEP_ROWS
+    elapsed = time.perf_counter() - started
+    assert elapsed < SWEEP_BUDGET_S, f"barrido de {SWEEP_ROWS} holds: {elapsed:.1f}s"
+    with engine.connect() as conn:
+        counts = dict(conn.execute(select(Reservation.status, func.count()).group_by(Reservation.status)).all())
+    assert counts == {"cancelled": SWEEP_ROWS, "pending": 1, "paid": 1}
+    assert sweep_expired_holds(db) == 0
+
+
+def _pending_with_order(db, users, stay) -> Reservation:
+    res = create_pending_reservation(db, user_id=users["cliente"]["id"], room_id=1, start=stay[0], end=stay[1])
+    res.paypal_order_id = "ORDER-1"
+    db.commit()
+    return res
+
+
+def test_capture_rejects_a_swept_hold_without_calling_paypal(client, db, catalog, users, stay, monkeypatch):
+    res = _pending_with_order(db, users, stay)
+    _expire(db, res.id)
+    sweep_expired_holds(db)
+
+    def capture(order_id, request_id=None):
+        raise AssertionError("no debe llamar a PayPal")
+
+    patch_paypal(monkeypatch, "capture_order", capture)
+    r = client.post("/api/v1/payments/paypal/capture-order", json={"reservation_id": res.id}, headers=users["cliente"]["headers"])
+    assert r.status_code == 400
+    assert _status(res.id) == "cancelled"
+
+
+CAPTURED = {"status": "COMPLETED", "purchase_units": [{"payments": {"captures": [{"id": "CAP-1"}]}}]}
+
+
+def _capture(client, users, reservation_id: int):
+    return client.post(
+        "/api/v1/payments/paypal/capture-order", json={"reservation_id": reservation_id}, headers=users["cliente"]["headers"]
+    )
+
+
+def test_sweeper_skips_a_hold_while_it_is_being_captured(client, db, catalog, users, stay, monkeypatch):
+    res = _pending_with_order(db, users, stay)
+    _expire(db, res.id)
+    rid = res.id
+    seen = []
+
+    def capture(order_id, request_id=None):
+        # sin transacción abierta: el request no tiene conexión del pool mientras PayPal responde
+        seen.append((engine.pool.checkedout() - idle, _status(rid)))
+
+        # el hold vence justo mientras PayPal captura: el sweeper corre en otro hilo
+        def sweep():
+            s = SessionLocal()
+            try:
+                seen.append(sweep_expired_holds(s))
+            finally:
+                s.close()
+
+        t = threading.Thread(target=sweep)
+        t.start()
+        t.join(10)
+        assert not t.is_alive(), "el sweeper quedó esperando"
+        return CAPTURED
+
+    patch_paypal(monkeypatch, "capture_order", capture)
+    idle = engine.pool.checkedout()
+    r = _capture(client, users, rid)
+    assert r.status_code == 200, r.text
+    assert seen == [(0, "capturing"), 0]
+    assert _status(rid) == "paid"
+
+
+def test_a_second_capture_does_not_win_the_claim(client, db, catalog, users, stay, monkeypatch):
+    res = _pending_with_order(db, users, stay)
+    second = []
+
+    def capture(order_id, request_id=None):
+        second.append(_capture(client, users, res.id))
+        return CAPTURED
+
+    patch_paypal(monkeypatch, "capture_order", capture)
+    assert _capture(client, users, res.id).status_code == 200
+    assert second[0].status_code == 400
+    assert "capturing" in second[0].json()["detail"]
+    assert _status(res.id) == "paid"
+
+
+@pytest.mark.parametrize("outcome", ["error", "declined"])
+def test_failed_capture_releases_the_claim(client, db, catalog, users, stay, monkeypatch, outcome):
+    res = _pending_with_order(db, users, stay)
+    hold = res.expires_at
+
+    def capture(order_id, request_id=None):
+        if outcome == "error":
+            raise RuntimeError("PayPal caído")
+        return {"status": "DECLINED"}
+
+    patch_paypal(monkeypatch, "capture_order", capture)
+    assert _capture(client, users, res.id).status_code == (502 if outcome == "error" else 400)
+    db.expire_all()
+    assert (db.get(Reservation, res.id).status, db.get(Reservation, res.id).expires_at) == ("pending", hold)
+    # se puede reintentar
+    patch_paypal(monkeypatch, "capture_order", lambda order_id, request_id=None: CAPTURED)
+    assert _capture(client, users, res.id).status_code == 200
+
+
+def test_stale_capture_claims_go_back_to_pending(db, catalog, users, stay):
+    res = _pending_with_order(db, users, stay)
+    db.execute(
+        update(Reservation)
+        .where(Reservation.id == res.id)
+        .values(status="capturing", expires_at=datetime.utcnow() - timedelta(seconds=1))
+    )
+    db.commit()
+    # sigue bloqueando la habitación mientras está en captura
+    with pytest.raises(ValueError, match="reservada"):
+        create_pending_reservation(db, user_id=users["cliente"]["id"], room_id=1, start=stay[0], end=stay[1])
+    assert sweep_expired_holds(db) == 0
+    assert _status(res.id) == "pending"
+    db.expire_all()
+    assert db.get(Reservation, res.id).expires_at.replace(tzinfo=None) > datetime.utcnow()
+    assert release_stale_captures(db) == 0
+
+
+def test_capture_that_outlived_its_claim_does_not_resurrect_the_hold(client, db, catalog, users, stay, monkeypatch, caplog):
+    res = _pending_with_order(db, users, stay)
+    rid = res.id
+
+    def capture(order_id, request_id=None):
+        # PayPal tardó más que el reclamo: se liberó, venció, se barrió y otro reservó la habitación
+        s = SessionLocal()
+        try:
+            s.execute(update(Reservation).where(Reservation.id == rid).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+            s.commit()
+            assert release_stale_captures(s) == 1
+            _expire(s, rid)
+            assert sweep_expired_holds(s) == 1
+            seen.append(create_pending_reservation(s, user_id=users["admin"]["id"], room_id=1, start=stay[0], end=stay[1]).id)
+        finally:
+            s.close()
+        return CAPTURED
+
+    seen = []
+    patch_paypal(monkeypatch, "capture_order", capture)
+    r = _capture(client, users, rid)
+    assert r.status_code == 409
+    db.expire_all()
+    lost = db.get(Reservation, rid)
+    assert (lost.status, lost.paypal_capture_id) == ("cancelled", "CAP-1")
+    assert _status(seen[0]) == "pending"
+    assert "CAP-1" in caplog.text
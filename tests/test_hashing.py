@@ -0,0 +1,45 @@
+"""Rondas pbkdf2 calibradas: el ruido entre workers no dispara rehashes."""
+from __future__ import annotations
+
+from app.core import hashing
+from app.core.config import settings
+from app.core.password_workers import build_context
+
+
+def test_calibrated_rounds_snap_to_the_step(monkeypatch):
+    for elapsed in (0.01, 0.01001, 0.00999):
+        ticks = iter((0.0, elapsed))
+        monkeypatch.setattr(hashing, "perf_counter", lambda: next(ticks))
+        # 20k rondas en ~10ms => ~1M para 500ms, con o sin jitter
+        assert hashing.calibrate_rounds(500) == 1_000_000
+
+
+def test_calibration_never_goes_below_the_floor(monkeypatch):
+    ticks = iter((0.0, 10.0))
+    monkeypatch.setattr(hashing, "perf_counter", lambda: next(ticks))
+    assert hashing.calibrate_rounds(1) == settings.PASSWORD_HASH_MIN_ROUNDS
+
+
+def test_hashes_from_another_calibration_stay_valid():
+    floor = settings.PASSWORD_HASH_MIN_ROUNDS
+    rounds = floor + 20_000
+    ctx = build_context(rounds, hashing.rehash_below(rounds))
+    # un paso de ruido (otro worker / reinicio) no dispara rehash
+    assert not ctx.needs_update(build_context(rounds - hashing.ROUNDS_STEP).hash("password1"))
+    assert not ctx.needs_update(build_context(rounds + hashing.ROUNDS_STEP).hash("password1"))
+    assert ctx.needs_update(build_context(rounds - hashing.ROUNDS_STEP - 1_000).hash("password1"))
+    assert hashing.rehash_below(floor) == floor
+
+
+def test_default_hashes_are_rehashed_after_calibrating_higher(monkeypatch):
+    old = build_context().hash("password1")  # rondas por defecto de passlib
+    monkeypatch.setattr(settings, "PASSWORD_HASH_TARGET_MS", 100)
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 0)
+    monkeypatch.setattr(hashing, "calibrate_rounds", lambda target_ms: 200_000)
+    monkeypatch.setattr(hashing, "_rounds", None)
+    monkeypatch.setattr(hashing, "pwd_context", hashing.pwd_context)
+    hashing.start_password_hashing()
+
+    assert hashing.needs_rehash(old)
+    assert hashing.verify_password("password1", old)
+    assert not hashing.needs_rehash(build_context(190_000).hash("password1"))
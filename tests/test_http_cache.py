@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import gzip
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from starlette.requests import Request
+
+from app.core.http_cache import gzip_etag, serve_bytes
+from app.services import static_docs
+from app.services.static_docs import StaticDocuments, static_documents
+from tests.conftest import ROOT
+
+DATA = bytes(range(256)) * 40  # 10240 bytes
+PACKED = gzip.compress(DATA, mtime=0)
+ETAG = '"v1-abc"'
+
+
+def _request(**headers: str) -> Request:
+    raw = [(k.replace("_", "-").lower().encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw, "query_string": b""})
+
+
+def _serve(gzipped: bytes | None = None, **headers: str):
+    return serve_bytes(_request(**headers), DATA, etag=ETAG, media_type="application/pdf", filename="x.pdf", gzipped=gzipped)
+
+
+def test_full_response_advertises_ranges_and_etag():
+    r = _serve()
+    assert r.status_code == 200
+    assert r.body == DATA
+    assert r.headers["ETag"] == ETAG
+    assert r.headers["Accept-Ranges"] == "bytes"
+    assert r.headers["Content-Disposition"] == 'attachment; filename="x.pdf"'
+
+
+@pytest.mark.parametrize(
+    "header, start, end",
+    [("bytes=0-99", 0, 99), ("bytes=10000-", 10000, 10239), ("bytes=-40", 10200, 10239), ("bytes=10200-99999", 10200, 10239)],
+)
+def test_range_returns_206_with_the_slice(header, start, end):
+    r = _serve(range=header)
+    assert r.status_code == 206
+    assert r.body == DATA[start : end + 1]
+    assert r.headers["Content-Range"] == f"bytes {start}-{end}/{len(DATA)}"
+
+
+@pytest.mark.parametrize("header", ["bytes=20000-", "bytes=50-10", "bytes=-0", "bytes=a-b"])
+def test_unsatisfiable_range_is_416(header):
+    r = _serve(range=header)
+    assert r.status_code == 416
+    assert r.headers["Content-Range"] == f"bytes */{len(DATA)}"
+
+
+def test_multiple_ranges_and_stale_if_range_get_the_full_document():
+    assert _serve(range="bytes=0-1,5-6").status_code == 200
+    r = _serve(range="bytes=0-99", if_range='"otra-version"')
+    assert r.status_code == 200 and r.body == DATA
+    assert _serve(range="bytes=0-99", if_range=ETAG).status_code == 206
+
+
+def test_gzip_only_when_accepted_and_with_its_own_etag():
+    r = _serve(gzipped=PACKED, accept_encoding="gzip, br")
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(r.body) == DATA
+    assert r.headers["ETag"] == gzip_etag(ETAG)
+    assert r.headers["Vary"] == "Accept-Encoding"
+
+    plain = _serve(gzipped=PACKED)
+    assert "Content-Encoding" not in plain.headers and plain.body == DATA
+    # Range va siempre sobre la representación sin comprimir
+    ranged = _serve(gzipped=PACKED, accept_encoding="gzip", range="bytes=0-9")
+    assert ranged.status_code == 206 and "Content-Encoding" not in ranged.headers
+
+
+@pytest.mark.parametrize("inm", [ETAG, f"W/{ETAG}", f'"otro", {ETAG}', "*"])
+def test_if_none_match_returns_304_without_body(inm):
+    r = _serve(if_none_match=inm)
+    assert r.status_code == 304
+    assert r.body == b""
+    assert r.headers["ETag"] == ETAG
+
+
+def test_304_compares_against_the_representation_etag():
+    # el ETag de la versión gzip no valida la versión sin comprimir, ni al revés
+    assert _serve(gzipped=PACKED, accept_encoding="gzip", if_none_match=gzip_etag(ETAG)).status_code == 304
+    assert _serve(gzipped=PACKED, if_none_match=gzip_etag(ETAG)).status_code == 200
+    assert _serve(gzipped=PACKED, accept_encoding="gzip", if_none_match=ETAG).status_code == 200
+
+
+def test_static_documents_render_once_under_concurrency():
+    calls = []
+
+    def render() -> bytes:
+        calls.append(1)
+        time.sleep(0.05)
+        return DATA
+
+    docs = StaticDocuments()
+    docs.register("doc", render, version=3, media_type="application/pdf", filename="d.pdf")
+    threads = [threading.Thread(target=docs.get, args=("doc",)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    doc = docs.get("doc")
+    assert doc.etag.startswith('"v3-')
+    assert doc.gzipped is not None and gzip.decompress(doc.gzipped) == DATA
+
+
+def test_welcome_pdf_is_prerendered_at_startup_and_served_from_memory(client, users, monkeypatch):
+    # el lifespan (client) ya lo construyó: pedirlo no vuelve a renderizar
+    assert "welcome" in static_documents._docs
+    monkeypatch.setattr(static_docs, "_build", lambda spec: pytest.fail("no debe renderizar en el request"))
+
+    url = "/api/v1/reports/welcome"
+    headers = {**users["admin"]["headers"], "Accept-Encoding": "identity"}
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200
+    assert first.content == static_documents.get("welcome").data
+    etag = first.headers["ETag"]
+
+    gz = client.get(url, headers={**headers, "Accept-Encoding": "gzip"})
+    gz_etag = gz.headers["ETag"]
+    assert gz_etag == gzip_etag(etag) and gz.content == first.content  # httpx ya descomprimió
+
+    cases = {
+        "200": {},
+        "200 gzip": {"Accept-Encoding": "gzip"},
+        "304": {"If-None-Match": etag},
+        "304 gzip": {"Accept-Encoding": "gzip", "If-None-Match": gz_etag},
+        "206": {"Range": "bytes=0-499"},
+    }
+    for kind, extra in cases.items():
+        r = client.get(url, headers={**headers, **extra})
+        assert r.status_code == int(kind[:3])
+    assert len(r.content) == 500
+
+
+# cotas amplias: atrapan un render por request o un arranque desproporcionado, no miden la máquina
+STARTUP_BUDGET_S = 5.0
+REQUEST_BUDGET_S = 0.05
+
+
+def test_welcome_pdf_etag_is_the_same_in_every_process():
+    spec = static_documents._specs["welcome"]
+    etag = static_docs._build(spec).etag
+    assert static_docs._build(spec).etag == etag
+    # otro proceso (otro worker de uvicorn o un reinicio) produce los mismos bytes
+    code = "from app.services.static_docs import _build, static_documents; print(_build(static_documents._specs['welcome']).etag)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == etag
+
+
+def test_startup_build_and_per_request_timings(client, users):
+    docs = StaticDocuments()
+    for name, spec in static_documents._specs.items():
+        docs.register(name, spec.render, version=spec.version, media_type=spec.media_type, filename=spec.filename)
+    started = time.perf_counter()
+    docs.build_all()
+    assert time.perf_counter() - started < STARTUP_BUDGET_S
+
+    headers = {**users["admin"]["headers"], "Accept-Encoding": "identity"}
+    timings = []
+    for _ in range(50):
+        started = time.perf_counter()
+        assert client.get("/api/v1/reports/welcome", headers=headers).status_code == 200
+        timings.append(time.perf_counter() - started)
+    assert statistics.median(timings) < REQUEST_BUDGET_S
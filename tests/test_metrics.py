@@ -0,0 +1,35 @@
+"""Métricas por worker: pool de conexiones y cabecera Server-Timing."""
+from __future__ import annotations
+
+import re
+
+from app.core.config import settings
+
+
+def test_db_pool_metrics_count_checkouts(client, users):
+    headers = users["admin"]["headers"]
+    pool = "async" if settings.DB_ASYNC else "sync"
+    before = client.get("/api/v1/metrics/db-pool", headers=headers).json()[pool]
+    client.get("/api/v1/rooms", headers=headers)
+    body = client.get("/api/v1/metrics/db-pool", headers=headers).json()
+    after = body[pool]
+    for key in ("checkouts", "checkins", "timeouts", "exhausted", "wait_avg_ms"):
+        assert key in after
+    # tamaño/ocupación: solo para QueuePool (el engine sync lo es también con SQLite)
+    for key in ("size", "checked_in", "checked_out", "overflow"):
+        assert key in body["sync"]
+    assert after["checkouts"] > before["checkouts"]
+    assert after["timeouts"] == before["timeouts"]
+
+
+def test_pool_metrics_are_admin_only(client, users):
+    assert client.get("/api/v1/metrics/db-pool").status_code == 401
+    assert client.get("/api/v1/metrics/db-pool", headers=users["cliente"]["headers"]).status_code == 403
+
+
+def test_every_response_carries_the_pool_wait(client, catalog):
+    r = client.get("/api/v1/rooms")
+    assert r.status_code == 200
+    assert re.fullmatch(r"db-pool;dur=\d+\.\d{2}", r.headers["Server-Timing"])
+    # también en errores
+    assert "Server-Timing" in client.get("/api/v1/metrics/db-pool").headers
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.models.reservation import Reservation
+from app.models.room import Room
+
+FIRST = date(2030, 1, 1)
+STATUSES = ("pending", "paid", "cancelled")
+
+
+@pytest.fixture
+def listing(catalog, users) -> list[dict]:
+    """150 reservas (más que un PAGE_DEFAULT_LIMIT típico) repartidas en 3 habitaciones y 3 estados."""
+    rows = [
+        {
+            "id": n,
+            "user_id": users["cliente"]["id"] if n % 2 else users["admin"]["id"],
+            "room_id": n % 3 + 1,
+            "fecha_inicio": FIRST + timedelta(days=n),
+            "fecha_fin": FIRST + timedelta(days=n + 1),
+            "costo_total": 40,
+            "status": STATUSES[n % 3],
+        }
+        for n in range(1, 151)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(Reservation), rows)
+    return rows
+
+
+def _walk(client, url: str, headers: dict, **params) -> tuple[list[dict], int]:
+    """Recorre todas las páginas siguiendo X-Next-Cursor."""
+    out, pages, cursor = [], 0, None
+    while True:
+        r = client.get(url, headers=headers, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200, r.text
+        out += r.json()
+        pages += 1
+        cursor = r.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return out, pages
+
+
+def test_without_limit_lists_are_not_truncated(client, users, listing, monkeypatch):
+    headers = users["admin"]["headers"]
+    r = client.get("/api/v1/reservations", headers=headers)
+    assert len(r.json()) == 150
+    assert NEXT_CURSOR_HEADER not in r.headers
+    assert len(client.get("/api/v1/reservations/me", headers=users["cliente"]["headers"]).json()) == 75
+
+    # un límite por defecto configurado sí corta, pero avisa con el cursor
+    monkeypatch.setattr(settings, "PAGE_DEFAULT_LIMIT", 100)
+    r = client.get("/api/v1/reservations", headers=headers)
+    assert len(r.json()) == 100
+    assert r.headers[NEXT_CURSOR_HEADER] == "51"
+
+
+def test_keyset_cursor_walks_every_reservation_once(client, users, listing):
+    items, pages = _walk(client, "/api/v1/reservations", users["admin"]["headers"], limit=40)
+    assert pages == 4
+    assert [r["id"] for r in items] == list(range(150, 0, -1))
+
+
+def test_reservation_filters_combine_with_the_cursor(client, users, listing):
+    headers = users["admin"]["headers"]
+    items, _ = _walk(client, "/api/v1/reservations", headers, limit=7, status="paid", room_id=2)
+    expected = [r["id"] for r in listing if r["status"] == "paid" and r["room_id"] == 2]
+    assert [r["id"] for r in items] == sorted(expected, reverse=True)
+
+    # estadías que tocan [start, end): noches de las reservas 10..19
+    r = client.get(
+        "/api/v1/reservations",
+        headers=headers,
+        params={"start": str(FIRST + timedelta(days=10)), "end": str(FIRST + timedelta(days=20))},
+    )
+    assert [x["id"] for x in r.json()] == list(range(19, 9, -1))
+
+    mine = client.get("/api/v1/reservations/me", headers=users["cliente"]["headers"], params={"status": "cancelled"})
+    assert {(x["user_id"], x["status"]) for x in mine.json()} == {(users["cliente"]["id"], "cancelled")}
+    assert client.get("/api/v1/reservations", headers=headers, params={"status": "lost"}).status_code == 422
+
+
+def test_fields_projection_keeps_the_cursor_column(client, users, listing):
+    r = client.get("/api/v1/reservations", headers=users["admin"]["headers"], params={"fields": "status", "limit": 2})
+    assert r.json() == [{"id": 150, "status": "pending"}, {"id": 149, "status": "cancelled"}]
+    assert r.headers[NEXT_CURSOR_HEADER] == "149"
+
+    r = client.get("/api/v1/reservations", headers=users["admin"]["headers"], params={"fields": "status,password"})
+    assert r.status_code == 400
+    assert "password" in r.json()["detail"]
+
+
+def test_users_role_filter_and_projection(client, users):
+    r = client.get("/api/v1/users", headers=users["admin"]["headers"], params={"role": "cliente", "fields": "email"})
+    assert r.json() == [{"id": users["cliente"]["id"], "email": users["cliente"]["email"]}]
+    items, pages = _walk(client, "/api/v1/users", users["admin"]["headers"], limit=1)
+    assert (pages, [u["id"] for u in items]) == (2, [1, 2])
+
+
+def test_catalog_pages_from_memory(client, catalog, users):
+    with engine.begin() as conn:
+        conn.execute(insert(Room), [{"id": i, "numero": str(100 + i), "piso": 2, "room_type_id": 1} for i in range(4, 11)])
+    headers = users["cliente"]["headers"]
+    assert [x["id"] for x in client.get("/api/v1/rooms", headers=headers).json()] == list(range(1, 11))
+
+    items, pages = _walk(client, "/api/v1/rooms", headers, limit=4)
+    assert (pages, [x["id"] for x in items]) == (3, list(range(1, 11)))
+
+    r = client.get("/api/v1/rooms", headers=headers, params={"fields": "numero", "cursor": 8})
+    assert r.json() == [{"id": 9, "numero": "109"}, {"id": 10, "numero": "110"}]
+    assert NEXT_CURSOR_HEADER not in r.headers
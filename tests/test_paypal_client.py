@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+import requests
+
+from app.core.config import settings
+from app.services import paypal_service
+from app.services.paypal_service import AsyncPayPalClient, PayPalClient, _TokenCache
+from tests.fake_paypal import ORDERS_PATH, TOKEN_PATH, FakePayPal
+
+CREATED = (201, {"id": "ORDER-1", "status": "CREATED"})
+
+
+@pytest.fixture
+def fake():
+    server = FakePayPal().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def paypal(fake, monkeypatch):
+    monkeypatch.setattr(settings, "PAYPAL_RETRY_BACKOFF", 0.01)
+    monkeypatch.setattr(settings, "PAYPAL_MAX_RETRIES", 3)
+    monkeypatch.setattr(settings, "PAYPAL_TOTAL_TIMEOUT", 10.0)
+    monkeypatch.setattr(settings, "PAYPAL_READ_TIMEOUT", 5.0)
+    client = PayPalClient(base_url=fake.url, client_id="id", client_secret="secret")
+    yield client
+    client.close()
+
+
+def _order(paypal: PayPalClient, ref: str = "R1"):
+    return paypal.create_order(amount="10.00", reference_id=ref, request_id=f"create-{ref}")
+
+
+def test_token_is_cached_between_calls(fake, paypal):
+    for i in range(5):
+        _order(paypal, f"R{i}")
+    assert len(fake.calls_to(TOKEN_PATH)) == 1
+    assert {c.headers["Authorization"] for c in fake.calls_to(ORDERS_PATH)} == {"Bearer token-1"}
+
+
+def test_token_refresh_is_single_flight(fake, paypal):
+    fake.respond(TOKEN_PATH, (200, None, 0.3))  # token lento: los hilos se juntan en el lock
+    with ThreadPoolExecutor(16) as pool:
+        tokens = list(pool.map(lambda _: paypal.get_access_token(), range(16)))
+    assert set(tokens) == {"token-1"}
+    assert len(fake.calls_to(TOKEN_PATH)) == 1
+
+
+def test_token_is_refreshed_before_it_expires(fake, paypal, monkeypatch):
+    monkeypatch.setattr(settings, "PAYPAL_TOKEN_REFRESH_MARGIN", 120.0)
+    fake.respond(TOKEN_PATH, (200, {"access_token": "corto", "expires_in": 60}), (200, None))
+    assert paypal.get_access_token() == "corto"
+    assert paypal.get_access_token() == "token-1"  # expires_in < margen: ya no sirve
+
+
+def test_401_refreshes_the_token_and_retries_once(fake, paypal):
+    _order(paypal, "R0")
+    fake.respond(ORDERS_PATH, 401, CREATED)
+    assert _order(paypal, "R1")["id"] == "ORDER-1"
+    retried = fake.calls_to(ORDERS_PATH)[1:]
+    assert [c.headers["Authorization"] for c in retried] == ["Bearer token-1", "Bearer token-2"]
+    assert len(fake.calls_to(TOKEN_PATH)) == 2
+
+
+def test_persistent_401_is_not_retried_forever(fake, paypal):
+    fake.respond(ORDERS_PATH, 401)
+    with pytest.raises(requests.HTTPError):
+        _order(paypal)
+    assert len(fake.calls_to(ORDERS_PATH)) == 2
+
+
+def test_5xx_retries_reuse_the_request_id(fake, paypal):
+    fake.respond(ORDERS_PATH, 503, 500, 429, CREATED)
+    assert _order(paypal, "R7")["id"] == "ORDER-1"
+    calls = fake.calls_to(ORDERS_PATH)
+    assert len(calls) == 4
+    assert {c.headers["PayPal-Request-Id"] for c in calls} == {"create-R7"}
+
+
+def test_retries_stop_after_max_retries(fake, paypal):
+    fake.respond(ORDERS_PATH, 502)
+    with pytest.raises(requests.HTTPError) as exc:
+        _order(paypal)
+    assert exc.value.response.status_code == 502
+    assert len(fake.calls_to(ORDERS_PATH)) == settings.PAYPAL_MAX_RETRIES + 1
+
+
+def test_4xx_is_not_retried(fake, paypal):
+    fake.respond(ORDERS_PATH, 422)
+    with pytest.raises(requests.HTTPError):
+        _order(paypal)
+    assert len(fake.calls_to(ORDERS_PATH)) == 1
+
+
+def test_total_timeout_caps_the_retry_loop(fake, paypal, monkeypatch):
+    monkeypatch.setattr(settings, "PAYPAL_MAX_RETRIES", 50)
+    monkeypatch.setattr(settings, "PAYPAL_READ_TIMEOUT", 0.4)
+    monkeypatch.setattr(settings, "PAYPAL_TOTAL_TIMEOUT", 1.0)
+    monkeypatch.setattr(settings, "PAYPAL_RETRY_BACKOFF", 0.05)
+    client = PayPalClient(base_url=fake.url, client_id="id", client_secret="secret")
+    client.get_access_token()
+    fake.respond(ORDERS_PATH, (503, {"name": "ERROR"}, 2.0))  # cada intento se cuelga más que el read timeout
+    t0 = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        _order(client)
+    elapsed = time.monotonic() - t0
+    client.close()
+    assert elapsed < 1.0 + 0.3
+    assert 2 <= len(fake.calls_to(ORDERS_PATH)) <= 3
+    assert {c.headers["PayPal-Request-Id"] for c in fake.calls_to(ORDERS_PATH)} == {"create-R1"}
+
+
+def test_total_timeout_covers_a_slow_token_endpoint(fake, paypal, monkeypatch):
+    monkeypatch.setattr(settings, "PAYPAL_TOTAL_TIMEOUT", 0.5)
+    fake.respond(TOKEN_PATH, (200, None, 2.0))
+    t0 = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        _order(paypal)
+    assert time.monotonic() - t0 < 0.5 + 0.3
+    assert fake.calls_to(ORDERS_PATH) == []
+
+
+# ---------- AsyncPayPalClient ----------
+
+def _run_async(fake, fn, tokens=None):
+    async def main():
+        client = AsyncPayPalClient(base_url=fake.url, client_id="id", client_secret="secret", tokens=tokens)
+        try:
+            return await fn(client)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(main())
+
+
+async def _order_async(client: AsyncPayPalClient, ref: str = "R1"):
+    return await client.create_order(amount="10.00", reference_id=ref, request_id=f"create-{ref}")
+
+
+def test_async_client_shares_the_token_with_the_sync_client(fake, paypal):
+    _order(paypal)
+
+    async def orders(client):
+        return [await _order_async(client, f"A{i}") for i in range(3)]
+
+    assert len(_run_async(fake, orders, tokens=paypal._tokens)) == 3
+    assert len(fake.calls_to(TOKEN_PATH)) == 1
+    assert {c.headers["Authorization"] for c in fake.calls_to(ORDERS_PATH)} == {"Bearer token-1"}
+
+
+def test_async_token_refresh_is_single_flight(fake, paypal):
+    fake.respond(TOKEN_PATH, (200, None, 0.3))
+
+    async def many(client):
+        return await asyncio.gather(*(client.get_access_token() for _ in range(16)))
+
+    assert set(_run_async(fake, many)) == {"token-1"}
+    assert len(fake.calls_to(TOKEN_PATH)) == 1
+
+
+def test_async_401_refreshes_the_token_and_retries_once(fake, paypal):
+    fake.respond(ORDERS_PATH, 401, CREATED)
+    assert _run_async(fake, _order_async)["id"] == "ORDER-1"
+    assert [c.headers["Authorization"] for c in fake.calls_to(ORDERS_PATH)] == ["Bearer token-1", "Bearer token-2"]
+
+
+def test_async_5xx_retries_reuse_the_request_id(fake, paypal):
+    fake.respond(ORDERS_PATH, 503, 429, CREATED)
+    assert _run_async(fake, lambda c: _order_async(c, "R9"))["id"] == "ORDER-1"
+    calls = fake.calls_to(ORDERS_PATH)
+    assert len(calls) == 3
+    assert {c.headers["PayPal-Request-Id"] for c in calls} == {"create-R9"}
+
+
+def test_async_retries_stop_after_max_retries_and_4xx_is_final(fake, paypal):
+    fake.respond(ORDERS_PATH, 502)
+    with pytest.raises(httpx.HTTPStatusError):
+        _run_async(fake, _order_async)
+    assert len(fake.calls_to(ORDERS_PATH)) == settings.PAYPAL_MAX_RETRIES + 1
+    fake.respond(ORDERS_PATH, 422)
+    with pytest.raises(httpx.HTTPStatusError):
+        _run_async(fake, lambda c: _order_async(c, "R2"))
+    assert len(fake.calls_to(ORDERS_PATH)) == settings.PAYPAL_MAX_RETRIES + 2
+
+
+def test_async_total_timeout_caps_the_retry_loop(fake, paypal, monkeypatch):
+    monkeypatch.setattr(settings, "PAYPAL_MAX_RETRIES", 50)
+    monkeypatch.setattr(settings, "PAYPAL_READ_TIMEOUT", 0.4)
+    monkeypatch.setattr(settings, "PAYPAL_TOTAL_TIMEOUT", 1.0)
+    monkeypatch.setattr(settings, "PAYPAL_RETRY_BACKOFF", 0.05)
+    paypal.get_access_token()
+    fake.respond(ORDERS_PATH, (503, {"name": "ERROR"}, 2.0))
+    t0 = time.monotonic()
+    with pytest.raises(httpx.TimeoutException):
+        _run_async(fake, _order_async, tokens=paypal._tokens)
+    assert time.monotonic() - t0 < 1.0 + 0.3
+    assert 2 <= len(fake.calls_to(ORDERS_PATH)) <= 3
+
+
+@pytest.mark.db_async
+def test_async_routers_call_paypal_through_the_async_client(fake, paypal, client, catalog, users, stay, monkeypatch):
+    monkeypatch.setattr(settings, "PAYPAL_BASE_URL", fake.url)
+    monkeypatch.setattr(settings, "PAYPAL_CLIENT_ID", "id")
+    monkeypatch.setattr(settings, "PAYPAL_CLIENT_SECRET", "secret")
+    monkeypatch.setattr(paypal_service.paypal_client, "_tokens", _TokenCache())
+    captured = {"status": "COMPLETED", "purchase_units": [{"payments": {"captures": [{"id": "CAP-1"}]}}]}
+    fake.respond(ORDERS_PATH, CREATED, (201, captured))
+    headers = users["cliente"]["headers"]
+    # el próximo request crea el cliente del proceso con esta configuración
+    client.portal.call(paypal_service.close_async_client)
+    try:
+        r = client.post(
+            "/api/v1/payments/paypal/create-order",
+            json={"room_id": 1, "fecha_inicio": stay[0].isoformat(), "fecha_fin": stay[1].isoformat()},
+            headers=headers,
+        )
+        assert r.status_code == 201, r.text
+        rid = r.json()["reservation_id"]
+        r = client.post("/api/v1/payments/paypal/capture-order", json={"reservation_id": rid}, headers=headers)
+        assert r.json() == {"reservation_id": rid, "status": "paid"}
+    finally:
+        client.portal.call(paypal_service.close_async_client)
+    calls = fake.calls_to(ORDERS_PATH)
+    assert [c.headers["PayPal-Request-Id"] for c in calls] == [f"reserva-{rid}", "capture-ORDER-1"]
+    assert len(fake.calls_to(TOKEN_PATH)) == 1
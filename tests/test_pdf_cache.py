@@ -0,0 +1,87 @@
+"""Caché de comprobantes PDF: render por clave y variante async sobre pdf_renderer.render_async."""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.services import pdf_cache
+from app.services.pdf_generator import generate_reservation_pdfs
+from app.storage import storage
+
+FIELDS = {
+    "hotel_name": "Hotel Ventura",
+    "reservation_id": 1,
+    "guest_fullname": "Cliente Pruebas",
+    "guest_email": "cliente2@test.local",
+    "room_numero": "101",
+    "room_tipo": "simple",
+    "fecha_inicio": "2030-01-10",
+    "fecha_fin": "2030-01-13",
+    "costo_total": "120.00",
+    "status": "paid",
+}
+
+
+def _slow_render(calls: list):
+    def render(**fields):
+        calls.append(threading.get_ident())
+        time.sleep(0.2)
+        return b"%PDF-" + fields["status"].encode()
+
+    return render
+
+
+def test_async_render_is_single_flight_and_off_the_loop(monkeypatch):
+    calls: list[int] = []
+    monkeypatch.setattr(pdf_cache, "reservation_pdf_bytes", _slow_render(calls))
+
+    async def main():
+        loop_thread = threading.get_ident()
+        rels = await asyncio.gather(*(pdf_cache.get_or_render_async(FIELDS) for _ in range(10)))
+        return loop_thread, rels
+
+    loop_thread, rels = asyncio.run(main())
+    assert len(set(rels)) == 1
+    assert len(calls) == 1 and calls[0] != loop_thread
+    assert storage.get(rels[0]) == b"%PDF-paid"
+    assert pdf_cache._inflight == {}
+
+
+def test_async_and_sync_share_the_cache(monkeypatch):
+    calls: list[int] = []
+    monkeypatch.setattr(pdf_cache, "reservation_pdf_bytes", _slow_render(calls))
+    rel = asyncio.run(pdf_cache.get_or_render_async(FIELDS))
+    assert pdf_cache.get_or_render(FIELDS) == rel
+    assert len(calls) == 1
+    # otro estado => otra clave => otro render
+    assert asyncio.run(pdf_cache.get_or_render_async({**FIELDS, "status": "pending"})) != rel
+    assert len(calls) == 2
+
+
+def test_batch_renders_one_pdf_per_receipt_or_one_merged():
+    batch = [{**FIELDS, "reservation_id": i} for i in (1, 2, 3)]
+    separate = generate_reservation_pdfs(batch)
+    assert len(separate) == 3
+    assert all(pdf.startswith(b"%PDF-") for pdf in separate)
+    merged = generate_reservation_pdfs(batch, merged=True)
+    assert len(merged) == 1
+    assert merged[0].count(b"/Type /Page\n") == 3
+    assert generate_reservation_pdfs([], merged=True) == []
+
+
+def test_prune_deletes_pdfs_rendered_before_the_max_age(monkeypatch):
+    monkeypatch.setattr(pdf_cache, "reservation_pdf_bytes", lambda **fields: b"%PDF-" + fields["status"].encode())
+    old = pdf_cache.get_or_render({**FIELDS, "status": "pending"})
+    fresh = pdf_cache.get_or_render(FIELDS)
+    stamp = time.time() - 40 * 86400
+    os.utime(storage.path(old), (stamp, stamp))
+
+    assert pdf_cache.prune(max_age_days=0) == 0  # desactivado
+    assert pdf_cache.prune(max_age_days=30) == 1
+    assert not storage.exists(old) and storage.exists(fresh)
+    # se regenera si se vuelve a pedir
+    assert pdf_cache.get_or_render({**FIELDS, "status": "pending"}) == old
+    assert pdf_cache.prune(now=datetime.now(timezone.utc) + timedelta(days=31), max_age_days=30) == 2
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import zipfile
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select
+
+from app.core.config import settings
+from app.core.database import engine, get_async_db
+from app.models.reservation import Reservation
+from app.services.receipt_archive import (
+    archive_closed_months,
+    LEGACY_PDF_DIR,
+    archive_key,
+    purge_legacy_pdfs,
+    read_stored,
+    receipt_key,
+    restore_receipt_paths,
+)
+from app.storage import storage
+
+TODAY = date(2025, 3, 15)  # enero y febrero cerrados, marzo en curso
+JAN = datetime(2025, 1, 20, 12)
+MAR = datetime(2025, 3, 2, 12)
+
+
+def _paid(users, rid: int, created_at: datetime, path: str | None = "receipt") -> str | None:
+    """Reserva paid con su comprobante .txt suelto (path="receipt") u otro reporte_path."""
+    key = receipt_key(rid, created_at)
+    if path == "receipt":
+        storage.put(key, f"Reserva {rid}\n".encode())
+        path = key
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Reservation),
+            {
+                "id": rid,
+                "user_id": users["cliente"]["id"],
+                "room_id": 1,
+                "fecha_inicio": date(2025, 4, rid),
+                "fecha_fin": date(2025, 4, rid + 1),
+                "costo_total": 40,
+                "status": "paid",
+                "created_at": created_at,
+                "reporte_path": path,
+            },
+        )
+    return key
+
+
+def _paths() -> dict[int, str | None]:
+    with engine.connect() as conn:
+        return dict(conn.execute(select(Reservation.id, Reservation.reporte_path)).all())
+
+
+@pytest.fixture(params=["sync", "async"])
+def api(request, async_session_factory):
+    """TestClient con el router de reservas sync o async (en ambos modos de la suite)."""
+    from app.api.v1 import reservations, reservations_async
+
+    app = FastAPI()
+    if request.param == "sync":
+        app.include_router(reservations.router, prefix="/api/v1/reservations")
+    else:
+        app.include_router(reservations_async.router, prefix="/api/v1/reservations")
+
+        async def db():
+            async with async_session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_async_db] = db
+    with TestClient(app) as c:
+        yield c
+
+
+def test_closed_months_are_packed_and_late_receipts_appended(db, catalog, users):
+    jan = [_paid(users, rid, JAN) for rid in (1, 2)]
+    mar = _paid(users, 3, MAR)
+
+    assert archive_closed_months(db, TODAY) == 2
+    zip_key = archive_key(2025, 1)
+    assert _paths() == {1: f"{zip_key}#reserva_1.txt", 2: f"{zip_key}#reserva_2.txt", 3: mar}
+    assert not any(storage.exists(k) for k in jan)
+    assert storage.exists(mar)  # mes en curso: sigue suelto
+    assert read_stored(f"{zip_key}#reserva_2.txt") == b"Reserva 2\n"
+    with pytest.raises(FileNotFoundError):
+        read_stored(f"{zip_key}#reserva_9.txt")
+
+    # comprobante tardío de enero: se agrega al zip sin perder los anteriores
+    _paid(users, 4, JAN)
+    assert archive_closed_months(db, TODAY) == 1
+    with storage.open_random(zip_key) as f, zipfile.ZipFile(f) as zf:
+        assert zf.namelist() == ["reserva_1.txt", "reserva_2.txt", "reserva_4.txt"]
+    assert read_stored(f"{zip_key}#reserva_1.txt") == b"Reserva 1\n"
+    assert archive_closed_months(db, TODAY) == 0
+
+
+def test_receipt_endpoint_reads_loose_and_archived_receipts(api, db, catalog, users):
+    _paid(users, 1, JAN)
+    _paid(users, 2, JAN, path=None)
+    headers = users["cliente"]["headers"]
+
+    loose = api.get("/api/v1/reservations/1/receipt", headers=headers)
+    assert loose.status_code == 200
+    archive_closed_months(db, TODAY)
+    packed = api.get("/api/v1/reservations/1/receipt", headers=headers)
+    assert packed.status_code == 200
+    assert packed.content == loose.content == b"Reserva 1\n"
+    assert packed.headers["content-disposition"] == 'attachment; filename="reserva_1.txt"'
+    assert packed.headers["content-type"].startswith("text/plain")
+
+    assert api.get("/api/v1/reservations/2/receipt", headers=headers).status_code == 404
+    assert api.get("/api/v1/reservations/9/receipt", headers=headers).status_code == 404
+
+
+def test_pdf_download_does_not_touch_the_receipt_path(api, db, catalog, users):
+    _paid(users, 1, JAN)
+    archive_closed_months(db, TODAY)
+    _paid(users, 2, JAN)  # tardío, todavía suelto
+    before = _paths()
+    headers = users["cliente"]["headers"]
+
+    for rid in (1, 2):
+        r = api.get(f"/api/v1/reservations/{rid}/report", headers=headers)
+        assert r.status_code == 200
+        assert r.content.startswith(b"%PDF")
+    assert _paths() == before
+
+    # el suelto sigue entrando al archivo y el archivado se sigue leyendo
+    assert archive_closed_months(db, TODAY) == 1
+    for rid in (1, 2):
+        r = api.get(f"/api/v1/reservations/{rid}/receipt", headers=headers)
+        assert r.content == f"Reserva {rid}\n".encode()
+
+
+def test_legacy_pdf_paths_are_restored_and_the_pdfs_purged(db, catalog, users):
+    # estado de antes: /report pisaba reporte_path con reservations/reserva_{id}.pdf (ruta plana)
+    legacy = {rid: f"{LEGACY_PDF_DIR}/reserva_{rid}.pdf" for rid in (1, 2, 3, 4)}
+    _paid(users, 1, JAN)
+    archive_closed_months(db, TODAY)  # 1 ya archivado
+    flat = Path(settings.STORAGE_DIR) / LEGACY_PDF_DIR
+    flat.mkdir(parents=True)
+    for rid in legacy:
+        (flat / f"reserva_{rid}.pdf").write_bytes(b"%PDF-legacy")
+    storage.put(receipt_key(2, JAN), b"Reserva 2\n")  # 2 con comprobante suelto de enero
+    storage.put(receipt_key(3, MAR), b"Reserva 3\n")  # 3 del mes en curso
+    _paid(users, 2, JAN, path=legacy[2])
+    _paid(users, 3, MAR, path=legacy[3])
+    _paid(users, 4, JAN, path=legacy[4])  # 4 nunca tuvo comprobante
+    with engine.begin() as conn:
+        conn.execute(Reservation.__table__.update().where(Reservation.id == 1).values(reporte_path=legacy[1]))
+
+    assert restore_receipt_paths(db) == 4
+    zip_key = archive_key(2025, 1)
+    assert _paths() == {1: f"{zip_key}#reserva_1.txt", 2: receipt_key(2, JAN), 3: receipt_key(3, MAR), 4: None}
+    assert restore_receipt_paths(db) == 0
+    assert purge_legacy_pdfs() == 4
+    assert not any(flat.iterdir())
+
+    # archive_closed_months hace ambas cosas y después archiva el suelto de enero
+    with engine.begin() as conn:
+        conn.execute(Reservation.__table__.update().where(Reservation.id == 2).values(reporte_path=legacy[2]))
+    (flat / "reserva_2.pdf").write_bytes(b"%PDF-legacy")
+    assert archive_closed_months(db, TODAY) == 1
+    assert _paths()[2] == f"{zip_key}#reserva_2.txt"
+    assert read_stored(_paths()[2]) == b"Reserva 2\n"
+    assert not (flat / "reserva_2.pdf").exists()
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app.models.report_snapshot import ReportSnapshot
+from app.models.reservation import Reservation
+from app.services import report_snapshots
+from app.services.report_snapshots import (
+    STAGING_DIR,
+    closed_periods,
+    get_or_build,
+    get_or_build_async,
+    monthly_period,
+    today_utc,
+)
+from app.services.reports_service import build_csv
+from app.storage import storage
+
+JAN = datetime(2025, 1, 10, 12)
+FEB = datetime(2025, 2, 10, 12)
+MONTHLY = "/api/v1/reports/monthly"
+
+
+def _reservation(db, users, created_at: datetime, status: str = "paid", room_id: int = 1) -> int:
+    res = Reservation(
+        user_id=users["cliente"]["id"],
+        room_id=room_id,
+        fecha_inicio=created_at.date(),
+        fecha_fin=created_at.date().replace(day=created_at.day + 2),
+        costo_total=Decimal("80"),
+        status=status,
+        created_at=created_at,
+    )
+    db.add(res)
+    db.commit()
+    return res.id
+
+
+def _edit(db, reservation_id: int, **values) -> None:
+    res = db.get(Reservation, reservation_id)
+    for name, value in values.items():
+        setattr(res, name, value)
+    db.commit()
+
+
+def _snapshot(db, name: str) -> ReportSnapshot | None:
+    db.expire_all()
+    return db.get(ReportSnapshot, name)
+
+
+def _monthly(client, users, month: int, etag: str | None = None):
+    headers = dict(users["admin"]["headers"])
+    if etag:
+        headers["If-None-Match"] = etag
+    return client.get(MONTHLY, params={"year": 2025, "month": month}, headers=headers)
+
+
+def test_closed_period_is_built_once_and_revalidates(client, db, catalog, users):
+    _reservation(db, users, JAN)
+    r = _monthly(client, users, 1)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    assert b"80.00" in r.content
+    etag = r.headers["ETag"]
+    row = _snapshot(db, "monthly_2025_01")
+    assert (row.version, row.built_version) == (0, 0)
+    assert etag == f'"{row.sha256}"'
+
+    assert _monthly(client, users, 1, etag).status_code == 304
+    again = _monthly(client, users, 1)
+    assert (again.headers["ETag"], again.content) == (etag, r.content)
+    assert _snapshot(db, "monthly_2025_01").built_at == row.built_at  # no se regeneró
+
+
+def test_paid_change_in_the_period_rebuilds_it(client, db, catalog, users):
+    rid = _reservation(db, users, JAN)
+    first = _monthly(client, users, 1)
+    old_path = _snapshot(db, "monthly_2025_01").path
+
+    _edit(db, rid, costo_total=Decimal("95"))
+    row = _snapshot(db, "monthly_2025_01")
+    assert row.version == row.built_version + 1
+
+    r = _monthly(client, users, 1, first.headers["ETag"])
+    assert r.status_code == 200
+    assert r.headers["ETag"] != first.headers["ETag"]
+    assert b"95.00" in r.content and b"80.00" not in r.content
+    row = _snapshot(db, "monthly_2025_01")
+    assert row.built_version == row.version
+    assert not storage.exists(old_path)
+
+    # dejar de ser paid también invalida
+    _edit(db, rid, status="cancelled")
+    assert b"95.00" not in _monthly(client, users, 1).content
+
+
+def test_changes_outside_the_period_do_not_invalidate(client, db, catalog, users):
+    _reservation(db, users, JAN)
+    pending_jan = _reservation(db, users, JAN, status="pending", room_id=2)
+    paid_feb = _reservation(db, users, FEB)
+    jan = _monthly(client, users, 1)
+    feb = _monthly(client, users, 2)
+
+    _edit(db, paid_feb, costo_total=Decimal("99"))
+    _edit(db, pending_jan, costo_total=Decimal("99"))  # no es paid: no sale en el reporte
+    assert _snapshot(db, "monthly_2025_01").version == 0
+    assert _snapshot(db, "monthly_2025_02").version == 1
+    assert _monthly(client, users, 1, jan.headers["ETag"]).status_code == 304
+    assert _monthly(client, users, 2, feb.headers["ETag"]).status_code == 200
+
+
+def test_prebuild_builds_closed_periods_in_the_background(client, db, catalog, users):
+    _reservation(db, users, JAN)
+    url = "/api/v1/reports/prebuild"
+    params = {"kind": "monthly", "start": "2025-01-01", "end": "2025-04-01"}
+
+    r = client.post(url, params=params, headers=users["admin"]["headers"])
+    assert r.status_code == 202
+    assert r.json() == {"kind": "monthly", "queued": 3, "periods": ["monthly_2025_01", "monthly_2025_02", "monthly_2025_03"]}
+    # TestClient corre las BackgroundTasks antes de devolver la respuesta
+    rows = db.execute(select(ReportSnapshot).order_by(ReportSnapshot.name)).scalars().all()
+    assert [(s.name, s.built_version == s.version) for s in rows] == [(n, True) for n in r.json()["periods"]]
+    assert all(storage.exists(s.path) for s in rows)
+    assert _monthly(client, users, 1).headers["ETag"] == f'"{rows[0].sha256}"'
+
+    built_at = rows[0].built_at
+    client.post(url, params={**params, "force": "true"}, headers=users["admin"]["headers"])
+    assert _snapshot(db, "monthly_2025_01").built_at > built_at
+
+    assert client.post(url, params={**params, "end": "2025-01-01"}, headers=users["admin"]["headers"]).status_code == 400
+    assert client.post(url, params=params, headers=users["cliente"]["headers"]).status_code == 403
+
+
+def test_only_closed_periods_are_prebuilt():
+    today = today_utc()
+    periods = closed_periods("daily", today - timedelta(days=3), today + timedelta(days=3))
+    assert [p.start for p in periods] == [today - timedelta(days=n) for n in (3, 2, 1)]
+    assert closed_periods("monthly", today.replace(day=1), date(today.year + 1, 1, 1)) == []
+
+
+def test_snapshot_is_streamed_to_its_content_key(db, catalog, users):
+    for day in range(1, 9):
+        _reservation(db, users, JAN.replace(day=day), room_id=day % 3 + 1)
+    period = monthly_period(2025, 1)
+    stored = get_or_build(db, period)
+    data = storage.get(stored.path)
+    assert data == build_csv(db, period.start, period.end)
+    assert (stored.sha256, stored.size) == (hashlib.sha256(data).hexdigest(), len(data))
+    assert list(storage.scan(STAGING_DIR)) == []
+
+    # mismo contenido: se reutiliza el objeto y el temporal se descarta
+    assert get_or_build(db, period, force=True) == stored
+    assert list(storage.scan(STAGING_DIR)) == []
+
+
+def _broken_csv(*args):
+    yield b"reporte_desde,2025-01-01\n"
+    raise RuntimeError("se cortó la consulta")
+
+
+async def _broken_csv_async(*args):
+    yield b"reporte_desde,2025-01-01\n"
+    raise RuntimeError("se cortó la consulta")
+
+
+def test_a_failed_build_leaves_nothing_in_storage(db, catalog, users, monkeypatch):
+    _reservation(db, users, JAN)
+    monkeypatch.setattr(report_snapshots, "iter_csv", _broken_csv)
+    with pytest.raises(RuntimeError):
+        get_or_build(db, monthly_period(2025, 1))
+    assert list(storage.scan("reports")) == []
+    assert _snapshot(db, "monthly_2025_01").built_version is None
+
+
+@pytest.mark.anyio
+async def test_a_failed_async_build_leaves_nothing_in_storage(db, catalog, users, async_session_factory, monkeypatch):
+    _reservation(db, users, JAN)
+    monkeypatch.setattr(report_snapshots, "iter_csv_async", _broken_csv_async)
+    async with async_session_factory() as session:
+        with pytest.raises(RuntimeError):
+            await get_or_build_async(session, monthly_period(2025, 1))
+    assert list(storage.scan("reports")) == []
+    assert _snapshot(db, "monthly_2025_01").built_version is None
+    monkeypatch.undo()
+    async with async_session_factory() as session:
+        stored = await get_or_build_async(session, monthly_period(2025, 1))
+    assert storage.get(stored.path) == build_csv(db, date(2025, 1, 1), date(2025, 2, 1))
+    assert list(storage.scan(STAGING_DIR)) == []
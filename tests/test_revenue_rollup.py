@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import threading
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app.core.database import SessionLocal
+from app.models.daily_revenue_rollup import DailyRevenueRollup
+from app.models.reservation import Reservation
+from app.models.user import User
+from app.services import revenue_rollup
+from app.services.reservations_service import create_pending_reservation
+from tests.conftest import IS_POSTGRES
+
+
+def _rollup(db) -> dict:
+    db.expire_all()
+    rows = db.execute(select(DailyRevenueRollup.day, DailyRevenueRollup.room_type_id, DailyRevenueRollup.count, DailyRevenueRollup.revenue))
+    return {(d, t): (c, Decimal(r)) for d, t, c, r in rows if c}
+
+
+def _assert_matches_rebuild(db) -> dict:
+    incremental = _rollup(db)
+    revenue_rollup.rebuild(db)
+    assert incremental == _rollup(db)
+    return incremental
+
+
+def _booking(db, users, stay, room_id=1) -> Reservation:
+    return create_pending_reservation(db, user_id=users["cliente"]["id"], room_id=room_id, start=stay[0], end=stay[1])
+
+
+def test_rollup_follows_capture_edit_and_delete(db, catalog, users, stay):
+    res = _booking(db, users, stay)
+    other = _booking(db, users, stay, room_id=2)
+    assert _rollup(db) == {}
+
+    res.status = "paid"
+    db.commit()
+    day = res.created_at.date()
+    assert _assert_matches_rebuild(db) == {(day, 1): (1, Decimal("120.00"))}
+
+    res = db.get(Reservation, res.id)
+    res.room_id, res.costo_total = 3, Decimal("270")
+    other = db.get(Reservation, other.id)
+    other.status = "paid"
+    db.commit()
+    assert _assert_matches_rebuild(db) == {(day, 3): (1, Decimal("270.00")), (day, 2): (1, Decimal("195.00"))}
+
+    db.delete(db.get(Reservation, other.id))
+    db.commit()
+    assert _assert_matches_rebuild(db) == {(day, 3): (1, Decimal("270.00"))}
+
+    if IS_POSTGRES:  # sqlite no aplica ON DELETE CASCADE
+        db.delete(db.get(User, users["cliente"]["id"]))
+        db.commit()
+        assert _assert_matches_rebuild(db) == {}
+
+
+@pytest.mark.postgres
+def test_concurrent_changes_to_the_same_reservation_are_not_double_counted(db, catalog, users, stay):
+    res_id = _booking(db, users, stay).id
+    capture, edit = SessionLocal(), SessionLocal()
+    try:
+        # las dos sesiones cargan la reserva pending
+        paid = capture.get(Reservation, res_id)
+        edited = edit.get(Reservation, res_id)
+        paid.status = "paid"
+        capture.flush()  # bloquea la fila hasta el commit
+
+        edited.costo_total = Decimal("150")
+        done = threading.Event()
+
+        def flush_edit():
+            edit.commit()  # espera el lock de capture
+            done.set()
+
+        t = threading.Thread(target=flush_edit)
+        t.start()
+        assert not done.wait(0.5), "la edición debió esperar a la captura"
+        capture.commit()
+        t.join(10)
+        assert done.is_set()
+    finally:
+        capture.close()
+        edit.close()
+
+    day = db.get(Reservation, res_id).created_at.date()
+    assert _assert_matches_rebuild(db) == {(day, 1): (1, Decimal("150.00"))}
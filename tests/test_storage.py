@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import io
+import zipfile
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from app.storage.base import check_key
+from app.storage.local import LocalStorage
+
+BUCKET = "hotel-test"
+
+
+@pytest.fixture
+def local(tmp_path) -> LocalStorage:
+    return LocalStorage(tmp_path, shard_depth=2)
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    moto = pytest.importorskip("moto")
+    import boto3
+
+    from app.storage.s3 import S3Storage
+
+    for var in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        monkeypatch.setenv(var, "testing")
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield S3Storage(BUCKET, prefix="/hotel/", client=client)
+
+
+@pytest.fixture(params=["local", "s3"])
+def backend(request):
+    return request.getfixturevalue(request.param)
+
+
+def test_put_get_exists_size_delete(backend):
+    key = "reports/daily_2025-01-01.csv"
+    assert not backend.exists(key)
+    with pytest.raises(FileNotFoundError):
+        backend.get(key)
+    with pytest.raises(FileNotFoundError):
+        backend.size(key)
+
+    backend.put(key, b"fecha,total\n")
+    assert backend.exists(key)
+    assert backend.get(key) == b"fecha,total\n"
+    assert backend.size(key) == 12
+    assert b"".join(backend.iter_chunks(key, chunk_size=5)) == b"fecha,total\n"
+
+    backend.put(key, b"nuevo")
+    assert backend.get(key) == b"nuevo"
+    backend.delete(key)
+    assert not backend.exists(key)
+    backend.delete(key)  # borrar algo que no existe no falla
+
+
+@pytest.mark.parametrize("key", ["", "/abs", "a//b", "reports/../secret", "./x"])
+def test_invalid_keys_are_rejected(backend, key):
+    with pytest.raises(ValueError):
+        check_key(key)
+    with pytest.raises(ValueError):
+        backend.put(key, b"x")
+
+
+def test_tee_stores_only_a_fully_consumed_stream(backend):
+    chunks = [b"a" * 10, b"b" * 10, b"c"]
+    assert list(backend.tee(iter(chunks), "reports/full.csv")) == chunks
+    assert backend.get("reports/full.csv") == b"".join(chunks)
+
+    # el cliente corta después del primer chunk
+    stream = backend.tee(iter(chunks), "reports/cut.csv")
+    next(stream)
+    stream.close()
+    assert not backend.exists("reports/cut.csv")
+
+
+@pytest.mark.anyio
+async def test_async_helpers(backend):
+    async def chunks():
+        yield b"uno,"
+        yield b"dos"
+
+    await backend.put_async("cache/pdf/x.pdf", b"%PDF")
+    assert await backend.exists_async("cache/pdf/x.pdf")
+    assert await backend.get_async("cache/pdf/x.pdf") == b"%PDF"
+    assert [c async for c in backend.tee_async(chunks(), "reports/a.csv")] == [b"uno,", b"dos"]
+    assert backend.get("reports/a.csv") == b"uno,dos"
+
+
+def test_open_random_reads_one_zip_member(backend):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for n in range(50):
+            zf.writestr(f"reserva_{n}.txt", f"Reserva #{n}\n" * 200)
+    backend.put("archives/reservas/2025/01.zip", buf.getvalue())
+
+    f = backend.open_random("archives/reservas/2025/01.zip")
+    try:
+        assert f.seekable()
+        with zipfile.ZipFile(f) as zf:
+            assert zf.read("reserva_42.txt") == b"Reserva #42\n" * 200
+    finally:
+        f.close()
+
+
+def test_scan_lists_keys_with_their_mtime(backend):
+    before = datetime.now(timezone.utc) - timedelta(minutes=1)
+    for key in ("cache/pdf/a.pdf", "cache/pdf/b.pdf", "cache/other.pdf", "reports/a.csv"):
+        backend.put(key, b"x")
+    found = dict(backend.scan("cache/pdf"))
+    assert sorted(found) == ["cache/pdf/a.pdf", "cache/pdf/b.pdf"]
+    assert all(before < mtime <= datetime.now(timezone.utc) for mtime in found.values())
+    assert list(backend.scan("nada")) == []
+
+
+def test_rename_moves_and_replaces(backend):
+    backend.put("reports/closed/tmp/a.csv", b"nuevo")
+    backend.put("reports/closed/a.csv", b"viejo")
+    backend.rename("reports/closed/tmp/a.csv", "reports/closed/a.csv")
+    assert backend.get("reports/closed/a.csv") == b"nuevo"
+    assert not backend.exists("reports/closed/tmp/a.csv")
+    with pytest.raises(FileNotFoundError):
+        backend.rename("reports/closed/tmp/a.csv", "reports/closed/b.csv")
+
+
+# ---------- S3 ----------
+
+
+def test_s3_objects_live_under_the_prefix(s3):
+    s3.put("reports/a.csv", b"x")
+    keys = [o["Key"] for o in s3.client.list_objects_v2(Bucket=BUCKET)["Contents"]]
+    assert keys == ["hotel/reports/a.csv"]
+    assert s3.client.head_object(Bucket=BUCKET, Key="hotel/reports/a.csv")["ContentType"] == "text/csv"
+
+
+def test_s3_presigned_url(s3):
+    s3.put("cache/pdf/abc.pdf", b"%PDF")
+    url = s3.presigned_url("cache/pdf/abc.pdf", filename="reserva_1.pdf", media_type="application/pdf")
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    assert parsed.path.endswith("/hotel/cache/pdf/abc.pdf")
+    assert query["response-content-disposition"] == ['attachment; filename="reserva_1.pdf"']
+    assert query["response-content-type"] == ["application/pdf"]
+    got = requests.get(url)
+    assert got.status_code == 200 and got.content == b"%PDF"
+
+
+def test_s3_requires_a_bucket():
+    from app.storage.s3 import S3Storage
+
+    with pytest.raises(ValueError):
+        S3Storage("", client=object())
+
+
+# ---------- disco local ----------
+
+
+def test_local_keys_are_sharded_by_hash(local, tmp_path):
+    path = local.path("reports/daily_2025-01-01.csv")
+    rel = path.relative_to(tmp_path).parts
+    assert rel[0] == "reports" and rel[-1] == "daily_2025-01-01.csv"
+    assert len(rel) == 4 and all(len(p) == 2 for p in rel[1:3])
+    assert local.path("reports/daily_2025-01-01.csv") == path  # estable
+
+    local.put("reports/daily_2025-01-01.csv", b"x")
+    assert path.read_bytes() == b"x"
+    assert not (tmp_path / "reports" / "daily_2025-01-01.csv").exists()
+    assert LocalStorage(tmp_path, shard_depth=0).path("reports/a.csv") == tmp_path / "reports" / "a.csv"
+
+
+def test_local_reads_legacy_unsharded_files(local, tmp_path):
+    legacy = tmp_path / "reservas" / "reserva_1.txt"
+    legacy.parent.mkdir(parents=True)
+    legacy.write_bytes(b"viejo")
+
+    assert local.exists("reservas/reserva_1.txt")
+    assert local.get("reservas/reserva_1.txt") == b"viejo"
+    assert local.size("reservas/reserva_1.txt") == 5
+
+    # una escritura nueva va a la ruta con sharding y gana sobre la plana
+    local.put("reservas/reserva_1.txt", b"nuevo")
+    assert local.get("reservas/reserva_1.txt") == b"nuevo"
+    local.delete("reservas/reserva_1.txt")
+    assert not legacy.exists()
+    assert not local.exists("reservas/reserva_1.txt")
+
+    legacy.write_bytes(b"viejo")
+    local.put("reservas/reserva_2.txt", b"x")
+    assert sorted(k for k, _ in local.scan("reservas")) == ["reservas/reserva_1.txt", "reservas/reserva_2.txt"]
+
+
+def test_local_writes_replace_atomically(local):
+    key = "reports/monthly_2025-01-01.csv"
+    local.put(key, b"anterior")
+
+    with local.writer(key) as f:
+        f.write(b"a medio escribir")
+        # mientras se escribe, los lectores ven el archivo anterior completo
+        assert local.get(key) == b"anterior"
+    assert local.get(key) == b"a medio escribir"
+
+    with pytest.raises(RuntimeError):
+        with local.writer(key) as f:
+            f.write(b"roto")
+            raise RuntimeError("falla a mitad")
+    assert local.get(key) == b"a medio escribir"
+    # no quedan temporales junto al archivo
+    assert [p.name for p in local.path(key).parent.iterdir()] == ["monthly_2025-01-01.csv"]